@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+import net_proxy
+ETS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(ETS_DIR)
+SERVER_VARIANTS = {
+    "thread": os.path.join(ETS_DIR, "file_server_thread_pool.py"),
+    "process": os.path.join(ETS_DIR, "file_server_process_pool.py"),
+    "tugas3": os.path.join(REPO_DIR, "tugas3", "file_server.py"),
+}
+COMPARED_COLUMNS = (("avg_duration", "avg s"), ("latency_s.p99", "p99 s"), ("aggregate_throughput_mb_s", "MB/s"), ("server_resources.cpu_ms_per_mb", "CPU-ms/MB"), ("server_resources.peak_rss_mb", "peak RSS MB"))
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_until_listening(port, proc, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None: return False
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5): return True
+        except OSError: time.sleep(0.1)
+    return False
+
+class ServerUnderTest:
+    def __init__(self, variant, work_dir, extra_env=None, workers=None):
+        self.variant = variant; self.script = SERVER_VARIANTS[variant]
+        self.port = free_port()
+        self.storage_dir = os.path.join(work_dir, "storage"); os.makedirs(self.storage_dir, exist_ok=True)
+        self.log_path = os.path.join(work_dir, "server.log")
+        self.env = dict(os.environ, ETS_SERVER_PORT=str(self.port), ETS_FILES_DIR=os.path.join(self.storage_dir, "files"), **(extra_env or {}))
+        if workers: self.env["ETS_SERVER_WORKERS"] = str(workers)
+        self.proc = None; self.log_file = None
+    def start(self, timeout=15):
+        self.log_file = open(self.log_path, "w")
+        # tugas3 keeps its files in ./files relative to the working directory, so every variant runs inside its own storage dir
+        self.proc = subprocess.Popen([sys.executable, self.script], cwd=self.storage_dir, env=self.env, stdout=self.log_file, stderr=subprocess.STDOUT, start_new_session=True)
+        if not wait_until_listening(self.port, self.proc, timeout):
+            self.stop(); raise RuntimeError(f"{self.variant} server did not start listening on port {self.port} (see {self.log_path})")
+    def stop(self, timeout=10):
+        if self.proc and self.proc.poll() is None:
+            for sig, wait_s in ((signal.SIGINT, timeout), (signal.SIGTERM, 3), (signal.SIGKILL, 3)):
+                try: os.killpg(self.proc.pid, sig)
+                except ProcessLookupError: break
+                try: self.proc.wait(wait_s); break
+                except subprocess.TimeoutExpired: continue
+        if self.log_file: self.log_file.close(); self.log_file = None
+
+def run_variant(variant, client_args, work_root, server_env, server_workers, quiet, impairment=None):
+    work_dir = os.path.join(work_root, variant); client_dir = os.path.join(work_dir, "client"); os.makedirs(client_dir, exist_ok=True)
+    results_path = os.path.join(work_dir, "results.json")
+    server = ServerUnderTest(variant, work_dir, server_env, server_workers)
+    print(f"\n##### {variant}: starting {os.path.relpath(server.script, REPO_DIR)} on port {server.port} (storage {server.storage_dir}) #####", flush=True)
+    server.start()
+    proxy = None
+    try:
+        client_port = server.port
+        if impairment and impairment.active:
+            proxy = net_proxy.NetProxy("127.0.0.1", server.port, impairment); proxy.start()
+            client_port = proxy.wait_ready()
+            print(f"{variant}: client connects through impairment proxy on port {client_port} ({impairment.describe()})", flush=True)
+        command = [sys.executable, os.path.join(ETS_DIR, "file_client_cli.py"), "127.0.0.1", str(client_port)] + client_args + ["--results_json", results_path]
+        if "--server_pid" not in client_args: command += ["--server_pid", str(server.proc.pid)]
+        completed = subprocess.run(command, cwd=client_dir, stdout=subprocess.DEVNULL if quiet else None)
+        if completed.returncode not in (0, 1): print(f"{variant}: client exited with status {completed.returncode}", flush=True)
+    finally:
+        if proxy: proxy.stop(); print(f"{variant}: proxy {net_proxy.format_stats(proxy.stats)}", flush=True)
+        server.stop()
+    if not os.path.exists(results_path): return []
+    with open(results_path) as f: return json.load(f).get("results", [])
+
+def _metric(op_summary, path):
+    value = op_summary
+    for part in path.split("."): value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+def print_comparison(results_by_variant):
+    variants = list(results_by_variant)
+    rows = {}
+    for variant, results in results_by_variant.items():
+        for summary in results:
+            for op_name, op_summary in summary["operations"].items():
+                resources = summary.get("server_resources") or {}
+                rows.setdefault((summary["key"], op_name), {})[variant] = dict(op_summary, server_resources=dict(resources, peak_rss_mb=resources["peak_rss"] / (1024*1024)) if resources else None)
+    header = f"{'Config':<34}{'Op':<8}" + "".join(f"{variant + ' ' + label:>22}" for variant in variants for _, label in COMPARED_COLUMNS)
+    print("\n" + "=" * 15 + " SERVER VARIANT COMPARISON " + "=" * 15); print(header)
+    for (key, op_name), by_variant in rows.items():
+        cells = []
+        for variant in variants:
+            for path, _ in COMPARED_COLUMNS:
+                value = _metric(by_variant.get(variant, {}), path)
+                cells.append(f"{value:>22.4f}" if value is not None else f"{'n/a':>22}")
+        print(f"{key:<34}{op_name:<8}" + "".join(cells))
+    print("=" * len(header))
+
+def main():
+    parser = argparse.ArgumentParser(description="Start each file server variant on an ephemeral port with temporary storage, run file_client_cli.py against it and compare the results.",
+                                     epilog="Arguments after '--' go to file_client_cli.py, e.g. bench_harness.py -- -c 1 5 -s 1 10 -o UPLOAD GET")
+    parser.add_argument("--variants", nargs='+', choices=list(SERVER_VARIANTS), default=list(SERVER_VARIANTS), help="Server variants to benchmark (default: all).")
+    parser.add_argument("--server_workers", type=int, default=None, help="ETS_SERVER_WORKERS for the ets pool servers (default: their built-in 50).")
+    parser.add_argument("--server_env", nargs='*', default=[], metavar="NAME=VALUE", help="Extra environment for the servers, e.g. ETS_DURABILITY=safe ETS_STORAGE_MODE=cas.")
+    parser.add_argument("--output_json", type=str, default=None, help="Write every variant's results to this JSON file.")
+    net_proxy.add_impairment_arguments(parser)
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary storage, client and log directories.")
+    parser.add_argument("--show_client_output", action="store_true", help="Show file_client_cli.py output instead of only the comparison table.")
+    args, client_args = parser.parse_known_args()
+    if client_args and client_args[0] == "--": client_args = client_args[1:]
+    if not client_args: client_args = ["-c", "1", "5", "-s", "1", "10", "-q"]
+    server_env = dict(item.split("=", 1) for item in args.server_env)
+    # With any impairment option set, every variant is measured through the same simulated WAN path
+    impairment = net_proxy.impairment_from_args(args)
+    work_root = tempfile.mkdtemp(prefix="ets_bench_")
+    results_by_variant = {}
+    try:
+        for variant in args.variants:
+            try: results_by_variant[variant] = run_variant(variant, client_args, work_root, server_env, args.server_workers, not args.show_client_output, impairment)
+            except RuntimeError as e: print(f"{variant}: {e}", flush=True); results_by_variant[variant] = []
+    finally:
+        if args.keep: print(f"Work directory kept at {work_root}")
+        else: shutil.rmtree(work_root, ignore_errors=True)
+    print_comparison(results_by_variant)
+    if args.output_json:
+        with open(args.output_json, "w") as f: json.dump({"client_args": client_args, "server_env": server_env, "impairment": impairment.describe() if impairment.active else None, "results": results_by_variant}, f, indent=2)
+        print(f"Results written to {args.output_json}")
+    return 0 if all(results_by_variant.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
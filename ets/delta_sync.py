@@ -0,0 +1,141 @@
+import math
+import zlib
+import struct
+import hashlib
+from collections import deque
+from itertools import accumulate, chain, compress, count, islice
+from operator import sub
+ADLER_MOD = 65521
+OP_COPY = b'C'
+OP_DATA = b'D'
+COPY_FORMAT = struct.Struct('>QI')
+DATA_FORMAT = struct.Struct('>I')
+WINDOW_SIZE = 4 * 1048576
+MIN_SCAN_SIZE = 1024
+MAX_SCAN_SIZE = 65536
+def default_block_size(file_size):
+    block_size = int(math.sqrt(max(file_size, 1))) // 1024 * 1024
+    return max(2048, min(65536, block_size))
+def strong_checksum(block):
+    return hashlib.blake2b(block, digest_size=16).hexdigest()
+def block_signatures(fp, block_size):
+    signatures = []
+    for block in iter(lambda: fp.read(block_size), b''):
+        signatures.append([zlib.adler32(block), strong_checksum(block)])
+    return signatures
+def wanted_sums(index, block_size):
+    # Flags every raw block sum whose adler32 "a" half (1 + sum mod ADLER_MOD) belongs to some signature
+    wanted = bytearray(255 * block_size + 1)
+    for a in {weak & 0xffff for weak in index}:
+        first = (a - 1) % ADLER_MOD
+        wanted[first::ADLER_MOD] = b'\x01' * len(range(first, len(wanted), ADLER_MOD))
+    return wanted
+def weak_matches(view, start, stop, block_size, index, wanted):
+    # Rolling adler32 of every offset in [start, stop), from prefix sums built by C-level iterators instead of a per-byte loop
+    sums = list(accumulate(chain((0,), view[start:stop + block_size - 1])))
+    block_sums = list(map(sub, islice(sums, block_size, None), sums))
+    hits = list(compress(count(), map(wanted.__getitem__, block_sums)))
+    if not hits:
+        return []
+    # Offsets whose "a" half fits get b = block_size + the running sums inside the block, from a second prefix sum
+    running = list(accumulate(chain((0,), sums)))
+    return [start + i for i in hits
+            if ((running[i + block_size + 1] - running[i + 1] - block_size * sums[i] + block_size) % ADLER_MOD) << 16 | (block_sums[i] + 1) % ADLER_MOD in index]
+def compute_delta(fp, signatures, block_size, out, base_size=None):
+    # The base's last block is shorter when its size is not a multiple of block_size; it can only match the tail of the new file
+    short_block = None
+    if base_size and base_size % block_size and signatures:
+        short_block = (len(signatures) - 1, base_size % block_size, signatures[-1][1])
+        signatures = signatures[:-1]
+    index = {}
+    for block_index, (weak, strong) in enumerate(signatures):
+        index.setdefault(weak, []).append((block_index, strong))
+    wanted = wanted_sums(index, block_size)
+    literal_bytes = 0
+    pending_copy = None
+    def flush_copy():
+        nonlocal pending_copy
+        if pending_copy:
+            out.write(OP_COPY + COPY_FORMAT.pack(*pending_copy))
+            pending_copy = None
+    def emit_copy(block_index):
+        nonlocal pending_copy
+        if pending_copy and pending_copy[0] + pending_copy[1] == block_index:
+            pending_copy = (pending_copy[0], pending_copy[1] + 1)
+        else:
+            flush_copy()
+            pending_copy = (block_index, 1)
+    def emit_literal(block):
+        nonlocal literal_bytes
+        if len(block):
+            flush_copy()
+            out.write(OP_DATA + DATA_FORMAT.pack(len(block)))
+            out.write(block)
+            literal_bytes += len(block)
+    def match(block):
+        candidates = index.get(zlib.adler32(block))
+        if candidates:
+            strong = strong_checksum(block)
+            return next((block_index for block_index, candidate in candidates if candidate == strong), None)
+        return None
+    # The file is read in windows; at most block_size - 1 unmatched bytes carry over into the next one
+    carry = b''
+    while True:
+        chunk = fp.read(WINDOW_SIZE)
+        buf = carry + chunk if carry else chunk
+        view = memoryview(buf)
+        last_start = len(buf) - block_size
+        position = literal_start = scanned = 0
+        hits = deque(); segment = MIN_SCAN_SIZE
+        while position <= last_start:
+            matched = match(view[position:position + block_size])
+            if matched is not None:
+                emit_literal(view[literal_start:position])
+                emit_copy(matched)
+                position += block_size; literal_start = position; segment = MIN_SCAN_SIZE
+                continue
+            # Skip straight to the next offset whose weak checksum is wanted; segments grow while nothing matches,
+            # so a short edit followed by matching blocks is not scanned far ahead
+            position += 1
+            while True:
+                while hits and hits[0] < position:
+                    hits.popleft()
+                if hits or scanned > last_start:
+                    break
+                segment_start = max(scanned, position)
+                scanned = min(segment_start + segment, last_start + 1); segment = min(2 * segment, MAX_SCAN_SIZE)
+                hits.extend(weak_matches(view, segment_start, scanned, block_size, index, wanted))
+            position = hits.popleft() if hits else max(position, last_start + 1)
+        if not chunk:
+            tail = view[literal_start:]
+            if short_block and len(tail) >= short_block[1] and strong_checksum(tail[len(tail) - short_block[1]:]) == short_block[2]:
+                emit_literal(tail[:len(tail) - short_block[1]])
+                emit_copy(short_block[0])
+            else:
+                emit_literal(tail)
+            break
+        emit_literal(view[literal_start:position])
+        carry = bytes(view[position:])
+    flush_copy()
+    return literal_bytes
+def apply_delta(base_fp, delta, block_size, write):
+    view = memoryview(delta); position = 0; written = 0
+    while position < len(view):
+        op = bytes(view[position:position + 1]); position += 1
+        if op == OP_COPY:
+            block_index, count = COPY_FORMAT.unpack_from(view, position); position += COPY_FORMAT.size
+            base_fp.seek(block_index * block_size)
+            remaining = count * block_size
+            while remaining:
+                block = base_fp.read(min(remaining, 1048576))
+                if not block:
+                    break
+                write(block); written += len(block); remaining -= len(block)
+        elif op == OP_DATA:
+            (length,) = DATA_FORMAT.unpack_from(view, position); position += DATA_FORMAT.size
+            if position + length > len(view):
+                raise ValueError('Truncated literal in delta stream')
+            write(view[position:position + length]); written += length; position += length
+        else:
+            raise ValueError(f'Unknown delta instruction {op!r}')
+    return written
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import base64
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from file_interface import FileInterface, DURABILITY_MODES, get_group_committer
+
+def run_mode(mode, num_files, size_kb, concurrency, storage_mode):
+    fi = FileInterface(storage_mode=storage_mode, durability=mode)
+    payload_base64 = base64.b64encode(os.urandom(size_kb * 1024)).decode()
+    names = [f"durability_bench_{mode}_{idx}.bin" for idx in range(num_files)]
+    def upload_one(name):
+        start_time = time.perf_counter()
+        hasil = fi.upload([name, payload_base64])
+        return hasil.get('status') == 'OK', time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(upload_one, names))
+    duration = time.perf_counter() - start_time
+    for name in names:
+        fi.delete([name])
+    latencies = sorted(latency for ok, latency in results if ok)
+    failed = sum(1 for ok, _ in results if not ok)
+    return {"mode": mode, "duration": duration, "files_per_s": len(latencies) / duration if duration > 0 else 0.0,
+            "mb_per_s": len(latencies) * size_kb / 1024 / duration if duration > 0 else 0.0,
+            "avg_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0, "failed": failed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare upload throughput and latency of the server durability modes (fast, safe, group).")
+    parser.add_argument("-m", "--modes", nargs='+', choices=list(DURABILITY_MODES), default=list(DURABILITY_MODES), help="Durability modes to benchmark (default: all).")
+    parser.add_argument("-f", "--files", type=int, default=500, help="Files uploaded per mode (default: 500).")
+    parser.add_argument("-s", "--size_kb", type=int, default=16, help="Size of each file in KB (default: 16).")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Concurrent uploads, like server worker threads (default: 16).")
+    parser.add_argument("--storage_mode", choices=['plain', 'cas'], default='plain', help="Storage mode of the FileInterface under test (default: plain).")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show FileInterface logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
+
+    print(f"Uploading {args.files} x {args.size_kb}KB files per mode with {args.concurrency} concurrent uploads (ETS_GROUP_COMMIT_MS={os.environ.get('ETS_GROUP_COMMIT_MS', '5')}).")
+    print(f"{'Mode':<8}{'Duration s':>12}{'Files/s':>12}{'MB/s':>10}{'Avg ms':>10}{'P99 ms':>10}{'Failed':>8}")
+    for mode in args.modes:
+        result = run_mode(mode, args.files, args.size_kb, args.concurrency, args.storage_mode)
+        print(f"{result['mode']:<8}{result['duration']:>12.3f}{result['files_per_s']:>12.1f}{result['mb_per_s']:>10.2f}{result['avg_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['failed']:>8}")
+    if 'group' in args.modes:
+        stats = get_group_committer().stats
+        print(f"Group commit: {stats['files']} files in {stats['batches']} fsync batches (largest batch {stats['max_batch']}).")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,51 @@
 import socket
 import json
 import base64
+import binascii
+import re
+import uuid
+import tempfile
+import hashlib
 import logging
 import os
 import time
+import random
+import math
+import statistics
 import threading 
 import multiprocessing 
+import asyncio
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import argparse
+import csv
 import sys
+import subprocess
 from enum import Enum
+try:
+    import resource
+except ImportError:
+    resource = None
+import delta_sync
+import payload_codec
+import mapped_io
+import workload_profile
+import proc_sampler
+from latency_histogram import LogHistogram
 
 class ExecutorType(Enum):
     THREAD = "thread"
     PROCESS = "process"
+    ASYNCIO = "asyncio"
+
+class ConnectionMode(Enum):
+    COLD = "cold"
+    POOLED = "pooled"
 
 class OperationType(Enum):
     UPLOAD = "UPLOAD"
     GET = "GET"
+    LIST = "LIST"
+    DELETE = "DELETE"
 
 def setup_worker_logging(log_level_arg, log_file_arg, worker_id_prefix="WORKER"):
     
@@ -40,53 +68,199 @@ def setup_worker_logging(log_level_arg, log_file_arg, worker_id_prefix="WORKER")
     )
     return logging.getLogger(f"{__name__}.{worker_id_prefix}")
 
-def send_command(server_ip, server_port, logger, command_str="", task_id="N/A", operation_type="UNKNOWN_OP"):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(600.0)
-    
+# Raw bytes per streamed base64 chunk; a multiple of 3 so the encoded chunks concatenate into one valid base64 string
+STREAM_CHUNK_BYTES = 3 * 256 * 1024
+DATA_FILE_MARKER = b'"data_file": "'
+
+def base64_chunks(fp, chunk_bytes=STREAM_CHUNK_BYTES):
+    buffer = bytearray(chunk_bytes); view = memoryview(buffer)
+    while True:
+        n = fp.readinto(buffer)
+        if not n: return
+        yield base64.b64encode(view[:n])
+
+def upload_command_chunks(source, server_filename, codec='none', chunk_bytes=STREAM_CHUNK_BYTES, level=None):
+    source.seek(0)
+    yield f"UPLOAD {server_filename} ".encode()
+    if codec == 'none': yield from base64_chunks(source, chunk_bytes); return
+    # Compressed output is regrouped into 3-byte multiples as it is produced, so the file is never compressed in memory whole
+    yield from payload_codec.base64_stream(payload_codec.compress_stream(source, codec, level), chunk_bytes)
+    yield f" {codec}".encode()
+
+def mupload_command_chunks(source, server_names, chunk_bytes=STREAM_CHUNK_BYTES):
+    # Every name carries its own copy of the content; each copy is re-read and encoded as it is sent
+    yield b"MUPLOAD"
+    for name in server_names:
+        source.seek(0)
+        yield f" {name} ".encode()
+        yield from base64_chunks(source, chunk_bytes)
+
+def delta_command_chunks(head, delta, chunk_bytes=STREAM_CHUNK_BYTES):
+    delta.seek(0)
+    yield head.encode()
+    yield from base64_chunks(delta, chunk_bytes)
+
+class Base64FileSink:
+    def __init__(self, directory):
+        self.directory = directory; self.path = None; self.fp = None
+    def reset(self):
+        self.discard(); os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f".get-{uuid.uuid4().hex}.part"); self.fp = open(self.path, 'wb')
+        self.pending = b""; self.decompressor = None; self.started = False; self.written = 0
+    def begin(self, head):
+        # data_codec precedes data_file in the server's reply, so the decompressor is known before the payload arrives
+        match = re.search(rb'"data_codec": "(\w+)"', head); codec = match.group(1).decode() if match else 'none'
+        self.decompressor = payload_codec.new_decompressor(codec) if codec != 'none' else None; self.started = True
+    def write(self, encoded):
+        data = self.pending + encoded; usable = len(data) - len(data) % 4
+        self.pending = data[usable:]
+        if usable: self._emit(binascii.a2b_base64(data[:usable]))
+    def _emit(self, raw):
+        for block in (payload_codec.bounded_decompress(self.decompressor, raw) if self.decompressor is not None else (raw,)):
+            if block: self.fp.write(block); self.written += len(block)
+    def finish(self):
+        if self.pending: raise ValueError(f"Truncated base64 payload ({len(self.pending)} dangling characters)")
+        if self.decompressor is not None: payload_codec.check_complete(self.decompressor)
+        self.fp.close(); self.fp = None
+    def commit(self, final_path):
+        os.replace(self.path, final_path); self.path = None
+    def discard(self):
+        if self.fp: self.fp.close(); self.fp = None
+        if self.path: _remove_quietly(self.path); self.path = None
+
+class ReplyScanner:
+    def __init__(self, sink=None):
+        self.sink = sink; self.buffer = bytearray(); self.scanned = 0
+        self.prefix = None; self.in_payload = False; self.remainder = b""
+    def feed(self, data):
+        if self.in_payload:
+            quote_at = data.find(b'"')
+            if quote_at == -1: self.sink.write(data); return None
+            self.sink.write(data[:quote_at]); self.in_payload = False; data = data[quote_at:]
+        self.buffer += data
+        eom_at = self.buffer.find(b"\r\n\r\n", max(0, self.scanned - 3))
+        if self.sink is not None and self.prefix is None:
+            marker_at = self.buffer.find(DATA_FILE_MARKER, max(0, self.scanned - len(DATA_FILE_MARKER) + 1))
+            if marker_at != -1 and (eom_at == -1 or marker_at < eom_at):
+                # The data_file string goes straight into the sink; only the JSON around it is kept
+                self.prefix = bytes(self.buffer[:marker_at + len(DATA_FILE_MARKER)]); rest = bytes(self.buffer[len(self.prefix):])
+                self.buffer = bytearray(); self.scanned = 0; self.in_payload = True
+                self.sink.begin(self.prefix)
+                return self.feed(rest)
+        if eom_at == -1: self.scanned = len(self.buffer); return None
+        self.remainder = bytes(self.buffer[eom_at + 4:])
+        return (self.prefix or b"") + bytes(self.buffer[:eom_at])
+
+class ServerConnection:
+    def __init__(self, server_ip, server_port, timeout=600.0):
+        self.address = (server_ip, server_port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try: self.sock.connect(self.address)
+        except Exception: self.sock.close(); raise
+        self.recv_buffer = b""
+        self.commands_sent = 0
+    def send_message(self, command_str):
+        self.sock.sendall((command_str + "\r\n\r\n").encode())
+        self.commands_sent += 1
+    def send_chunks(self, chunks):
+        for chunk in chunks: self.sock.sendall(chunk)
+        self.sock.sendall(b"\r\n\r\n")
+        self.commands_sent += 1
+    def _recv(self, buffer_size):
+        data = self.sock.recv(buffer_size)
+        if not data: raise ConnectionError("Connection closed by peer before end of message")
+        return data
+    def recv_message_to(self, sink, buffer_size=1048576):
+        scanner = ReplyScanner(sink); message = scanner.feed(self.recv_buffer)
+        while message is None: message = scanner.feed(self._recv(buffer_size))
+        self.recv_buffer = scanner.remainder
+        return message
+    def recv_message(self, buffer_size=1048576):
+        chunks = [self.recv_buffer] if self.recv_buffer else []
+        tail = self.recv_buffer[-3:]; eom_found = b"\r\n\r\n" in self.recv_buffer
+        while not eom_found:
+            data = self.sock.recv(buffer_size)
+            if not data: raise ConnectionError("Connection closed by peer before end of message")
+            eom_found = b"\r\n\r\n" in tail + data[:3] or b"\r\n\r\n" in data
+            chunks.append(data); tail = (tail + data)[-3:]
+        message, _, self.recv_buffer = b"".join(chunks).partition(b"\r\n\r\n")
+        return message
+    def close(self):
+        try: self.sock.close()
+        except OSError: pass
+
+class ConnectionPool:
+    def __init__(self, server_ip, server_port, logger, max_idle=4, timeout=600.0):
+        self.server_ip = server_ip; self.server_port = server_port; self.logger = logger
+        self.max_idle = max_idle; self.timeout = timeout
+        self.idle_connections = []; self.lock = threading.Lock()
+        self.stats = {"connects": 0, "reuses": 0, "discards": 0}
+    def acquire(self):
+        with self.lock:
+            if self.idle_connections:
+                self.stats["reuses"] += 1
+                return self.idle_connections.pop(), True
+            self.stats["connects"] += 1
+        self.logger.debug(f"Pool: opening new connection to {self.server_ip}:{self.server_port}")
+        return ServerConnection(self.server_ip, self.server_port, self.timeout), False
+    def release(self, conn):
+        with self.lock:
+            if len(self.idle_connections) < self.max_idle: self.idle_connections.append(conn); return
+        conn.close()
+    def discard(self, conn):
+        with self.lock: self.stats["discards"] += 1
+        conn.close()
+    def close_all(self):
+        with self.lock: idle, self.idle_connections = self.idle_connections, []
+        for conn in idle: conn.close()
+        self.logger.debug(f"Pool closed. Stats: {self.stats}")
+
+def send_command(server_ip, server_port, logger, command_str="", task_id="N/A", operation_type="UNKNOWN_OP", pool=None, sink=None):
     process_name = multiprocessing.current_process().name
     thread_id = threading.get_ident()
     log_prefix = f"Task {task_id} ({operation_type} {process_name} Thr {thread_id})"
+    conn = None; reused = False; cleaned_data = ""
+    for attempt in range(2):
+        try:
+            if pool: conn, reused = pool.acquire()
+            else:
+                logger.debug(f"{log_prefix}: Connecting to {server_ip}:{server_port}")
+                conn = ServerConnection(server_ip, server_port)
+            logger.debug(f"{log_prefix}: Connected (reused={reused}).")
+            # A callable command yields its bytes in chunks, so large uploads are never built as one string
+            if logger.isEnabledFor(logging.DEBUG): logger.info(f"{log_prefix}: Sending cmd: {'<streamed>' if callable(command_str) else command_str[:60]}{'...' if not callable(command_str) and len(command_str)>60 else ''}")
+            if callable(command_str): conn.send_chunks(command_str())
+            else: conn.send_message(command_str)
+            logger.debug(f"{log_prefix}: sendall completed.")
+            if sink: sink.reset()
+            data_received_bytes = conn.recv_message_to(sink) if sink else conn.recv_message()
+            logger.debug(f"{log_prefix}: Detected EOM.")
+            try: cleaned_data = data_received_bytes.decode().strip()
+            except UnicodeDecodeError as e: logger.error(f"{log_prefix}: Final UnicodeDecodeError: {e}. Data: {data_received_bytes[:200]}..."); conn = _finish_connection(pool, conn, False); return {'status': 'ERROR', 'data': 'Unicode decode error on final receive buffer'}
+            logger.debug(f"{log_prefix}: Raw data from server (first 70): {repr(cleaned_data[:70])}")
+            if not cleaned_data: logger.error(f"{log_prefix}: No parsable data from server."); conn = _finish_connection(pool, conn, False); return {'status': 'ERROR', 'data': 'No data received/parsed'}
+            hasil = json.loads(cleaned_data)
+            conn = _finish_connection(pool, conn, True)
+            return hasil
+        except (ConnectionError, BrokenPipeError) as e:
+            conn = _finish_connection(pool, conn, False)
+            if reused and attempt == 0: logger.warning(f"{log_prefix}: Pooled connection went stale ({e}), retrying on a fresh connection."); continue
+            if isinstance(e, ConnectionRefusedError): logger.error(f"{log_prefix}: Connection refused."); return {'status': 'ERROR', 'data': 'Connection refused'}
+            logger.error(f"{log_prefix}: Connection error: {e}"); return {'status': 'ERROR', 'data': str(e)}
+        except socket.timeout: logger.error(f"{log_prefix}: Socket op timeout."); conn = _finish_connection(pool, conn, False); return {'status': 'ERROR', 'data': 'Socket timeout'}
+        except json.JSONDecodeError as e: logger.error(f"{log_prefix}: Failed to decode JSON: {e}. Received: {cleaned_data[:200]}..."); conn = _finish_connection(pool, conn, False); return {'status': 'ERROR', 'data': f'JSON decode error: {e}'}
+        except Exception as e: logger.error(f"{log_prefix}: Exception in send_command: {e}", exc_info=True); conn = _finish_connection(pool, conn, False); return {'status': 'ERROR', 'data': str(e)}
+    return {'status': 'ERROR', 'data': 'Retry on fresh connection failed'}
 
-    logger.debug(f"{log_prefix}: Connecting to {server_ip}:{server_port}")
-    try:
-        sock.connect((server_ip, server_port))
-        logger.debug(f"{log_prefix}: Connected.")
-        message_to_send = command_str + "\r\n\r\n"
-        if logger.isEnabledFor(logging.DEBUG): logger.info(f"{log_prefix}: Sending cmd: {command_str[:60]}{'...' if len(command_str)>60 else ''}")
-        logger.debug(f"{log_prefix}: Raw msg (first 60): {repr(message_to_send[:60])}")
-        sock.sendall(message_to_send.encode())
-        logger.debug(f"{log_prefix}: sendall completed.")
-        data_received_chunks = []; buffer_size = 1048576
-        while True:
-            data = sock.recv(buffer_size)
-            if data:
-                data_received_chunks.append(data)
-                logger.debug(f"{log_prefix}: Recv chunk len: {len(data)}")
-                try:
-                    if b"\r\n\r\n" in data_received_chunks[-1] or \
-                       (len(data_received_chunks) > 1 and b"\r\n\r\n" in data_received_chunks[-2] + data_received_chunks[-1]):
-                        if b"".join(data_received_chunks).decode(errors='ignore').count("\r\n\r\n") > 0: 
-                            logger.debug(f"{log_prefix}: Detected EOM.")
-                            break
-                except UnicodeDecodeError: logger.debug(f"{log_prefix}: Temp UnicodeDecodeError, continuing recv.")
-            else: logger.warning(f"{log_prefix}: No more data (socket closed by peer?)."); break
-        data_received_bytes = b"".join(data_received_chunks)
-        try: data_received_str = data_received_bytes.decode()
-        except UnicodeDecodeError as e: logger.error(f"{log_prefix}: Final UnicodeDecodeError: {e}. Data: {data_received_bytes[:200]}..."); return {'status': 'ERROR', 'data': 'Unicode decode error on final receive buffer'}
-        if data_received_str: json_part, _, _ = data_received_str.partition("\r\n\r\n"); cleaned_data = json_part.strip()
-        else: cleaned_data = ""
-        logger.debug(f"{log_prefix}: Raw data from server (first 70): {repr(cleaned_data[:70])}")
-        if not cleaned_data: logger.error(f"{log_prefix}: No parsable data from server."); return {'status': 'ERROR', 'data': 'No data received/parsed'}
-        hasil = json.loads(cleaned_data)
-        return hasil
-    except socket.timeout: logger.error(f"{log_prefix}: Socket op timeout."); return {'status': 'ERROR', 'data': 'Socket timeout'}
-    except ConnectionRefusedError: logger.error(f"{log_prefix}: Connection refused."); return {'status': 'ERROR', 'data': 'Connection refused'}
-    except json.JSONDecodeError as e: logger.error(f"{log_prefix}: Failed to decode JSON: {e}. Received: {cleaned_data[:200]}..."); return {'status': 'ERROR', 'data': f'JSON decode error: {e}'}
-    except Exception as e: logger.error(f"{log_prefix}: Exception in send_command: {e}", exc_info=True); return {'status': 'ERROR', 'data': str(e)}
-    finally: logger.debug(f"{log_prefix}: Closing socket."); sock.close()
-
-def remote_upload(server_ip, server_port, logger, local_filepath, server_filename, task_id="N/A"):
+def _finish_connection(pool, conn, healthy):
+    if conn is None: return None
+    if pool and healthy: pool.release(conn)
+    elif pool: pool.discard(conn)
+    else: conn.close()
+    return None
+
+def remote_upload(server_ip, server_port, logger, local_filepath, server_filename, task_id="N/A", pool=None, codec='none', level=None):
     log_prefix = f"Task {task_id} (UPLOAD)"
     if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Starting: {local_filepath} -> {server_filename}")
     start_time = time.perf_counter(); bytes_processed = 0; success = False
@@ -94,13 +268,11 @@ def remote_upload(server_ip, server_port, logger, local_filepath, server_filenam
     try:
         file_size = os.path.getsize(local_filepath)
         logger.debug(f"{log_prefix}: Reading local file '{local_filepath}' (size: {file_size} bytes)...")
-        with open(local_filepath, 'rb') as f: file_content_bytes = f.read()
-        logger.debug(f"{log_prefix}: Read {len(file_content_bytes)} bytes. Encoding Base64...")
-        file_content_base64 = base64.b64encode(file_content_bytes).decode()
-        logger.debug(f"{log_prefix}: Base64 len: {len(file_content_base64)}. Sending UPLOAD...")
-        command_str = f"UPLOAD {server_filename} {file_content_base64}"
-        del file_content_bytes, file_content_base64 
-        hasil = send_command(server_ip, server_port, logger, command_str, task_id, OperationType.UPLOAD.value)
+        with open(local_filepath, 'rb') as f:
+            if codec != 'none' and not payload_codec.worth_compressing(f, file_size):
+                logger.debug(f"{log_prefix}: {local_filepath} looks incompressible, sending it uncompressed."); codec = 'none'
+            logger.debug(f"{log_prefix}: Streaming UPLOAD of {file_size} bytes (codec {codec}) in {STREAM_CHUNK_BYTES} byte chunks...")
+            hasil = send_command(server_ip, server_port, logger, lambda: upload_command_chunks(f, server_filename, codec, level=level), task_id, OperationType.UPLOAD.value, pool)
         if hasil and hasil.get('status') == 'OK': success = True; bytes_processed = file_size
         if success and logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: SUCCESS. Server: {hasil.get('data')}")
         elif not success: logger.error(f"{log_prefix}: FAILED. Server: {hasil.get('data', 'No/Bad Resp') if hasil else 'No Resp'}")
@@ -110,56 +282,468 @@ def remote_upload(server_ip, server_port, logger, local_filepath, server_filenam
     logger.debug(f"{log_prefix}: Finished in {duration:.3f}s. Success: {success}")
     return success, duration, bytes_processed
 
-def remote_get(server_ip, server_port, logger, filename_on_server, local_save_dir, task_id="N/A"):
+def _positioned_read(fd, length, offset, read_lock):
+    if hasattr(os, 'pread'): return os.pread(fd, length, offset)
+    with read_lock:
+        os.lseek(fd, offset, os.SEEK_SET); return os.read(fd, length)
+
+def _file_sha256(local_filepath):
+    return mapped_io.sha256_file(local_filepath)
+
+def _load_transfer_state(state_path):
+    try:
+        with open(state_path) as f: return json.load(f)
+    except (OSError, ValueError): return None
+
+def _save_transfer_state(state_path, state):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, 'w') as f: json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def _remove_quietly(path):
+    try: os.remove(path)
+    except OSError: pass
+
+def remote_upload_chunked(server_ip, server_port, logger, local_filepath, server_filename, task_id="N/A", streams=4, pool=None, chunk_bytes=4*1024*1024, resume=False, retries=0):
+    log_prefix = f"Task {task_id} (UPLOAD x{streams})"
+    if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Starting chunked upload: {local_filepath} -> {server_filename}")
+    start_time = time.perf_counter(); bytes_processed = 0; success = False
+    if not os.path.exists(local_filepath): logger.error(f"{log_prefix}: Local file {local_filepath} not found."); return success, time.perf_counter() - start_time, bytes_processed
+    chunk_pool = pool or ConnectionPool(server_ip, server_port, logger, max_idle=streams)
+    try:
+        for attempt in range(retries + 1):
+            if attempt: logger.warning(f"{log_prefix}: Retrying upload (attempt {attempt+1}/{retries+1}){', resuming from verified chunks' if resume else ''}.")
+            try: success, bytes_processed = _chunked_upload_attempt(server_ip, server_port, logger, local_filepath, server_filename, task_id, streams, chunk_pool, chunk_bytes, resume, log_prefix)
+            except Exception as e: logger.error(f"{log_prefix}: Exception: {e}", exc_info=True)
+            if success: break
+    finally:
+        if chunk_pool is not pool: chunk_pool.close_all()
+    duration = time.perf_counter() - start_time
+    logger.debug(f"{log_prefix}: Finished in {duration:.3f}s. Success: {success}")
+    return success, duration, bytes_processed
+
+def _chunked_upload_attempt(server_ip, server_port, logger, local_filepath, server_filename, task_id, streams, chunk_pool, chunk_bytes, resume, log_prefix):
+    file_stat = os.stat(local_filepath); file_size = file_stat.st_size
+    state_path = f"{local_filepath}.{server_filename.replace(os.sep, '_')}.upload.json"
+    session_id = None; verified_chunks = {}
+    state = _load_transfer_state(state_path) if resume else None
+    if state and (state.get('file_size'), state.get('mtime_ns'), state.get('chunk_bytes')) == (file_size, file_stat.st_mtime_ns, chunk_bytes):
+        hasil = send_command(server_ip, server_port, logger, f"UPLOAD_STATUS {state['session_id']}", task_id, OperationType.UPLOAD.value, chunk_pool)
+        if hasil and hasil.get('status') == 'OK':
+            session_id = state['session_id']
+            verified_chunks = {(offset, length): sha256 for offset, length, sha256 in hasil.get('data_chunks', [])}
+            if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Resuming session {session_id}; server already holds {hasil.get('data_received_bytes', 0)} of {file_size} bytes.")
+        else: logger.warning(f"{log_prefix}: Saved session {state['session_id']} no longer usable ({hasil.get('data') if hasil else 'No Resp'}); starting over.")
+    if not session_id:
+        hasil = send_command(server_ip, server_port, logger, f"UPLOAD_BEGIN {server_filename} {file_size}", task_id, OperationType.UPLOAD.value, chunk_pool)
+        if not hasil or hasil.get('status') != 'OK':
+            logger.error(f"{log_prefix}: FAILED to begin session. Server: {hasil.get('data', 'No/Bad Resp') if hasil else 'No Resp'}")
+            return False, 0
+        session_id = hasil['data_session']
+        if resume: _save_transfer_state(state_path, {"session_id": session_id, "file_size": file_size, "mtime_ns": file_stat.st_mtime_ns, "chunk_bytes": chunk_bytes})
+    chunks = [(offset, min(chunk_bytes, file_size - offset)) for offset in range(0, file_size, chunk_bytes)]
+    chunk_lock = threading.Lock(); read_lock = threading.Lock(); failures = []; skipped = [0]
+    fd = os.open(local_filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        def send_chunks():
+            while not failures:
+                with chunk_lock:
+                    if not chunks: return
+                    offset, length = chunks.pop()
+                data = _positioned_read(fd, length, offset, read_lock)
+                chunk_sha256 = hashlib.sha256(data).hexdigest()
+                if verified_chunks.get((offset, length)) == chunk_sha256:
+                    with chunk_lock: skipped[0] += length
+                    continue
+                command_str = f"UPLOAD_CHUNK {session_id} {offset} {chunk_sha256} {base64.b64encode(data).decode()}"
+                del data
+                chunk_result = send_command(server_ip, server_port, logger, command_str, task_id, OperationType.UPLOAD.value, chunk_pool)
+                if not chunk_result or chunk_result.get('status') != 'OK': failures.append(f"chunk {offset}+{length}: {chunk_result.get('data') if chunk_result else 'No Resp'}")
+        with ThreadPoolExecutor(max_workers=streams, thread_name_prefix=f"{threading.current_thread().name}-chunk") as chunk_executor:
+            for future in [chunk_executor.submit(send_chunks) for _ in range(min(streams, len(chunks)) or 1)]: future.result()
+    finally:
+        os.close(fd)
+    if skipped[0]: logger.info(f"{log_prefix}: Skipped {skipped[0]} bytes already verified by the server.")
+    if failures:
+        logger.error(f"{log_prefix}: FAILED. {failures[0]}")
+        if not resume: send_command(server_ip, server_port, logger, f"UPLOAD_ABORT {session_id}", task_id, OperationType.UPLOAD.value, chunk_pool)
+        return False, 0
+    hasil = send_command(server_ip, server_port, logger, f"UPLOAD_COMMIT {session_id} {_file_sha256(local_filepath)}", task_id, OperationType.UPLOAD.value, chunk_pool)
+    if not hasil or hasil.get('status') != 'OK':
+        logger.error(f"{log_prefix}: FAILED to commit. Server: {hasil.get('data', 'No/Bad Resp') if hasil else 'No Resp'}")
+        return False, 0
+    if resume: _remove_quietly(state_path)
+    if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: SUCCESS. Server: {hasil.get('data')}")
+    return True, file_size
+
+def remote_get(server_ip, server_port, logger, filename_on_server, local_save_dir, task_id="N/A", pool=None, codec='none', level=None):
     log_prefix = f"Task {task_id} (GET)"
     if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Starting for {filename_on_server}")
-    start_time = time.perf_counter(); bytes_processed = 0; success = False
+    start_time = time.perf_counter()
     command_str = f"GET {filename_on_server}"
-    hasil = send_command(server_ip, server_port, logger, command_str, task_id, OperationType.GET.value)
+    if codec != 'none': command_str += f" {codec}" + (f" {level}" if level is not None else "")
+    sink = Base64FileSink(local_save_dir)
+    try:
+        hasil = send_command(server_ip, server_port, logger, command_str, task_id, OperationType.GET.value, pool, sink)
+        success, bytes_processed = save_get_response(hasil, local_save_dir, logger, log_prefix, sink)
+    finally: sink.discard()
+    duration = time.perf_counter() - start_time
+    logger.debug(f"{log_prefix}: Finished in {duration:.3f}s. Success: {success}")
+    return success, duration, bytes_processed
+
+def save_get_response(hasil, local_save_dir, logger, log_prefix, sink=None):
+    bytes_processed = 0; success = False
+    if sink is not None and sink.started and hasil and hasil.get('status') == 'OK':
+        namafile_server = hasil.get('data_namafile')
+        if not namafile_server: logger.error(f"{log_prefix}: FAILED. Incomplete GET response."); return success, bytes_processed
+        try:
+            sink.finish(); sink.commit(os.path.join(local_save_dir, namafile_server))
+            if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: SUCCESS to {os.path.join(local_save_dir, namafile_server)} (streamed {sink.written} bytes).")
+            return True, sink.written
+        except (ValueError, binascii.Error) as e: logger.error(f"{log_prefix}: FAILED decoding payload: {e}")
+        except Exception as e: logger.error(f"{log_prefix}: FAILED saving file: {e}", exc_info=True)
+        return success, bytes_processed
     if hasil and hasil.get('status') == 'OK':
         namafile_server = hasil.get('data_namafile'); isifile_base64 = hasil.get('data_file')
         if not namafile_server or not isifile_base64: logger.error(f"{log_prefix}: FAILED. Incomplete GET response.")
         else:
             if not os.path.exists(local_save_dir):
-                try: os.makedirs(local_save_dir)
-                except OSError as e: logger.error(f"{log_prefix}: FAILED to create dir {local_save_dir}: {e}"); return success, time.perf_counter() - start_time, bytes_processed
+                try: os.makedirs(local_save_dir, exist_ok=True)
+                except OSError as e: logger.error(f"{log_prefix}: FAILED to create dir {local_save_dir}: {e}"); return success, bytes_processed
             local_filepath = os.path.join(local_save_dir, namafile_server)
             try:
                 logger.debug(f"{log_prefix}: Decoding Base64 (len: {len(isifile_base64)}) for {namafile_server}...")
-                isifile_bytes = base64.b64decode(isifile_base64); bytes_processed = len(isifile_bytes)
-                logger.debug(f"{log_prefix}: Writing {bytes_processed} bytes to {local_filepath}...")
-                with open(local_filepath, 'wb') as fp: fp.write(isifile_bytes)
+                isifile_bytes = base64.b64decode(isifile_base64); codec = hasil.get('data_codec', 'none')
+                logger.debug(f"{log_prefix}: Writing {len(isifile_bytes)} bytes ({codec}) to {local_filepath}...")
+                with open(local_filepath, 'wb') as fp:
+                    if codec == 'none': fp.write(isifile_bytes); bytes_processed = len(isifile_bytes)
+                    else: bytes_processed = payload_codec.decompress_to(isifile_bytes, codec, fp.write)
                 success = True
                 if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: SUCCESS to {local_filepath}.")
             except base64.binascii.Error as e: logger.error(f"{log_prefix}: FAILED Base64 decode: {e}")
+            except ValueError as e: logger.error(f"{log_prefix}: FAILED decoding payload: {e}"); _remove_quietly(local_filepath)
             except Exception as e: logger.error(f"{log_prefix}: FAILED saving file: {e}", exc_info=True)
     else: logger.error(f"{log_prefix}: FAILED. Server: {hasil.get('data', 'No/Bad Resp') if hasil else 'No Resp'}")
+    return success, bytes_processed
+
+def _positioned_write(fd, data, offset, write_lock):
+    if hasattr(os, 'pwrite'):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset); view = view[written:]; offset += written
+        return
+    with write_lock:
+        os.lseek(fd, offset, os.SEEK_SET); os.write(fd, data)
+
+def remote_get_segmented(server_ip, server_port, logger, filename_on_server, local_save_dir, task_id="N/A", streams=4, pool=None, max_segment_bytes=8*1024*1024, resume=False, retries=0):
+    log_prefix = f"Task {task_id} (GET x{streams})"
+    if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Starting segmented download for {filename_on_server}")
+    start_time = time.perf_counter(); bytes_processed = 0; success = False
+    segment_pool = pool or ConnectionPool(server_ip, server_port, logger, max_idle=streams)
+    try:
+        for attempt in range(retries + 1):
+            if attempt: logger.warning(f"{log_prefix}: Retrying download (attempt {attempt+1}/{retries+1}){', resuming from verified segments' if resume else ''}.")
+            try: success, bytes_processed = _segmented_download_attempt(server_ip, server_port, logger, filename_on_server, local_save_dir, task_id, streams, segment_pool, max_segment_bytes, resume, log_prefix)
+            except Exception as e: logger.error(f"{log_prefix}: Exception: {e}", exc_info=True)
+            if success: break
+    finally:
+        if segment_pool is not pool: segment_pool.close_all()
     duration = time.perf_counter() - start_time
     logger.debug(f"{log_prefix}: Finished in {duration:.3f}s. Success: {success}")
     return success, duration, bytes_processed
 
+def _segmented_download_attempt(server_ip, server_port, logger, filename_on_server, local_save_dir, task_id, streams, segment_pool, max_segment_bytes, resume, log_prefix):
+    probe = send_command(server_ip, server_port, logger, f"GETRANGE {filename_on_server} 0 0", task_id, OperationType.GET.value, segment_pool)
+    if not probe or probe.get('status') != 'OK':
+        logger.error(f"{log_prefix}: FAILED probe. Server: {probe.get('data', 'No/Bad Resp') if probe else 'No Resp'}")
+        return False, 0
+    total_size = probe['data_total_size']; version = probe['data_version']
+    os.makedirs(local_save_dir, exist_ok=True)
+    local_filepath = os.path.join(local_save_dir, filename_on_server)
+    part_path = local_filepath + ".part"; state_path = part_path + ".json"
+    state = _load_transfer_state(state_path) if resume and os.path.exists(part_path) else None
+    if state and (state.get('version'), state.get('total_size')) != (version, total_size):
+        logger.warning(f"{log_prefix}: Server copy changed since the interrupted download; starting over.")
+        state = None
+    segment_bytes = state['segment_bytes'] if state else max(1, min(max_segment_bytes, -(-total_size // streams)))
+    fd = os.open(part_path, os.O_RDWR | os.O_CREAT | (0 if state else os.O_TRUNC) | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        os.ftruncate(fd, total_size)
+        segment_lock = threading.Lock(); io_lock = threading.Lock(); failures = []
+        verified_segments = []
+        for offset, length, sha256 in (state or {}).get('done', []):
+            if hashlib.sha256(_positioned_read(fd, length, offset, io_lock)).hexdigest() == sha256: verified_segments.append([offset, length, sha256])
+        done_ranges = {(offset, length) for offset, length, _ in verified_segments}
+        if done_ranges and logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Resuming; {sum(length for _, length in done_ranges)} of {total_size} bytes already verified locally.")
+        segments = [(offset, min(segment_bytes, total_size - offset)) for offset in range(0, total_size, segment_bytes)]
+        segments = [segment for segment in segments if segment not in done_ranges]
+        def record_segment(offset, length, sha256):
+            with segment_lock:
+                verified_segments.append([offset, length, sha256])
+                if resume: _save_transfer_state(state_path, {"version": version, "total_size": total_size, "segment_bytes": segment_bytes, "done": verified_segments})
+        if resume: _save_transfer_state(state_path, {"version": version, "total_size": total_size, "segment_bytes": segment_bytes, "done": verified_segments})
+        def fetch_segments():
+            while not failures:
+                with segment_lock:
+                    if not segments: return
+                    offset, length = segments.pop()
+                hasil = send_command(server_ip, server_port, logger, f"GETRANGE {filename_on_server} {offset} {length}", task_id, OperationType.GET.value, segment_pool)
+                if not hasil or hasil.get('status') != 'OK': failures.append(f"segment {offset}+{length}: {hasil.get('data') if hasil else 'No Resp'}"); return
+                if hasil.get('data_version') != version: failures.append(f"segment {offset}+{length}: file changed on server during download"); return
+                data = base64.b64decode(hasil['data_file'])
+                if len(data) != length: failures.append(f"segment {offset}+{length}: short read ({len(data)} bytes)"); return
+                segment_sha256 = hashlib.sha256(data).hexdigest()
+                if hasil.get('data_sha256', segment_sha256) != segment_sha256: failures.append(f"segment {offset}+{length}: checksum mismatch"); return
+                _positioned_write(fd, data, offset, io_lock)
+                record_segment(offset, length, segment_sha256)
+        with ThreadPoolExecutor(max_workers=streams, thread_name_prefix=f"{threading.current_thread().name}-seg") as segment_executor:
+            for future in [segment_executor.submit(fetch_segments) for _ in range(min(streams, len(segments)) or 1)]: future.result()
+    finally:
+        os.close(fd)
+    if failures:
+        logger.error(f"{log_prefix}: FAILED. {failures[0]}")
+        return False, 0
+    os.replace(part_path, local_filepath)
+    if resume: _remove_quietly(state_path)
+    if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: SUCCESS to {local_filepath} ({total_size} bytes, version {version}).")
+    return True, total_size
+
+def remote_simple_command(server_ip, server_port, logger, operation_type, command_str, task_id="N/A", pool=None):
+    log_prefix = f"Task {task_id} ({operation_type.value})"
+    start_time = time.perf_counter()
+    hasil = send_command(server_ip, server_port, logger, command_str, task_id, operation_type.value, pool)
+    success = bool(hasil) and hasil.get('status') == 'OK'
+    if not success: logger.error(f"{log_prefix}: FAILED. Server: {hasil.get('data', 'No/Bad Resp') if hasil else 'No Resp'}")
+    duration = time.perf_counter() - start_time
+    return success, duration, 0
+
+def remote_list(server_ip, server_port, logger, task_id="N/A", pool=None):
+    return remote_simple_command(server_ip, server_port, logger, OperationType.LIST, "LIST", task_id, pool)
+
+def remote_delete(server_ip, server_port, logger, filename_on_server, task_id="N/A", pool=None):
+    return remote_simple_command(server_ip, server_port, logger, OperationType.DELETE, f"DELETE {filename_on_server}", task_id, pool)
+
+def pipeline_commands(conn, command_builders, depth, logger, log_prefix="PIPELINE"):
+    total = len(command_builders); completed = True
+    in_flight = threading.Semaphore(max(1, depth))
+    send_times = [None] * total; results = [None] * total
+    def sender():
+        try:
+            for idx, build_command in enumerate(command_builders):
+                in_flight.acquire()
+                command_str = build_command()
+                send_times[idx] = time.perf_counter()
+                if isinstance(command_str, str): conn.send_message(command_str)
+                else: conn.send_chunks(command_str)
+                del command_str
+        except Exception as e:
+            logger.error(f"{log_prefix}: Pipeline sender failed: {e}")
+            try: conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+    sender_thread = threading.Thread(target=sender, name=f"{threading.current_thread().name}-pipeline-tx", daemon=True)
+    sender_thread.start()
+    for idx in range(total):
+        try:
+            raw = conn.recv_message()
+            received_at = time.perf_counter()
+            hasil = json.loads(raw.decode())
+        except Exception as e:
+            logger.error(f"{log_prefix}: Pipeline receive failed at reply {idx+1}/{total}: {e}")
+            for failed_idx in range(idx, total): results[failed_idx] = ({'status': 'ERROR', 'data': f'Pipeline broken: {e}'}, 0.0)
+            for _ in range(total): in_flight.release()
+            completed = False; break
+        results[idx] = (hasil, received_at - send_times[idx])
+        in_flight.release()
+    sender_thread.join(timeout=5)
+    return results, completed
+
+def send_batch_command(server_ip, server_port, logger, command_str, task_id="N/A", operation_type="BATCH", pool=None):
+    log_prefix = f"Task {task_id} ({operation_type} batch)"
+    items = []; summary = None; conn = None
+    try:
+        conn = pool.acquire()[0] if pool else ServerConnection(server_ip, server_port)
+        sent_at = time.perf_counter()
+        if callable(command_str): conn.send_chunks(command_str())
+        else: conn.send_message(command_str)
+        while summary is None:
+            hasil = json.loads(conn.recv_message().decode())
+            if hasil.get('batch_end') or 'item' not in hasil: summary = hasil
+            else: items.append((hasil, time.perf_counter() - sent_at))
+        conn = _finish_connection(pool, conn, True)
+    except Exception as e:
+        logger.error(f"{log_prefix}: Batch interrupted after {len(items)} item(s): {e}")
+        conn = _finish_connection(pool, conn, False)
+        summary = {'status': 'ERROR', 'data': str(e)}
+    if summary.get('status') != 'OK': logger.error(f"{log_prefix}: FAILED. Server: {summary.get('data', 'No/Bad Resp')}")
+    elif logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Server summary: {summary.get('data')}")
+    return items, summary
+
+def _run_batch_operations(task_id, server_ip, server_port, logger, local_file_path, server_filename_for_this_task, operations_to_run, pool, batch_size):
+    task_stat_records = []
+    actual_file_size_bytes = os.path.getsize(local_file_path)
+    download_dir_for_task = f"bm_downloads_task_{task_id}"
+    server_names = [f"{server_filename_for_this_task}_b{idx}" for idx in range(batch_size)]
+    def record(op, items, file_size, bytes_for):
+        by_index = {hasil.get('item'): (hasil, latency) for hasil, latency in items}
+        for idx, name in enumerate(server_names):
+            hasil, latency = by_index.get(idx, ({'status': 'ERROR', 'data': 'No result for item'}, 0.0))
+            ok = hasil.get('status') == 'OK' and bytes_for(hasil) is not None
+            if not ok: logger.error(f"Task {task_id} ({op.value} {name}): FAILED. Server: {hasil.get('data', 'No/Bad Resp')}")
+            task_stat_records.append({"task_id": task_id, "operation": op.value, "file_size": file_size, "status": "SUCCESS" if ok else "FAILED", "duration": latency, "bytes_processed": bytes_for(hasil) or 0 if ok else 0})
+    if OperationType.UPLOAD in operations_to_run:
+        if logger.isEnabledFor(logging.INFO): logger.info(f"=== MUPLOAD PHASE ({batch_size} files) ===")
+        with open(local_file_path, 'rb') as f:
+            items, _ = send_batch_command(server_ip, server_port, logger, lambda: mupload_command_chunks(f, server_names), task_id, "MUPLOAD", pool)
+        record(OperationType.UPLOAD, items, actual_file_size_bytes, lambda hasil: actual_file_size_bytes)
+    if OperationType.GET in operations_to_run:
+        if logger.isEnabledFor(logging.INFO): logger.info(f"=== MGET PHASE ({batch_size} files) ===")
+        items, _ = send_batch_command(server_ip, server_port, logger, "MGET " + " ".join(server_names), task_id, "MGET", pool)
+        def saved_bytes(hasil):
+            ok, bytes_processed = save_get_response(hasil, download_dir_for_task, logger, f"Task {task_id} (MGET item {hasil.get('item')})")
+            return bytes_processed if ok else None
+        record(OperationType.GET, items, actual_file_size_bytes, saved_bytes)
+    if OperationType.LIST in operations_to_run:
+        list_ok, list_time, _ = remote_list(server_ip, server_port, logger, task_id, pool)
+        task_stat_records.append({"task_id": task_id, "operation": OperationType.LIST.value, "file_size": 0, "status": "SUCCESS" if list_ok else "FAILED", "duration": list_time, "bytes_processed": 0})
+    if OperationType.DELETE in operations_to_run:
+        if logger.isEnabledFor(logging.INFO): logger.info(f"=== MDELETE PHASE ({batch_size} files) ===")
+        items, _ = send_batch_command(server_ip, server_port, logger, "MDELETE " + " ".join(server_names), task_id, "MDELETE", pool)
+        record(OperationType.DELETE, items, 0, lambda hasil: 0)
+    return task_stat_records
+
+def _upload_command_builder(local_file_path, server_filename):
+    def build():
+        with open(local_file_path, 'rb') as f: yield from upload_command_chunks(f, server_filename)
+    return build
+
+def _run_pipelined_operations(task_id, server_ip, server_port, logger, local_file_path, server_filename_for_this_task, operations_to_run, pool, pipeline_depth, repeat_ops):
+    task_stat_records = []
+    actual_file_size_bytes = os.path.getsize(local_file_path)
+    download_dir_for_task = f"bm_downloads_task_{task_id}"
+    planned_ops = []
+    for _ in range(repeat_ops):
+        for op in (OperationType.UPLOAD, OperationType.GET, OperationType.LIST, OperationType.DELETE):
+            if op not in operations_to_run: continue
+            if op == OperationType.UPLOAD: builder = _upload_command_builder(local_file_path, server_filename_for_this_task)
+            elif op == OperationType.GET: builder = (lambda: f"GET {server_filename_for_this_task}")
+            elif op == OperationType.LIST: builder = (lambda: "LIST")
+            else: builder = (lambda: f"DELETE {server_filename_for_this_task}")
+            planned_ops.append((op, builder))
+    if logger.isEnabledFor(logging.INFO): logger.info(f"=== PIPELINED PHASE ({len(planned_ops)} commands, depth {pipeline_depth}) ===")
+    conn = None
+    try: conn = pool.acquire()[0] if pool else ServerConnection(server_ip, server_port)
+    except Exception as e:
+        logger.error(f"Task {task_id} (PIPELINE): Could not connect: {e}")
+        for op, _ in planned_ops: task_stat_records.append({"task_id": task_id, "operation": op.value, "file_size": 0, "status": "FAILED", "duration": 0, "bytes_processed": 0})
+        return task_stat_records
+    results, completed = pipeline_commands(conn, [builder for _, builder in planned_ops], pipeline_depth, logger, f"Task {task_id} (PIPELINE)")
+    _finish_connection(pool, conn, completed)
+    for (op, _), (hasil, latency) in zip(planned_ops, results):
+        bytes_processed = 0
+        if op == OperationType.GET: ok, bytes_processed = save_get_response(hasil, download_dir_for_task, logger, f"Task {task_id} (GET)")
+        else:
+            ok = hasil.get('status') == 'OK'
+            if ok and op == OperationType.UPLOAD: bytes_processed = actual_file_size_bytes
+            if not ok: logger.error(f"Task {task_id} ({op.value}): FAILED. Server: {hasil.get('data', 'No/Bad Resp')}")
+        task_stat_records.append({"task_id": task_id, "operation": op.value, "file_size": actual_file_size_bytes if op in (OperationType.UPLOAD, OperationType.GET) else 0, "status": "SUCCESS" if ok else "FAILED", "duration": latency, "bytes_processed": bytes_processed})
+    return task_stat_records
+
 
 def client_worker_task(task_id, server_ip, server_port, log_level_for_worker, log_file_for_worker,
-                       local_file_path, server_filename_for_this_task, operations_to_run):
+                       local_file_path, server_filename_for_this_task, operations_to_run, connection_mode=ConnectionMode.COLD.value,
+                       pipeline_depth=1, repeat_ops=1, transfer_options=None):
     
     logger = setup_worker_logging(log_level_for_worker, log_file_for_worker, f"Task-{task_id}")
+    pool = ConnectionPool(server_ip, server_port, logger) if connection_mode == ConnectionMode.POOLED.value else None
+    try:
+        if not os.path.exists(local_file_path):
+            logger.error(f"Local file {local_file_path} missing. Aborting.")
+            return [{"task_id": task_id, "operation": "PREP_FAIL", "file_size": 0, "status": "FAILED", "duration": 0, "bytes_processed": 0}]
+        batch_size = (transfer_options or {}).get('batch_size', 1)
+        if batch_size > 1:
+            task_stat_records = []
+            for _ in range(repeat_ops):
+                task_stat_records.extend(_run_batch_operations(task_id, server_ip, server_port, logger, local_file_path, server_filename_for_this_task, operations_to_run, pool, batch_size))
+            return task_stat_records
+        if pipeline_depth > 1:
+            return _run_pipelined_operations(task_id, server_ip, server_port, logger, local_file_path, server_filename_for_this_task, operations_to_run, pool, pipeline_depth, repeat_ops)
+        task_stat_records = []
+        for _ in range(repeat_ops):
+            task_stat_records.extend(_run_worker_operations(task_id, server_ip, server_port, logger, local_file_path, server_filename_for_this_task, operations_to_run, pool, transfer_options or {}))
+        return task_stat_records
+    finally:
+        if pool: pool.close_all()
+
+def remote_upload_if_missing(server_ip, server_port, logger, local_filepath, server_filename, task_id="N/A", pool=None):
+    log_prefix = f"Task {task_id} (UPLOAD dedup)"
+    start_time = time.perf_counter()
+    try: file_sha256 = _file_sha256(local_filepath)
+    except OSError as e: logger.error(f"{log_prefix}: Cannot hash {local_filepath}: {e}"); return None
+    hasil = send_command(server_ip, server_port, logger, f"HAVE {file_sha256}", task_id, OperationType.UPLOAD.value, pool)
+    if not hasil or hasil.get('status') != 'OK' or not hasil.get('data_have'): return None
+    hasil = send_command(server_ip, server_port, logger, f"LINK {server_filename} {file_sha256}", task_id, OperationType.UPLOAD.value, pool)
+    if not hasil or hasil.get('status') != 'OK':
+        logger.warning(f"{log_prefix}: LINK failed ({hasil.get('data') if hasil else 'No Resp'}), sending full content.")
+        return None
+    if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: SUCCESS without sending content, server already held {file_sha256[:12]}...")
+    return True, time.perf_counter() - start_time, os.path.getsize(local_filepath)
+
+def remote_upload_delta(server_ip, server_port, logger, local_filepath, server_filename, task_id="N/A", pool=None):
+    log_prefix = f"Task {task_id} (UPLOAD delta)"
+    start_time = time.perf_counter()
+    hasil = send_command(server_ip, server_port, logger, f"SIGNATURE {server_filename}", task_id, OperationType.UPLOAD.value, pool)
+    if not hasil or hasil.get('status') != 'OK':
+        logger.debug(f"{log_prefix}: No server copy to diff against ({hasil.get('data') if hasil else 'No Resp'}).")
+        return None
+    block_size = hasil['data_block_size']
+    local_sha256 = _file_sha256(local_filepath); file_size = os.path.getsize(local_filepath)
+    # The file is diffed window by window into a temporary file, which is then streamed out like any upload
+    with open(local_filepath, 'rb') as f, tempfile.TemporaryFile() as delta:
+        literal_bytes = delta_sync.compute_delta(f, hasil['data_signatures'], block_size, delta, hasil.get('data_total_size'))
+        if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: Delta is {delta.tell()} bytes ({literal_bytes} literal) for a {file_size} byte file.")
+        head = f"DELTA_APPLY {server_filename} {hasil['data_version']} {block_size} {local_sha256} "
+        hasil = send_command(server_ip, server_port, logger, lambda: delta_command_chunks(head, delta), task_id, OperationType.UPLOAD.value, pool)
+    if not hasil or hasil.get('status') != 'OK':
+        logger.warning(f"{log_prefix}: DELTA_APPLY failed ({hasil.get('data') if hasil else 'No Resp'}), sending full content.")
+        return None
+    if logger.isEnabledFor(logging.INFO): logger.info(f"{log_prefix}: SUCCESS. Server: {hasil.get('data')}")
+    return True, time.perf_counter() - start_time, file_size
+
+def _run_upload(server_ip, server_port, logger, local_file_path, server_filename, task_id, pool, transfer_options):
+    if transfer_options.get('delta'):
+        delta_start = time.perf_counter()
+        delta_result = remote_upload_delta(server_ip, server_port, logger, local_file_path, server_filename, task_id, pool)
+        if delta_result: return delta_result
+        upload_ok, up_time, up_bytes = _run_upload(server_ip, server_port, logger, local_file_path, server_filename, task_id, pool, dict(transfer_options, delta=False))
+        return upload_ok, time.perf_counter() - delta_start, up_bytes
+    if transfer_options.get('dedup'):
+        dedup_start = time.perf_counter()
+        dedup_result = remote_upload_if_missing(server_ip, server_port, logger, local_file_path, server_filename, task_id, pool)
+        if dedup_result: return dedup_result
+        upload_ok, up_time, up_bytes = _run_upload(server_ip, server_port, logger, local_file_path, server_filename, task_id, pool, dict(transfer_options, dedup=False))
+        return upload_ok, time.perf_counter() - dedup_start, up_bytes
+    streams = transfer_options.get('parallel_streams', 1); resume = transfer_options.get('resume', False)
+    if streams > 1 or resume: return remote_upload_chunked(server_ip, server_port, logger, local_file_path, server_filename, task_id, streams, pool, transfer_options.get('chunk_bytes', 4*1024*1024), resume, transfer_options.get('retries', 0))
+    return remote_upload(server_ip, server_port, logger, local_file_path, server_filename, task_id, pool, transfer_options.get('codec', 'none'), transfer_options.get('codec_level'))
+
+def _run_get(server_ip, server_port, logger, server_filename, download_dir, task_id, pool, transfer_options):
+    streams = transfer_options.get('parallel_streams', 1); resume = transfer_options.get('resume', False)
+    if streams > 1 or resume: return remote_get_segmented(server_ip, server_port, logger, server_filename, download_dir, task_id, streams, pool, transfer_options.get('chunk_bytes', 8*1024*1024), resume, transfer_options.get('retries', 0))
+    return remote_get(server_ip, server_port, logger, server_filename, download_dir, task_id, pool, transfer_options.get('codec', 'none'), transfer_options.get('codec_level'))
+
+def _run_worker_operations(task_id, server_ip, server_port, logger, local_file_path, server_filename_for_this_task, operations_to_run, pool, transfer_options):
     
     if logger.isEnabledFor(logging.INFO):
         logger.info(f"Starting worker for file {local_file_path} -> server file {server_filename_for_this_task}")
     
     task_stat_records = [] 
 
-    if not os.path.exists(local_file_path):
-        logger.error(f"Local file {local_file_path} missing. Aborting.")
-        task_stat_records.append({"task_id": task_id, "operation": "PREP_FAIL", "file_size": 0, "status": "FAILED", "duration": 0, "bytes_processed": 0})
-        return task_stat_records 
-        
     actual_file_size_bytes = os.path.getsize(local_file_path)
     file_size_mb = actual_file_size_bytes / (1024 * 1024)
 
     if OperationType.UPLOAD in operations_to_run:
         if logger.isEnabledFor(logging.INFO): logger.info(f"=== UPLOAD PHASE ({file_size_mb:.0f}MB) ===")
-        upload_ok, up_time, up_bytes = remote_upload(server_ip, server_port, logger, local_file_path, server_filename_for_this_task, task_id)
+        upload_ok, up_time, up_bytes = _run_upload(server_ip, server_port, logger, local_file_path, server_filename_for_this_task, task_id, pool, transfer_options)
         task_stat_records.append({"task_id": task_id, "operation": OperationType.UPLOAD.value, "file_size": actual_file_size_bytes, "status": "SUCCESS" if upload_ok else "FAILED", "duration": up_time, "bytes_processed": up_bytes if upload_ok else 0})
         
         if upload_ok and OperationType.GET in operations_to_run:
@@ -170,21 +754,174 @@ def client_worker_task(task_id, server_ip, server_port, log_level_for_worker, lo
                     for f_name in os.listdir(download_dir_for_task): os.remove(os.path.join(download_dir_for_task, f_name))
                     os.rmdir(download_dir_for_task)
                 except OSError as e: logger.warning(f"Could not clean up download dir '{download_dir_for_task}': {e}")
-            get_ok, get_time, get_bytes = remote_get(server_ip, server_port, logger, server_filename_for_this_task, download_dir_for_task, task_id)
+            get_ok, get_time, get_bytes = _run_get(server_ip, server_port, logger, server_filename_for_this_task, download_dir_for_task, task_id, pool, transfer_options)
             task_stat_records.append({"task_id": task_id, "operation": OperationType.GET.value, "file_size": get_bytes, "status": "SUCCESS" if get_ok else "FAILED", "duration": get_time, "bytes_processed": get_bytes if get_ok else 0})
     
     elif OperationType.GET in operations_to_run: 
         if logger.isEnabledFor(logging.INFO): logger.info(f"=== GET PHASE (standalone, {file_size_mb:.0f}MB) using {server_filename_for_this_task} ===")
         download_dir_for_task = f"bm_downloads_task_{task_id}"
         
-        get_ok, get_time, get_bytes = remote_get(server_ip, server_port, logger, server_filename_for_this_task, download_dir_for_task, task_id)
+        get_ok, get_time, get_bytes = _run_get(server_ip, server_port, logger, server_filename_for_this_task, download_dir_for_task, task_id, pool, transfer_options)
         task_stat_records.append({"task_id": task_id, "operation": OperationType.GET.value, "file_size": get_bytes, "status": "SUCCESS" if get_ok else "FAILED", "duration": get_time, "bytes_processed": get_bytes if get_ok else 0})
     
+    if OperationType.LIST in operations_to_run:
+        list_ok, list_time, _ = remote_list(server_ip, server_port, logger, task_id, pool)
+        task_stat_records.append({"task_id": task_id, "operation": OperationType.LIST.value, "file_size": 0, "status": "SUCCESS" if list_ok else "FAILED", "duration": list_time, "bytes_processed": 0})
+    
+    if OperationType.DELETE in operations_to_run:
+        del_ok, del_time, _ = remote_delete(server_ip, server_port, logger, server_filename_for_this_task, task_id, pool)
+        task_stat_records.append({"task_id": task_id, "operation": OperationType.DELETE.value, "file_size": 0, "status": "SUCCESS" if del_ok else "FAILED", "duration": del_time, "bytes_processed": 0})
+    
     if logger.isEnabledFor(logging.INFO):
         logger.info(f"Worker finished.")
     return task_stat_records 
 
 
+# Smaller than the threaded chunks: every connection's unsent chunk sits in its transport buffer until drained
+ASYNC_STREAM_CHUNK_BYTES = 3 * 16 * 1024
+ASYNC_UNSUPPORTED_OPTIONS = (("pipeline_depth", 1), ("parallel_streams", 1), ("resume", False), ("dedup", False), ("delta_upload", False), ("batch_size", 1))
+
+class AsyncServerConnection:
+    def __init__(self, reader, writer):
+        self.reader = reader; self.writer = writer; self.recv_buffer = b""
+    @classmethod
+    async def open(cls, server_ip, server_port):
+        reader, writer = await asyncio.open_connection(server_ip, server_port)
+        return cls(reader, writer)
+    async def send_message(self, command_str):
+        self.writer.write((command_str + "\r\n\r\n").encode()); await self.writer.drain()
+    async def send_chunks(self, chunks):
+        # Each chunk is read, compressed and base64-encoded on an executor thread so the loop keeps serving other transfers
+        loop = asyncio.get_running_loop(); chunks = iter(chunks)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None: break
+            self.writer.write(chunk); await self.writer.drain()
+        self.writer.write(b"\r\n\r\n"); await self.writer.drain()
+    async def recv_message_to(self, sink, buffer_size=65536):
+        # With a sink, feed() decodes, decompresses and writes the payload, so it runs on an executor thread too
+        loop = asyncio.get_running_loop()
+        scanner = ReplyScanner(sink); message = scanner.feed(self.recv_buffer)
+        while message is None:
+            data = await self.reader.read(buffer_size)
+            if not data: raise ConnectionError("Connection closed by peer before end of message")
+            message = await loop.run_in_executor(None, scanner.feed, data) if sink else scanner.feed(data)
+        self.recv_buffer = scanner.remainder
+        return message
+    def close(self):
+        self.writer.close()
+
+class AsyncConnectionSlot:
+    def __init__(self, pooled):
+        self.pooled = pooled; self.conn = None
+    def take(self):
+        conn, self.conn = self.conn, None
+        return conn
+    def give_back(self, conn):
+        if self.pooled and self.conn is None: self.conn = conn
+        else: conn.close()
+    def close(self):
+        if self.conn: self.conn.close(); self.conn = None
+
+async def async_send_command(server_ip, server_port, logger, command, log_prefix, slot, sink=None, timeout=600.0):
+    for attempt in range(2):
+        conn = slot.take(); reused = conn is not None
+        try:
+            if conn is None: conn = await asyncio.wait_for(AsyncServerConnection.open(server_ip, server_port), timeout)
+            await asyncio.wait_for(conn.send_chunks(command()) if callable(command) else conn.send_message(command), timeout)
+            if sink: sink.reset()
+            hasil = json.loads((await asyncio.wait_for(conn.recv_message_to(sink), timeout)).decode())
+            slot.give_back(conn)
+            return hasil
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            if conn: conn.close()
+            if reused and attempt == 0 and isinstance(e, ConnectionError): logger.warning(f"{log_prefix}: Pooled connection went stale ({e}), retrying on a fresh connection."); continue
+            logger.error(f"{log_prefix}: {type(e).__name__}: {e}")
+            return {'status': 'ERROR', 'data': str(e) or type(e).__name__}
+    return {'status': 'ERROR', 'data': 'Retry on fresh connection failed'}
+
+async def async_remote_upload(server_ip, server_port, logger, local_filepath, server_filename, task_id, slot, codec='none', level=None):
+    log_prefix = f"Task {task_id} (UPLOAD)"; start_time = time.perf_counter()
+    try:
+        file_size = os.path.getsize(local_filepath)
+        with open(local_filepath, 'rb') as f:
+            if codec != 'none' and not await asyncio.get_running_loop().run_in_executor(None, payload_codec.worth_compressing, f, file_size): codec = 'none'
+            hasil = await async_send_command(server_ip, server_port, logger, lambda: upload_command_chunks(f, server_filename, codec, ASYNC_STREAM_CHUNK_BYTES, level), log_prefix, slot)
+    except OSError as e:
+        logger.error(f"{log_prefix}: {e}"); return False, time.perf_counter() - start_time, 0
+    success = hasil.get('status') == 'OK'
+    if not success: logger.error(f"{log_prefix}: FAILED. Server: {hasil.get('data', 'No/Bad Resp')}")
+    return success, time.perf_counter() - start_time, file_size if success else 0
+
+async def async_remote_get(server_ip, server_port, logger, filename_on_server, local_save_dir, task_id, slot, codec='none', level=None):
+    log_prefix = f"Task {task_id} (GET)"; start_time = time.perf_counter()
+    command_str = f"GET {filename_on_server}"
+    if codec != 'none': command_str += f" {codec}" + (f" {level}" if level is not None else "")
+    sink = Base64FileSink(local_save_dir)
+    try:
+        hasil = await async_send_command(server_ip, server_port, logger, command_str, log_prefix, slot, sink)
+        success, bytes_processed = save_get_response(hasil, local_save_dir, logger, log_prefix, sink)
+    finally: sink.discard()
+    return success, time.perf_counter() - start_time, bytes_processed
+
+async def async_remote_simple_command(server_ip, server_port, logger, operation_type, command_str, task_id, slot):
+    start_time = time.perf_counter()
+    hasil = await async_send_command(server_ip, server_port, logger, command_str, f"Task {task_id} ({operation_type.value})", slot)
+    return hasil.get('status') == 'OK', time.perf_counter() - start_time, 0
+
+async def async_worker_task(task_id, server_ip, server_port, logger, local_file_path, server_filename, operations_to_run, connection_mode, repeat_ops, transfer_options):
+    if not os.path.exists(local_file_path):
+        return [{"task_id": task_id, "operation": "PREP_FAIL", "file_size": 0, "status": "FAILED", "duration": 0, "bytes_processed": 0}]
+    slot = AsyncConnectionSlot(connection_mode == ConnectionMode.POOLED.value)
+    codec = transfer_options.get('codec', 'none'); level = transfer_options.get('codec_level')
+    file_size = os.path.getsize(local_file_path); download_dir = f"bm_downloads_task_{task_id}"
+    records = []
+    record = lambda op, result, size: records.append({"task_id": task_id, "operation": op.value, "file_size": size, "status": "SUCCESS" if result[0] else "FAILED", "duration": result[1], "bytes_processed": result[2] if result[0] else 0})
+    try:
+        for _ in range(repeat_ops):
+            upload_ok = True
+            if OperationType.UPLOAD in operations_to_run:
+                result = await async_remote_upload(server_ip, server_port, logger, local_file_path, server_filename, task_id, slot, codec, level)
+                record(OperationType.UPLOAD, result, file_size); upload_ok = result[0]
+            if OperationType.GET in operations_to_run and upload_ok:
+                result = await async_remote_get(server_ip, server_port, logger, server_filename, download_dir, task_id, slot, codec, level)
+                record(OperationType.GET, result, result[2])
+            if OperationType.LIST in operations_to_run:
+                record(OperationType.LIST, await async_remote_simple_command(server_ip, server_port, logger, OperationType.LIST, "LIST", task_id, slot), 0)
+            if OperationType.DELETE in operations_to_run:
+                record(OperationType.DELETE, await async_remote_simple_command(server_ip, server_port, logger, OperationType.DELETE, f"DELETE {server_filename}", task_id, slot), 0)
+    finally:
+        slot.close()
+    return records
+
+async def run_async_worker_tasks(task_specs, server_ip, server_port, logger, local_file_path, operations_to_run, connection_mode, repeat_ops, transfer_options):
+    results = await asyncio.gather(*(async_worker_task(task_id, server_ip, server_port, logger, local_file_path, server_filename, operations_to_run, connection_mode, repeat_ops, transfer_options)
+                                     for task_id, server_filename in task_specs), return_exceptions=True)
+    records = []
+    for (task_id, _), result in zip(task_specs, results):
+        if isinstance(result, BaseException): logger.error(f"Task {task_id} raised an unhandled exception: {result!r}")
+        else: records.extend(result)
+    return records
+
+def raise_open_file_limit(needed, logger):
+    if resource is None: return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft >= needed or soft == resource.RLIM_INFINITY: return
+    target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    try: resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    except (ValueError, OSError) as e: logger.warning(f"Could not raise the open file limit from {soft} to {target}: {e}"); return
+    if target < needed: logger.warning(f"Open file limit capped at {target} (hard limit); {needed} descriptors were wanted, so some connections may fail with EMFILE.")
+
+def percentile(sorted_values, pct):
+    if not sorted_values: return None
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    lower = int(rank); upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+def distribution(values):
+    ordered = sorted(values)
+    return {"p50": percentile(ordered, 50), "p90": percentile(ordered, 90), "p99": percentile(ordered, 99), "min": ordered[0], "max": ordered[-1]} if ordered else {}
+
 def analyze_and_print_stats(config_description, collected_raw_stats, overall_config_start_time, main_logger):
     
     
@@ -216,23 +953,552 @@ def analyze_and_print_stats(config_description, collected_raw_stats, overall_con
     print(f"  Successful Client Worker Tasks (all ops OK): {successful_client_worker_tasks}")
     print(f"  Failed Client Worker Tasks (at least one op FAILED): {failed_client_worker_tasks}")
     print("-" * 70); print("Operational Statistics:")
+    summary = {"config": config_description, "duration": overall_duration, "operations": {}}
     for op_name_val, stats in op_stats.items():
         print(f"  Operation: {op_name_val}")
         print(f"    Successful Ops: {stats['success_count']}; Failed Ops: {stats['fail_count']}")
+        op_summary = summary["operations"][op_name_val] = {"success_count": stats['success_count'], "fail_count": stats['fail_count'], "success_bytes": stats['total_bytes']}
         if stats['success_count'] > 0:
             avg_duration_op = sum(stats['durations']) / len(stats['durations'])
             print(f"    Avg Duration per Successful Op: {avg_duration_op:.3f} s")
+            op_summary["avg_duration"] = avg_duration_op
             if stats['throughputs_mb_s']:
                  avg_throughput_op_mb_s = sum(stats['throughputs_mb_s']) / len(stats['throughputs_mb_s'])
                  print(f"    Avg Throughput per Successful Op: {avg_throughput_op_mb_s:.2f} MB/s")
+                 op_summary["avg_throughput_mb_s"] = avg_throughput_op_mb_s
+            op_summary["latency_s"] = latency = distribution(stats['durations'])
+            print(f"    Latency p50/p90/p99/max: {latency['p50']:.4f} / {latency['p90']:.4f} / {latency['p99']:.4f} / {latency['max']:.4f} s")
+            if stats['throughputs_mb_s']:
+                op_summary["throughput_mb_s"] = throughput = distribution(stats['throughputs_mb_s'])
+                print(f"    Throughput min/p50/p90/p99: {throughput['min']:.2f} / {throughput['p50']:.2f} / {throughput['p90']:.2f} / {throughput['p99']:.2f} MB/s")
             if stats['total_duration'] > 1e-9:
                 aggregate_op_throughput_mb_s = (stats['total_bytes'] / (1024*1024)) / stats['total_duration']
                 print(f"    Aggregate Throughput for {op_name_val} (Successful Bytes / Total Op Duration): {aggregate_op_throughput_mb_s:.2f} MB/s")
+                op_summary["aggregate_throughput_mb_s"] = aggregate_op_throughput_mb_s
         print("-" * 40)
     print("=" * (30 + len(f" BENCHMARK RESULTS FOR: {config_description} ") + 30))
     if main_logger.isEnabledFor(logging.INFO): main_logger.info("Benchmark analysis complete for this configuration.")
+    return summary
+
+# Two-sided 95% Student t critical values for 1..30 degrees of freedom; beyond that the normal 1.96 is close enough
+T_CRITICAL_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+                 2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+TRIAL_METRICS = (("avg_duration", "Avg latency s"), ("latency_s.p50", "P50 latency s"), ("latency_s.p99", "P99 latency s"),
+                 ("aggregate_throughput_mb_s", "Aggregate MB/s"), ("ops_per_s", "Ops/s"))
+
+def confidence_interval(values):
+    n = len(values); mean = sum(values) / n
+    if n < 2: return {"n": n, "mean": mean, "stdev": None, "half_width": None, "low": None, "high": None}
+    stdev = statistics.stdev(values)
+    half_width = (T_CRITICAL_95[n - 2] if n - 1 <= len(T_CRITICAL_95) else 1.96) * stdev / math.sqrt(n)
+    return {"n": n, "mean": mean, "stdev": stdev, "half_width": half_width, "low": mean - half_width, "high": mean + half_width}
+
+def steady_state(values, tolerance):
+    # Steady when the trials neither scatter (coefficient of variation) nor drift (second half vs first half) beyond tolerance
+    if len(values) < 3: return None
+    mean = sum(values) / len(values)
+    if mean <= 0: return None
+    half = len(values) // 2
+    cv = statistics.stdev(values) / mean
+    drift = (sum(values[-half:]) / half - sum(values[:half]) / half) / mean
+    return {"cv": cv, "drift": drift, "steady": cv <= tolerance and abs(drift) <= tolerance}
+
+def _mean_fields(dicts):
+    merged = {}
+    for key in dicts[0]:
+        values = [d.get(key) for d in dicts]
+        if all(isinstance(value, dict) for value in values): merged[key] = _mean_fields(values)
+        elif all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values): merged[key] = sum(values) / len(values)
+    return merged
+
+def combine_trial_summaries(config_description, trial_summaries, steady_tolerance):
+    """Averages each operation's metrics over the trials and adds a 95% confidence interval per TRIAL_METRICS entry plus a steady-state check on ops/s."""
+    for trial in trial_summaries:
+        for op_summary in trial["operations"].values(): op_summary["ops_per_s"] = op_summary["success_count"] / trial["duration"] if trial["duration"] > 1e-9 else 0.0
+    combined = {"config": config_description, "duration": sum(trial["duration"] for trial in trial_summaries) / len(trial_summaries),
+                "trial_durations": [trial["duration"] for trial in trial_summaries], "operations": {}}
+    for op_name_val in dict.fromkeys(name for trial in trial_summaries for name in trial["operations"]):
+        per_trial = [trial["operations"][op_name_val] for trial in trial_summaries if op_name_val in trial["operations"]]
+        op_summary = combined["operations"][op_name_val] = _mean_fields(per_trial)
+        for count_key in ("success_count", "fail_count", "success_bytes"): op_summary[count_key] = sum(trial_op[count_key] for trial_op in per_trial)
+        op_summary["ci"] = {}
+        for path, _ in TRIAL_METRICS:
+            values = [value for value in (_metric(trial_op, path) for trial_op in per_trial) if value is not None]
+            if values: op_summary["ci"][path] = confidence_interval(values)
+        op_summary["steady_state"] = steady_state([trial_op["ops_per_s"] for trial_op in per_trial], steady_tolerance)
+    return combined
+
+def print_trial_summary(config_description, combined, steady_tolerance):
+    title = f" {len(combined['trial_durations'])} TRIALS (mean, 95% CI) FOR: {config_description} "
+    print("\n" + "="*15 + title + "="*15)
+    for op_name_val, op_summary in combined["operations"].items():
+        print(f"  Operation: {op_name_val} ({op_summary['success_count']} successful, {op_summary['fail_count']} failed over all trials)")
+        for path, label in TRIAL_METRICS:
+            ci = op_summary["ci"].get(path)
+            if not ci: continue
+            if ci["half_width"] is None: print(f"    {label:<16}{ci['mean']:>12.4f}"); continue
+            print(f"    {label:<16}{ci['mean']:>12.4f} ± {ci['half_width']:<10.4f} [{ci['low']:.4f}, {ci['high']:.4f}]  (±{ci['half_width'] / ci['mean'] * 100 if ci['mean'] else 0.0:.1f}%)")
+        steady = op_summary["steady_state"]
+        if steady is None: print("    Steady state: n/a (needs at least 3 trials with successful operations)")
+        else: print(f"    Steady state: {'steady' if steady['steady'] else 'NOT STEADY, add --warmup_runs/--warmup_seconds or trials'} (ops/s cv {steady['cv']:.1%}, drift {steady['drift']:+.1%}, tolerance {steady_tolerance:.0%})")
+        print("-" * 40)
+    print("=" * (30 + len(title)))
+
+def print_connection_mode_comparison(mode_summaries):
+    print("\n" + "="*15 + " CONNECTION MODE COMPARISON (cold vs pooled) " + "="*15)
+    print(f"{'Config':<28}{'Op':<8}{'Cold avg (s)':>14}{'Pooled avg (s)':>16}{'Speedup':>10}")
+    for config_key, by_mode in mode_summaries.items():
+        cold = by_mode.get(ConnectionMode.COLD.value); pooled = by_mode.get(ConnectionMode.POOLED.value)
+        if not cold or not pooled: continue
+        for op_name_val, cold_op in cold["operations"].items():
+            pooled_op = pooled["operations"].get(op_name_val, {})
+            cold_avg = cold_op.get("avg_duration"); pooled_avg = pooled_op.get("avg_duration")
+            if cold_avg is None or pooled_avg is None: print(f"{config_key:<28}{op_name_val:<8}{'n/a':>14}{'n/a':>16}{'n/a':>10}"); continue
+            speedup = cold_avg / pooled_avg if pooled_avg > 1e-9 else float('inf')
+            print(f"{config_key:<28}{op_name_val:<8}{cold_avg:>14.4f}{pooled_avg:>16.4f}{speedup:>9.2f}x")
+    print("=" * 76)
+
+
+
+COMPARED_METRICS = (("avg_duration", "Avg latency", True), ("latency_s.p99", "P99 latency", True), ("aggregate_throughput_mb_s", "Aggregate MB/s", False))
+
+def _metric(op_summary, path):
+    value = op_summary
+    for part in path.split("."): value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+def export_results(results, json_path, csv_path, cli_args):
+    if json_path:
+        with open(json_path, 'w') as f: json.dump({"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(cli_args), "results": results}, f, indent=2)
+        print(f"Results written to {json_path}")
+    if csv_path:
+        columns = ["key", "operation", "success_count", "fail_count", "avg_duration", "latency_s.p50", "latency_s.p90", "latency_s.p99", "latency_s.max",
+                   "avg_throughput_mb_s", "throughput_mb_s.min", "throughput_mb_s.p50", "throughput_mb_s.p90", "throughput_mb_s.p99", "aggregate_throughput_mb_s", "config_duration",
+                   "server_resources.cpu_s", "server_resources.cpu_ms_per_mb", "server_resources.cpu_ms_per_op", "server_resources.peak_rss", "server_resources.peak_rss_per_transfer_mb",
+                   "server_resources.peak_threads", "server_resources.peak_fds", "server_resources.voluntary_ctxt", "server_resources.involuntary_ctxt",
+                   "ops_per_s", "ci.avg_duration.half_width", "ci.latency_s.p99.half_width", "ci.aggregate_throughput_mb_s.half_width", "ci.ops_per_s.half_width", "steady_state.cv", "steady_state.steady"]
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f); writer.writerow(columns)
+            for summary in results:
+                for op_name_val, op_summary in summary["operations"].items():
+                    row = dict(op_summary, key=summary["key"], operation=op_name_val, config_duration=summary["duration"], server_resources=summary.get("server_resources"))
+                    writer.writerow(["" if _metric(row, column) is None else _metric(row, column) for column in columns])
+        print(f"Results written to {csv_path}")
+
+def compare_against_baseline(results, baseline_path, threshold_pct):
+    with open(baseline_path) as f: baseline = {summary["key"]: summary for summary in json.load(f).get("results", [])}
+    print("\n" + "="*15 + f" COMPARISON AGAINST BASELINE {baseline_path} (threshold {threshold_pct:.1f}%) " + "="*15)
+    print(f"{'Config':<40}{'Op':<8}{'Metric':<16}{'Baseline':>12}{'Current':>12}{'Change':>10}  Verdict")
+    regressions = 0
+    for summary in results:
+        base_summary = baseline.get(summary["key"])
+        if not base_summary: print(f"{summary['key']:<40}{'-':<8}{'-':<16}{'n/a':>12}{'':>12}{'':>10}  not in baseline"); continue
+        for op_name_val, op_summary in summary["operations"].items():
+            base_op = base_summary["operations"].get(op_name_val, {})
+            for path, label, lower_is_better in COMPARED_METRICS:
+                current = _metric(op_summary, path); previous = _metric(base_op, path)
+                if current is None or previous is None or previous <= 1e-12: continue
+                change_pct = (current - previous) / previous * 100.0
+                worse_pct = change_pct if lower_is_better else -change_pct
+                verdict = "REGRESSION" if worse_pct > threshold_pct else ("improved" if worse_pct < -threshold_pct else "ok")
+                # With --trials on both sides, a change whose confidence intervals still overlap is not distinguishable from noise
+                current_ci = op_summary.get("ci", {}).get(path); previous_ci = base_op.get("ci", {}).get(path)
+                if verdict != "ok" and current_ci and previous_ci and current_ci["half_width"] is not None and previous_ci["half_width"] is not None \
+                        and current_ci["low"] <= previous_ci["high"] and previous_ci["low"] <= current_ci["high"]: verdict = "noise (CIs overlap)"
+                regressions += verdict == "REGRESSION"
+                print(f"{summary['key']:<40}{op_name_val:<8}{label:<16}{previous:>12.4f}{current:>12.4f}{change_pct:>+9.1f}%  {verdict}")
+    print(f"{regressions} regression(s) beyond {threshold_pct:.1f}%.")
+    return regressions
+
+def _open_loop_operation(op, server_ip, server_port, logger, local_file_path, server_filename_base, arrival_idx, cycle_idx, pool, transfer_options):
+    task_id = f"OL-{arrival_idx}"
+    if op == OperationType.UPLOAD:
+        ok, _, bytes_processed = _run_upload(server_ip, server_port, logger, local_file_path, f"{server_filename_base}_u{cycle_idx}", task_id, pool, transfer_options)
+    elif op == OperationType.GET:
+        ok, _, bytes_processed = _run_get(server_ip, server_port, logger, f"{server_filename_base}_seed", f"bm_downloads_openloop_{threading.get_ident()}", task_id, pool, transfer_options)
+    elif op == OperationType.LIST:
+        ok, _, bytes_processed = remote_list(server_ip, server_port, logger, task_id, pool)
+    else:
+        ok, _, bytes_processed = remote_delete(server_ip, server_port, logger, f"{server_filename_base}_u{max(0, cycle_idx - 1)}", task_id, pool)
+    return ok, bytes_processed
+
+def run_open_loop(server_ip, server_port, logger, local_file_path, server_filename_base, operations_to_run, rate, duration_s, arrival, max_outstanding, connection_mode, transfer_options):
+    pool = ConnectionPool(server_ip, server_port, logger, max_idle=max_outstanding) if connection_mode == ConnectionMode.POOLED.value else None
+    file_size = os.path.getsize(local_file_path)
+    if OperationType.GET in operations_to_run and not remote_upload(server_ip, server_port, logger, local_file_path, f"{server_filename_base}_seed", "OL-SEED", pool)[0]:
+        logger.error(f"Open loop: could not seed {server_filename_base}_seed for GET operations.")
+    records = []; records_lock = threading.Lock()
+    def issue(op, arrival_idx, cycle_idx, intended_time):
+        try: ok, bytes_processed = _open_loop_operation(op, server_ip, server_port, logger, local_file_path, server_filename_base, arrival_idx, cycle_idx, pool, transfer_options)
+        except Exception as e: logger.error(f"Open loop arrival {arrival_idx} ({op.value}) raised: {e}"); ok, bytes_processed = False, 0
+        # Latency counts from the scheduled send time, so time spent queued behind a saturated server is not omitted
+        record = {"task_id": f"OL-{arrival_idx}", "operation": op.value, "file_size": file_size if op in (OperationType.UPLOAD, OperationType.GET) else 0,
+                  "status": "SUCCESS" if ok else "FAILED", "duration": time.perf_counter() - intended_time, "bytes_processed": bytes_processed if ok else 0, "completed_at": time.perf_counter()}
+        with records_lock: records.append(record)
+    rng = random.Random(); start_time = time.perf_counter(); intended_time = start_time; arrival_idx = 0
+    with ThreadPoolExecutor(max_workers=max_outstanding, thread_name_prefix="openloop") as executor:
+        while True:
+            intended_time += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+            if intended_time - start_time > duration_s: break
+            delay = intended_time - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+            op = operations_to_run[arrival_idx % len(operations_to_run)]
+            executor.submit(issue, op, arrival_idx, arrival_idx // len(operations_to_run), intended_time)
+            arrival_idx += 1
+    if pool: pool.close_all()
+    last_completion = max((record.pop("completed_at") for record in records), default=start_time)
+    elapsed = max(last_completion - start_time, duration_s)
+    succeeded = sum(1 for record in records if record["status"] == "SUCCESS")
+    return records, {"target_rate": rate, "issued": arrival_idx, "offered_rate": arrival_idx / duration_s, "achieved_rate": succeeded / elapsed if elapsed > 0 else 0.0, "elapsed": elapsed}
+
+def find_latency_knee(sweep_points, knee_factor, min_achieved_ratio=0.9):
+    if not sweep_points: return None, None
+    base_p99 = sweep_points[0]["p99"]
+    for idx, point in enumerate(sweep_points):
+        saturated = point["achieved_rate"] < point["offered_rate"] * min_achieved_ratio
+        if saturated or (base_p99 and point["p99"] is not None and point["p99"] > base_p99 * knee_factor):
+            return (sweep_points[idx - 1] if idx else None), point
+    return sweep_points[-1], None
+
+def print_open_loop_sweep(label, sweep_points, knee_factor):
+    print("\n" + "="*15 + f" OPEN-LOOP RATE SWEEP: {label} " + "="*15)
+    print(f"{'Target/s':>10}{'Offered/s':>11}{'Achieved/s':>12}{'Failed':>8}{'p50 (s)':>10}{'p90 (s)':>10}{'p99 (s)':>10}{'max (s)':>10}")
+    for point in sweep_points:
+        fmt = lambda value: f"{value:>10.4f}" if value is not None else f"{'n/a':>10}"
+        print(f"{point['target_rate']:>10.2f}{point['offered_rate']:>11.2f}{point['achieved_rate']:>12.2f}{point['failed']:>8}{fmt(point['p50'])}{fmt(point['p90'])}{fmt(point['p99'])}{fmt(point['max'])}")
+    sustainable, knee = find_latency_knee(sweep_points, knee_factor)
+    if knee is None: print(f"No latency knee found up to {sweep_points[-1]['target_rate']:.2f} req/s (p99 stayed within {knee_factor}x and achieved rate kept up).")
+    else: print(f"Latency knee at {knee['target_rate']:.2f} req/s; highest sustainable rate measured: {sustainable['target_rate']:.2f} req/s." if sustainable else f"Latency knee at the first rate measured ({knee['target_rate']:.2f} req/s); lower the starting rate.")
+    return knee
+
+def run_open_loop_suite(cli_args, server_ip, server_port, operations_to_run, transfer_options, logger):
+    results = []
+    for file_size_mb in cli_args.file_sizes_mb_list:
+        local_file_to_use = f"dummy_{file_size_mb}mb.bin"
+        if not create_dummy_file_if_not_exists(local_file_to_use, file_size_mb, logger): logger.error(f"Cannot run open loop for {file_size_mb}MB: dummy file missing."); continue
+        for connection_mode in cli_args.connection_modes:
+            rates = list(cli_args.open_loop_rates); sweep_points = []; extra_steps = cli_args.auto_sweep
+            while len(sweep_points) < len(rates):
+                rate = rates[len(sweep_points)]
+                config_desc = f"Pool=open-loop, FileSize={file_size_mb}MB, TargetRate={rate:g}/s ({cli_args.arrival}), Duration={cli_args.open_loop_duration:g}s, MaxOutstanding={cli_args.max_outstanding}, Connections={connection_mode}"
+                print(f"\n>>> RUNNING OPEN-LOOP CONFIG: {config_desc} <<<", flush=True)
+                start_time = time.perf_counter(); sampler = start_server_sampler(cli_args, logger)
+                records, info = run_open_loop(server_ip, server_port, logger, local_file_to_use, f"bm_openloop_s{file_size_mb}_{connection_mode}", operations_to_run, rate,
+                                              cli_args.open_loop_duration, cli_args.arrival, cli_args.max_outstanding, connection_mode, transfer_options)
+                summary = analyze_and_print_stats(config_desc, records, start_time, logger)
+                finish_server_sampler(sampler, summary, cli_args.max_outstanding)
+                print(f"Target rate {rate:.2f} req/s, offered {info['offered_rate']:.2f} req/s ({info['issued']} issued), achieved {info['achieved_rate']:.2f} successful req/s over {info['elapsed']:.2f} s.")
+                summary["key"] = f"Popenloop-S{file_size_mb}MB-R{rate:g}-{connection_mode}"; summary["open_loop"] = info
+                results.append(summary)
+                latency = distribution([record["duration"] for record in records if record["status"] == "SUCCESS"])
+                sweep_points.append(dict(info, failed=sum(1 for record in records if record["status"] != "SUCCESS"), p50=latency.get("p50"), p90=latency.get("p90"), p99=latency.get("p99"), max=latency.get("max")))
+                if find_latency_knee(sweep_points, cli_args.knee_factor)[1] is not None: break
+                if len(sweep_points) == len(rates) and extra_steps > 0: rates.append(rate * 2); extra_steps -= 1
+            print_open_loop_sweep(f"{file_size_mb}MB, {connection_mode}, ops {'/'.join(op.value for op in operations_to_run)}", sweep_points, cli_args.knee_factor)
+    return results
+
+class WorkloadPayloads:
+    def __init__(self, data_dir="workload_data"):
+        self.data_dir = data_dir; self.lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+    def path_for(self, size_bytes):
+        path = os.path.join(self.data_dir, f"payload_{size_bytes}.bin")
+        with self.lock:
+            if not os.path.exists(path) or os.path.getsize(path) != size_bytes:
+                with open(path, 'wb') as f:
+                    for offset in range(0, size_bytes, 1024 * 1024): f.write(os.urandom(min(1024 * 1024, size_bytes - offset)))
+        return path
 
+def run_workload_worker(worker_idx, profile, server_ip, server_port, logger, connection_mode, transfer_options, payloads, live_keys, live_lock, key_prefix):
+    rng = random.Random(None if profile.seed is None else f"{profile.seed}-{worker_idx}")
+    pool = ConnectionPool(server_ip, server_port, logger) if connection_mode == ConnectionMode.POOLED.value else None
+    download_dir = f"bm_downloads_workload_w{worker_idx}"; records = []
+    try:
+        for op_idx in range(profile.operations_per_worker):
+            op_name = profile.choose_operation(rng); task_id = f"WL-W{worker_idx}-{op_idx}"
+            key = profile.choose_key(rng)
+            if op_name in ("GET", "DELETE"):
+                # Redraw a few times so GET/DELETE mostly hit keys that currently exist
+                for _ in range(8):
+                    with live_lock:
+                        if key in live_keys: break
+                    key = profile.choose_key(rng)
+            key_size = profile.key_sizes[key]; server_filename = f"{key_prefix}_k{key}"
+            if op_name == "UPLOAD":
+                ok, duration, bytes_processed = _run_upload(server_ip, server_port, logger, payloads.path_for(key_size), server_filename, task_id, pool, transfer_options)
+                if ok:
+                    with live_lock: live_keys.add(key)
+            elif op_name == "GET":
+                ok, duration, bytes_processed = _run_get(server_ip, server_port, logger, server_filename, download_dir, task_id, pool, transfer_options)
+            elif op_name == "LIST":
+                ok, duration, bytes_processed = remote_list(server_ip, server_port, logger, task_id, pool); key_size = 0
+            else:
+                with live_lock: live_keys.discard(key)
+                ok, duration, bytes_processed = remote_delete(server_ip, server_port, logger, server_filename, task_id, pool); key_size = 0
+            records.append({"task_id": f"WL-W{worker_idx}", "operation": op_name, "file_size": key_size, "status": "SUCCESS" if ok else "FAILED", "duration": duration, "bytes_processed": bytes_processed if ok else 0})
+            think = profile.think_time(rng)
+            if think > 0: time.sleep(think)
+    finally:
+        if pool: pool.close_all()
+    return records
+
+def run_workload_suite(cli_args, server_ip, server_port, transfer_options, logger):
+    try: profile = workload_profile.load_profile(cli_args.workload)
+    except (OSError, ValueError) as e: logger.critical(f"Cannot load workload profile {cli_args.workload}: {e}"); sys.exit(1)
+    print(f"Workload profile {profile.describe()}", flush=True)
+    payloads = WorkloadPayloads(); results = []
+    key_prefix = f"bm_wl_{profile.name}".replace(" ", "_")
+    for connection_mode in cli_args.connection_modes:
+        live_keys = set(); live_lock = threading.Lock()
+        if profile.preload:
+            print(f"Preloading {profile.keys.count} keys...", flush=True)
+            preload_pool = ConnectionPool(server_ip, server_port, logger, max_idle=profile.workers)
+            def preload(key):
+                if remote_upload(server_ip, server_port, logger, payloads.path_for(profile.key_sizes[key]), f"{key_prefix}_k{key}", f"WL-PRELOAD-{key}", preload_pool)[0]:
+                    with live_lock: live_keys.add(key)
+            with ThreadPoolExecutor(max_workers=max(1, profile.workers)) as executor: list(executor.map(preload, range(profile.keys.count)))
+            preload_pool.close_all()
+        config_desc = f"Workload={profile.name}, Workers={profile.workers}, OpsPerWorker={profile.operations_per_worker}, Keys={profile.keys.count} ({profile.keys.popularity}), Connections={connection_mode}"
+        print(f"\n>>> RUNNING WORKLOAD: {config_desc} <<<", flush=True)
+        records = []; start_time = time.perf_counter(); sampler = start_server_sampler(cli_args, logger)
+        with ThreadPoolExecutor(max_workers=max(1, profile.workers), thread_name_prefix="workload") as executor:
+            futures = [executor.submit(run_workload_worker, worker_idx, profile, server_ip, server_port, logger, connection_mode, transfer_options, payloads, live_keys, live_lock, key_prefix) for worker_idx in range(profile.workers)]
+            for future in as_completed(futures):
+                try: records.extend(future.result())
+                except Exception as e: logger.error(f"Workload worker raised: {e}", exc_info=True)
+        summary = analyze_and_print_stats(config_desc, records, start_time, logger)
+        finish_server_sampler(sampler, summary, profile.workers)
+        summary["key"] = f"Pworkload-{profile.name}-{connection_mode}"
+        results.append(summary)
+    return results
+
+def run_worker_matrix_config(cli_args, server_ip, server_port, file_size_mb, num_workers, connection_mode, operations_to_run_enums, transfer_options, main_log_level, logger, name_prefix="", executor=None):
+    local_file_to_use = f"dummy_{file_size_mb}mb.bin"
+    # name_prefix keeps task ids and server files of coordinated load generators apart
+    server_filename_base_for_config = f"bm_p{cli_args.pool_type}_s{file_size_mb}_w{num_workers}" + (f"_{name_prefix.rstrip('-').lower()}" if name_prefix else "")
+    current_config_raw_stats_accumulator = []
+    if cli_args.pool_type == ExecutorType.ASYNCIO.value:
+        task_specs = [(f"{name_prefix}P{cli_args.pool_type}-S{file_size_mb}-{connection_mode[0].upper()}-W{worker_idx+1}-R{run_idx+1}", f"{server_filename_base_for_config}_{connection_mode}_w{worker_idx+1}_r{run_idx+1}")
+                      for worker_idx in range(num_workers) for run_idx in range(cli_args.num_runs_per_worker_task)]
+        current_config_raw_stats_accumulator = asyncio.run(run_async_worker_tasks(task_specs, server_ip, server_port, logger, local_file_to_use,
+                                                                                 operations_to_run_enums, connection_mode, cli_args.repeat_ops, transfer_options))
+    else:
+        # A caller-supplied executor is reused across warmup and trials, so pool start-up is paid outside the measured runs
+        owns_executor = executor is None
+        if owns_executor: executor = (ThreadPoolExecutor if cli_args.pool_type == ExecutorType.THREAD.value else ProcessPoolExecutor)(max_workers=num_workers)
+        try:
+            futures = []
+    
+            for worker_idx in range(num_workers): 
+                for run_idx in range(cli_args.num_runs_per_worker_task): 
+            
+                    task_id_str = f"{name_prefix}P{cli_args.pool_type}-S{file_size_mb}-{connection_mode[0].upper()}-W{worker_idx+1}-R{run_idx+1}"
+            
+                    server_file_for_this_task = f"{server_filename_base_for_config}_{connection_mode}_w{worker_idx+1}_r{run_idx+1}"
+
+                    futures.append(executor.submit(client_worker_task, 
+                                                  task_id_str,
+                                                  server_ip,
+                                                  server_port,
+                                                  main_log_level, 
+                                                  cli_args.log_file if cli_args.pool_type == ExecutorType.THREAD.value else None, 
+                                                  local_file_to_use, 
+                                                  server_file_for_this_task, 
+                                                  operations_to_run_enums,
+                                                  connection_mode,
+                                                  cli_args.pipeline_depth,
+                                                  cli_args.repeat_ops,
+                                                  transfer_options))
+    
+            for future in as_completed(futures):
+                logger.debug(f"A future completed for config S{file_size_mb}MB W{num_workers} {connection_mode}.")
+                try:
+                    list_of_stat_records_from_worker = future.result() 
+                    if list_of_stat_records_from_worker:
+                        current_config_raw_stats_accumulator.extend(list_of_stat_records_from_worker)
+                except Exception as e_task: 
+                    logger.error(f"Task (S{file_size_mb}MB W{num_workers} {connection_mode}) raised an unhandled exception in future: {e_task}", exc_info=True)
+        finally:
+            if owns_executor: executor.shutdown()
+    return current_config_raw_stats_accumulator
 
+def run_warmup(cli_args, server_ip, server_port, file_size_mb, num_workers, connection_mode, operations_to_run_enums, transfer_options, main_log_level, logger, executor):
+    # Warmup uses the measured runs' server filenames so the first trial overwrites existing files like every later one
+    warmup_start = time.perf_counter(); runs = 0; failed = 0
+    while runs < cli_args.warmup_runs or time.perf_counter() - warmup_start < cli_args.warmup_seconds:
+        records = run_worker_matrix_config(cli_args, server_ip, server_port, file_size_mb, num_workers, connection_mode, operations_to_run_enums, transfer_options, main_log_level, logger, executor=executor)
+        failed += sum(record["status"] != "SUCCESS" for record in records); runs += 1
+    if runs: print(f"Warmup: {runs} run(s) in {time.perf_counter() - warmup_start:.3f} s excluded from the statistics" + (f" ({failed} failed operations)" if failed else ""), flush=True)
+
+# Settings a coordinator imposes on its load generators so every process runs the same configuration
+COORDINATED_SETTINGS = ("pool_type", "num_runs_per_worker_task", "pipeline_depth", "repeat_ops", "parallel_streams", "batch_size")
+
+class ControlChannel:
+    def __init__(self, sock):
+        self.sock = sock; self.reader = sock.makefile('r', encoding='utf-8')
+    def send(self, message_type, **fields):
+        self.sock.sendall((json.dumps(dict(fields, type=message_type)) + "\n").encode())
+    def recv(self, expected_type=None):
+        line = self.reader.readline()
+        if not line: raise ConnectionError("Control connection closed by peer")
+        message = json.loads(line)
+        if expected_type and message.get("type") != expected_type: raise ConnectionError(f"Expected '{expected_type}' control message, got '{message.get('type')}'")
+        return message
+    def close(self):
+        try: self.reader.close(); self.sock.close()
+        except OSError: pass
+
+def histograms_from_records(records):
+    task_ok = {}; operations = {}
+    for record in records:
+        if record["status"] != "SUCCESS" and record["operation"] != "PREP_FAIL": task_ok[record["task_id"]] = False
+        else: task_ok.setdefault(record["task_id"], True)
+        if record["operation"] == "PREP_FAIL": continue
+        op = operations.setdefault(record["operation"], {"success_count": 0, "fail_count": 0, "success_bytes": 0, "total_duration": 0.0, "latency": LogHistogram(), "throughput": LogHistogram()})
+        op["total_duration"] += record["duration"]
+        if record["status"] != "SUCCESS": op["fail_count"] += 1; continue
+        op["success_count"] += 1; op["success_bytes"] += record["bytes_processed"]; op["latency"].record(record["duration"])
+        if record["duration"] > 1e-9 and record["bytes_processed"] > 0: op["throughput"].record((record["bytes_processed"] / (1024*1024)) / record["duration"])
+    return {"tasks_ok": sum(task_ok.values()), "tasks_failed": len(task_ok) - sum(task_ok.values()),
+            "operations": {name: dict(op, latency=op["latency"].to_dict(), throughput=op["throughput"].to_dict()) for name, op in operations.items()}}
+
+def merge_histogram_reports(reports):
+    merged = {"tasks_ok": 0, "tasks_failed": 0, "operations": {}}
+    for report in reports:
+        merged["tasks_ok"] += report["tasks_ok"]; merged["tasks_failed"] += report["tasks_failed"]
+        for name, op in report["operations"].items():
+            target = merged["operations"].setdefault(name, {"success_count": 0, "fail_count": 0, "success_bytes": 0, "total_duration": 0.0, "latency": LogHistogram(), "throughput": LogHistogram()})
+            for counter in ("success_count", "fail_count", "success_bytes", "total_duration"): target[counter] += op[counter]
+            target["latency"].merge(LogHistogram.from_dict(op["latency"])); target["throughput"].merge(LogHistogram.from_dict(op["throughput"]))
+    return merged
+
+def print_histogram_stats(config_description, merged, overall_duration, agent_durations):
+    print("\n" + "="*15 + f" COORDINATED RESULTS FOR: {config_description} " + "="*15)
+    print(f"Total Duration for this Configuration: {overall_duration:.3f} seconds (load generators finished after {min(agent_durations):.3f}..{max(agent_durations):.3f} s)")
+    print("-" * 70); print("Client Worker Task Summary:")
+    print(f"  Total Client Worker Tasks Processed: {merged['tasks_ok'] + merged['tasks_failed']}")
+    print(f"  Successful Client Worker Tasks (all ops OK): {merged['tasks_ok']}")
+    print(f"  Failed Client Worker Tasks (at least one op FAILED): {merged['tasks_failed']}")
+    print("-" * 70); print("Operational Statistics (percentiles from merged log histograms, within 1%):")
+    summary = {"config": config_description, "duration": overall_duration, "load_generator_durations": agent_durations, "operations": {}}
+    for op_name_val, stats in merged["operations"].items():
+        print(f"  Operation: {op_name_val}")
+        print(f"    Successful Ops: {stats['success_count']}; Failed Ops: {stats['fail_count']}")
+        op_summary = summary["operations"][op_name_val] = {"success_count": stats['success_count'], "fail_count": stats['fail_count'], "success_bytes": stats['success_bytes']}
+        if stats['success_count'] > 0:
+            op_summary["avg_duration"] = stats['latency'].mean()
+            print(f"    Avg Duration per Successful Op: {op_summary['avg_duration']:.3f} s")
+            if stats['throughput'].count:
+                op_summary["avg_throughput_mb_s"] = stats['throughput'].mean()
+                print(f"    Avg Throughput per Successful Op: {op_summary['avg_throughput_mb_s']:.2f} MB/s")
+            op_summary["latency_s"] = latency = stats['latency'].distribution()
+            print(f"    Latency p50/p90/p99/max: {latency['p50']:.4f} / {latency['p90']:.4f} / {latency['p99']:.4f} / {latency['max']:.4f} s")
+            if stats['throughput'].count:
+                op_summary["throughput_mb_s"] = throughput = stats['throughput'].distribution()
+                print(f"    Throughput min/p50/p90/p99: {throughput['min']:.2f} / {throughput['p50']:.2f} / {throughput['p90']:.2f} / {throughput['p99']:.2f} MB/s")
+            if stats['total_duration'] > 1e-9:
+                op_summary["aggregate_throughput_mb_s"] = (stats['success_bytes'] / (1024*1024)) / stats['total_duration']
+                print(f"    Aggregate Throughput for {op_name_val} (Successful Bytes / Total Op Duration): {op_summary['aggregate_throughput_mb_s']:.2f} MB/s")
+            if overall_duration > 0:
+                op_summary["client_capacity_mb_s"] = (stats['success_bytes'] / (1024*1024)) / overall_duration; op_summary["ops_per_s"] = stats['success_count'] / overall_duration
+                print(f"    Combined Rate across load generators: {op_summary['ops_per_s']:.1f} ops/s, {op_summary['client_capacity_mb_s']:.2f} MB/s")
+        print("-" * 40)
+    print("=" * (30 + len(f" COORDINATED RESULTS FOR: {config_description} ") + 30))
+    return summary
+
+def run_load_agent(cli_args, server_ip, server_port, main_log_level, logger):
+    host, _, port = cli_args.agent.rpartition(":")
+    sock = socket.create_connection((host or "127.0.0.1", int(port)), timeout=cli_args.agent_timeout); sock.settimeout(None)
+    channel = ControlChannel(sock)
+    try:
+        channel.send("hello", host=socket.gethostname(), pid=os.getpid())
+        name_prefix = f"A{channel.recv('welcome')['agent_index']}-"
+        while True:
+            message = channel.recv()
+            if message["type"] == "done": return
+            if message["type"] != "prepare": raise ConnectionError(f"Unexpected control message '{message['type']}'")
+            settings = message["settings"]; run_args = argparse.Namespace(**dict(vars(cli_args), **settings["cli"]))
+            file_size_mb = message["file_size_mb"]; num_workers = message["num_workers"]
+            ready = create_dummy_file_if_not_exists(f"dummy_{file_size_mb}mb.bin", file_size_mb, logger)
+            if run_args.pool_type == ExecutorType.ASYNCIO.value: raise_open_file_limit(2 * num_workers * run_args.num_runs_per_worker_task + 256, logger)
+            channel.send("ready", ok=ready)
+            channel.recv("start"); start_time = time.perf_counter()
+            records = run_worker_matrix_config(run_args, server_ip, server_port, file_size_mb, num_workers, message["connection_mode"], [OperationType(op) for op in settings["operations"]],
+                                               settings["transfer_options"], main_log_level, logger, name_prefix) if ready else []
+            channel.send("result", duration=time.perf_counter() - start_time, report=histograms_from_records(records))
+    finally:
+        channel.close()
+
+def run_coordinator(cli_args, server_ip, server_port, operations_to_run, transfer_options, logger):
+    agent_count = cli_args.coordinator
+    spawn_count = agent_count if cli_args.spawn_agents is None else max(0, min(cli_args.spawn_agents, agent_count))
+    listener = socket.create_server((cli_args.control_host, cli_args.control_port)); listener.settimeout(cli_args.agent_timeout)
+    control_port = listener.getsockname()[1]
+    print(f"Coordinator: control socket on {cli_args.control_host}:{control_port}, waiting for {agent_count} load generators ({spawn_count} started locally).", flush=True)
+    if spawn_count < agent_count: print(f"Start the other {agent_count - spawn_count} with: file_client_cli.py {server_ip} {server_port} --agent <coordinator-host>:{control_port}", flush=True)
+    agent_command = [sys.executable, os.path.abspath(__file__), server_ip, str(server_port), "--agent", f"{'127.0.0.1' if cli_args.control_host in ('', '0.0.0.0') else cli_args.control_host}:{control_port}",
+                     "--agent_timeout", str(cli_args.agent_timeout)] + (["-v"] if cli_args.verbose else ["-q"] if cli_args.quiet else [])
+    processes = [subprocess.Popen(agent_command) for _ in range(spawn_count)]
+    channels = []; results = []
+    settings = {"cli": {name: getattr(cli_args, name) for name in COORDINATED_SETTINGS}, "operations": [op.value for op in operations_to_run], "transfer_options": transfer_options}
+    try:
+        while len(channels) < agent_count:
+            sock, address = listener.accept(); sock.settimeout(None)
+            channel = ControlChannel(sock); hello = channel.recv("hello")
+            channels.append(channel); channel.send("welcome", agent_index=len(channels))
+            print(f"  Load generator {len(channels)}/{agent_count} connected from {address[0]} ({hello['host']}, pid {hello['pid']}).", flush=True)
+        for file_size_mb in cli_args.file_sizes_mb_list:
+            # Local load generators share this working directory, so the payload is created once up front
+            if not create_dummy_file_if_not_exists(f"dummy_{file_size_mb}mb.bin", file_size_mb, logger): continue
+            for num_workers in cli_args.client_workers_list:
+                for connection_mode in cli_args.connection_modes:
+                    config_desc = (f"LoadGenerators={agent_count}, Pool={cli_args.pool_type}, FileSize={file_size_mb}MB, ClientWorkers={num_workers} per generator ({num_workers * agent_count} total), "
+                                   f"OpsPerCycle={len(operations_to_run)}, RunsPerWorker={cli_args.num_runs_per_worker_task}, Connections={connection_mode}, PipelineDepth={cli_args.pipeline_depth}, RepeatOps={cli_args.repeat_ops}")
+                    print(f"\n>>> RUNNING COORDINATED CONFIG: {config_desc} <<<", flush=True)
+                    for channel in channels: channel.send("prepare", file_size_mb=file_size_mb, num_workers=num_workers, connection_mode=connection_mode, settings=settings)
+                    not_ready = [idx + 1 for idx, channel in enumerate(channels) if not channel.recv("ready")["ok"]]
+                    if not_ready: logger.warning(f"Load generators {not_ready} could not prepare dummy_{file_size_mb}mb.bin and will report no operations.")
+                    # Every generator has finished its setup before any of them is told to start
+                    sampler = start_server_sampler(cli_args, logger); start_time = time.perf_counter()
+                    for channel in channels: channel.send("start")
+                    replies = [channel.recv("result") for channel in channels]
+                    summary = print_histogram_stats(config_desc, merge_histogram_reports([reply["report"] for reply in replies]), time.perf_counter() - start_time, [reply["duration"] for reply in replies])
+                    finish_server_sampler(sampler, summary, num_workers * agent_count)
+                    summary["key"] = f"P{cli_args.pool_type}-S{file_size_mb}MB-W{num_workers}x{agent_count}-{connection_mode}"
+                    results.append(summary)
+        for channel in channels: channel.send("done")
+    except (OSError, ValueError) as e:
+        logger.critical(f"Coordinator stopped: {type(e).__name__}: {e}")
+    finally:
+        for channel in channels: channel.close()
+        listener.close()
+        for process in processes:
+            try: process.wait(timeout=30)
+            except subprocess.TimeoutExpired: process.kill()
+    return results
+
+def start_server_sampler(cli_args, logger):
+    if not cli_args.server_pid: return None
+    if not proc_sampler.proc_available(): logger.warning("--server_pid needs Linux /proc; server resource sampling disabled."); return None
+    sampler = proc_sampler.ProcSampler(cli_args.server_pid, cli_args.sample_interval); sampler.start()
+    return sampler
+
+def finish_server_sampler(sampler, summary, concurrency):
+    if not sampler: return
+    usage = sampler.stop()
+    if not usage: print(f"Server resources: no samples of PID {sampler.root_pid} (process gone or run shorter than one interval)."); return
+    successful_ops = sum(op_summary["success_count"] for op_summary in summary["operations"].values())
+    total_mb = sum(op_summary.get("success_bytes", 0) for op_summary in summary["operations"].values()) / (1024*1024)
+    usage["cpu_ms_per_mb"] = usage["cpu_s"] * 1000 / total_mb if total_mb > 0 else None
+    usage["cpu_ms_per_op"] = usage["cpu_s"] * 1000 / successful_ops if successful_ops else None
+    usage["avg_cpu_utilization"] = usage["cpu_s"] / usage["elapsed_s"] if usage["elapsed_s"] > 0 else None
+    usage["peak_rss_per_transfer_mb"] = usage["peak_rss"] / (1024*1024) / max(1, concurrency)
+    summary["server_resources"] = usage
+    fmt = lambda value, spec: format(value, spec) if value is not None else "n/a"
+    print(f"Server resources (PID {sampler.root_pid} tree, {usage['samples']} samples every {usage['interval_s']:g}s):")
+    print(f"  CPU: {usage['cpu_s']:.3f} s ({fmt(usage['avg_cpu_utilization'], '.2f')} cores avg); {fmt(usage['cpu_ms_per_mb'], '.2f')} CPU-ms/MB; {fmt(usage['cpu_ms_per_op'], '.2f')} CPU-ms/op")
+    print(f"  RSS: peak {usage['peak_rss']/(1024*1024):.1f} MB, avg {usage['avg_rss']/(1024*1024):.1f} MB; peak RSS per concurrent transfer {usage['peak_rss_per_transfer_mb']:.2f} MB ({concurrency} concurrent)")
+    print(f"  Peak processes {usage['peak_processes']}, threads {usage['peak_threads']}, open fds {usage['peak_fds']}; context switches {usage['voluntary_ctxt']} voluntary / {usage['involuntary_ctxt']} involuntary")
 
 def create_dummy_file_if_not_exists(filename, size_in_mb, logger_instance):
     if not os.path.exists(filename):
@@ -259,7 +1525,7 @@ def main():
     parser.add_argument("server_port", type=int, help="Port number of the file server")
     
     parser.add_argument("-p", "--pool_type", choices=[e.value for e in ExecutorType], default=ExecutorType.THREAD.value,
-                        help=f"Type of worker pool to use on client-side (default: {ExecutorType.THREAD.value}). Choices: {[e.value for e in ExecutorType]}")
+                        help=f"Type of worker pool to use on client-side (default: {ExecutorType.THREAD.value}). Choices: {[e.value for e in ExecutorType]}. 'asyncio' runs every worker as a coroutine on one event loop, so -c can go to tens of thousands of connections from one process.")
     
     parser.add_argument("-c", "--client_workers_list", nargs='+', type=int, default=[1, 5, 50], 
                         help="Space-separated list of concurrent client worker counts to test (default: 1 5 50)")
@@ -271,9 +1537,81 @@ def main():
     
     
     
+    parser.add_argument("-m", "--connection_modes", nargs='+', choices=[e.value for e in ConnectionMode], default=[ConnectionMode.COLD.value],
+                        help="Connection handling to benchmark (default: cold). 'cold' opens a TCP connection per command, 'pooled' reuses a per-worker pool so UPLOAD then GET share one connection. Pass both to compare them.")
+    
+    parser.add_argument("--pipeline_depth", type=int, default=1,
+                        help="Commands kept in flight per connection (default: 1, i.e. wait for each reply). Values > 1 send the worker's whole command sequence pipelined over one connection.")
+    parser.add_argument("-k", "--parallel_streams", type=int, default=1,
+                        help="Parallel connections per large transfer (default: 1). Values > 1 download files as GETRANGE segments written in place and upload them as UPLOAD_CHUNK sessions.")
+    parser.add_argument("--chunk_size_mb", type=float, default=4.0,
+                        help="Chunk size for chunked uploads and segmented downloads in MB (default: 4).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Make UPLOAD/GET resumable: transfers go through verified chunks/segments and an interrupted transfer continues from what was already verified.")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Before each UPLOAD ask the server (HAVE <sha256>) whether it already stores the content and, if so, only LINK the name. Needs a server running with ETS_STORAGE_MODE=cas.")
+    parser.add_argument("--delta_upload", action="store_true",
+                        help="rsync-style UPLOAD: fetch the server copy's block signatures and send only changed blocks plus copy instructions, falling back to a full upload when the server has no copy.")
+    parser.add_argument("--compression", choices=list(payload_codec.CODECS), default='none',
+                        help="Payload compression for whole-file UPLOAD/GET (default: none). Incompressible payloads, judged by sampled byte entropy, are sent as-is.")
+    parser.add_argument("--compression_level", type=int, default=None,
+                        help="Compression level for --compression (zlib 0-9, lzma preset 0-9; default: codec default).")
+    parser.add_argument("--transfer_retries", type=int, default=0,
+                        help="How many times a failed chunked/segmented transfer is retried within one operation (default: 0).")
+    parser.add_argument("-b", "--batch_size", type=int, default=1,
+                        help="Files per batch command (default: 1). Values > 1 make each worker UPLOAD/GET/DELETE that many server files with single MUPLOAD/MGET/MDELETE requests, recording one result per file.")
+    parser.add_argument("-r", "--repeat_ops", type=int, default=1,
+                        help="How many times each worker task repeats its operation cycle on the same server file (default: 1). Useful with LIST/GET/DELETE small-command workloads.")
+    
     parser.add_argument("-n", "--num_runs_per_worker_task", type=int, default=1, 
                         help="Number of UPLOAD/GET cycles each worker will perform for a given file size and worker config (default: 1).")
     
+    parser.add_argument("--trials", type=int, default=1,
+                        help="Measured repetitions of every worker-matrix configuration; with 2 or more, each metric is reported as a mean with a 95%% confidence interval (default: 1).")
+    parser.add_argument("--warmup_runs", type=int, default=0,
+                        help="Unmeasured runs of every configuration before its trials, absorbing cold page cache, connection set-up and pool spawning (default: 0).")
+    parser.add_argument("--warmup_seconds", type=float, default=0.0,
+                        help="Keep repeating warmup runs until at least this many seconds have passed (default: 0).")
+    parser.add_argument("--steady_tolerance", type=float, default=0.10,
+                        help="Largest ops/s coefficient of variation and first-half/second-half drift across trials still counted as steady state (default: 0.10).")
+    parser.add_argument("--open_loop_rates", nargs='+', type=float, default=None,
+                        help="Open-loop mode: issue the selected operations at these target rates (requests/s) regardless of completions, measuring latency from each request's scheduled send time. Replaces the worker matrix.")
+    parser.add_argument("--arrival", choices=["poisson", "fixed"], default="poisson",
+                        help="Open-loop inter-arrival times: exponential (poisson) or constant (fixed) (default: poisson).")
+    parser.add_argument("--open_loop_duration", type=float, default=10.0,
+                        help="Seconds of arrivals generated per open-loop rate (default: 10).")
+    parser.add_argument("--max_outstanding", type=int, default=64,
+                        help="Open-loop requests allowed in flight at once; later arrivals queue and their wait counts as latency (default: 64).")
+    parser.add_argument("--auto_sweep", type=int, default=0,
+                        help="Keep doubling the last open-loop rate up to this many extra times until the latency knee is found (default: 0).")
+    parser.add_argument("--knee_factor", type=float, default=3.0,
+                        help="A rate is past the knee when its p99 exceeds this multiple of the lowest rate's p99, or achieved throughput falls below 90%% of the offered rate (default: 3).")
+    parser.add_argument("--workload", type=str, default=None,
+                        help="JSON or TOML workload profile (operation weights, file-size buckets, key count and uniform/zipf popularity, think time) to run instead of the worker matrix; see workloads/ for examples.")
+    parser.add_argument("--coordinator", type=int, default=0, metavar="N",
+                        help="Coordinator mode: run the worker matrix on N load-generator processes at once (-c is workers per generator), start them together and merge their latency histograms into one report.")
+    parser.add_argument("--spawn_agents", type=int, default=None,
+                        help="How many of the --coordinator load generators to start locally (default: all N); the rest connect from other hosts with --agent.")
+    parser.add_argument("--control_host", type=str, default="127.0.0.1",
+                        help="Address the coordinator's control socket binds to (default: 127.0.0.1; use 0.0.0.0 for generators on other hosts).")
+    parser.add_argument("--control_port", type=int, default=0,
+                        help="Port of the coordinator's control socket (default: 0, an ephemeral port that is printed).")
+    parser.add_argument("--agent", type=str, default=None, metavar="HOST:PORT",
+                        help="Run as a load generator controlled by the coordinator at HOST:PORT; the coordinator decides what to run.")
+    parser.add_argument("--agent_timeout", type=float, default=60.0,
+                        help="Seconds to wait for load generators to connect to the coordinator, or for a generator to reach it (default: 60).")
+    parser.add_argument("--server_pid", type=int, default=None,
+                        help="PID of the server under test (Linux). Its process tree's CPU time, RSS, threads, open fds and context switches are sampled from /proc during each configuration and reported as CPU-ms per MB/op and peak RSS per concurrent transfer.")
+    parser.add_argument("--sample_interval", type=float, default=0.5,
+                        help="Seconds between /proc samples for --server_pid (default: 0.5).")
+    parser.add_argument("--results_json", type=str, default=None,
+                        help="Write every configuration's per-operation statistics (percentiles included) to this JSON file; usable later as --baseline.")
+    parser.add_argument("--results_csv", type=str, default=None,
+                        help="Write the same statistics as CSV, one row per configuration and operation.")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="JSON file from an earlier --results_json run to compare this run against; exits with status 1 when a regression is found.")
+    parser.add_argument("--regression_threshold", type=float, default=10.0,
+                        help="Percent by which avg/p99 latency may grow or aggregate throughput may drop before --baseline flags a regression (default: 10).")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable DEBUG level logging (overrides -q)")
     parser.add_argument("-q", "--quiet", action="store_true", help="Suppress INFO and DEBUG logs")
     parser.add_argument("--log_file", type=str, default=None, help="Path to save client log output")
@@ -316,15 +1654,29 @@ def main():
         main_process_logger.critical(f"Invalid operation: {e}. Choices: {[op.value for op in OperationType]}"); sys.exit(1)
 
     
-    client_worker_configs_to_run = cli_args.client_workers_list
+    # Open-loop, workload-profile and coordinator modes replace the closed-loop worker matrix
+    client_worker_configs_to_run = [] if cli_args.open_loop_rates or cli_args.workload or cli_args.coordinator or cli_args.agent else cli_args.client_workers_list
     file_size_configs_mb_to_run = cli_args.file_sizes_mb_list
 
+    if cli_args.agent:
+        run_load_agent(cli_args, current_server_ip, current_server_port, main_log_level, main_process_logger); return
+
     print_always = lambda msg: print(msg, file=sys.stdout, flush=True)
 
     print_always("="*10 + " Starting Benchmark Suite " + "="*10)
     if main_process_logger.isEnabledFor(logging.INFO): main_process_logger.info("="*10 + " Starting Benchmark Suite " + "="*10)
 
-    SelectedExecutor = ThreadPoolExecutor if cli_args.pool_type == ExecutorType.THREAD.value else ProcessPoolExecutor
+    mode_summaries = {}; all_results = []
+    transfer_options = {"parallel_streams": max(1, cli_args.parallel_streams), "chunk_bytes": max(1, int(cli_args.chunk_size_mb * 1024 * 1024)),
+                        "resume": cli_args.resume, "retries": max(0, cli_args.transfer_retries), "dedup": cli_args.dedup, "delta": cli_args.delta_upload,
+                        "codec": cli_args.compression, "codec_level": cli_args.compression_level, "batch_size": max(1, cli_args.batch_size)}
+    if cli_args.pool_type == ExecutorType.ASYNCIO.value:
+        ignored = [f"--{name}" for name, default in ASYNC_UNSUPPORTED_OPTIONS if getattr(cli_args, name) != default]
+        if ignored: main_process_logger.warning(f"The asyncio engine only runs whole-file UPLOAD/GET/LIST/DELETE; ignoring {', '.join(ignored)}.")
+        raise_open_file_limit(2 * max(client_worker_configs_to_run or [1]) * cli_args.num_runs_per_worker_task + 256, main_process_logger)
+    if cli_args.workload: all_results.extend(run_workload_suite(cli_args, current_server_ip, current_server_port, transfer_options, main_process_logger))
+    elif cli_args.open_loop_rates: all_results.extend(run_open_loop_suite(cli_args, current_server_ip, current_server_port, operations_to_run_enums, transfer_options, main_process_logger))
+    elif cli_args.coordinator: all_results.extend(run_coordinator(cli_args, current_server_ip, current_server_port, operations_to_run_enums, transfer_options, main_process_logger))
 
     
     for file_size_mb in file_size_configs_mb_to_run:       
@@ -332,8 +1684,6 @@ def main():
             
             local_file_to_use = f"dummy_{file_size_mb}mb.bin"
             
-            server_filename_base_for_config = f"bm_p{cli_args.pool_type}_s{file_size_mb}_w{num_workers}" 
-
             if not create_dummy_file_if_not_exists(local_file_to_use, file_size_mb, main_process_logger):
                 main_process_logger.error(f"Cannot proceed: Workers={num_workers}, FileSize={file_size_mb}MB. Dummy file missing/creation failed.")
                 continue 
@@ -341,53 +1691,45 @@ def main():
             
             
             
-            total_individual_tasks_for_this_config = num_workers * cli_args.num_runs_per_worker_task
+            for connection_mode in cli_args.connection_modes:
+                total_individual_tasks_for_this_config = num_workers * cli_args.num_runs_per_worker_task
 
-            config_desc = f"Pool={cli_args.pool_type}, FileSize={file_size_mb}MB, ClientWorkers={num_workers}, OpsPerCycle={len(operations_to_run_enums)}, RunsPerWorker={cli_args.num_runs_per_worker_task} (Total Tasks={total_individual_tasks_for_this_config})"
-            
-            print_always(f"\n>>> RUNNING BENCHMARK CONFIG: {config_desc} <<<")
-            if main_process_logger.isEnabledFor(logging.INFO):
-                 main_process_logger.info(f"\n>>> BENCHMARKING CONFIGURATION: {config_desc} <<<")
+                config_desc = f"Pool={cli_args.pool_type}, FileSize={file_size_mb}MB, ClientWorkers={num_workers}, OpsPerCycle={len(operations_to_run_enums)}, RunsPerWorker={cli_args.num_runs_per_worker_task}, Connections={connection_mode}, PipelineDepth={cli_args.pipeline_depth}, RepeatOps={cli_args.repeat_ops}, Streams={cli_args.parallel_streams}, BatchSize={cli_args.batch_size} (Total Tasks={total_individual_tasks_for_this_config})"
             
+                print_always(f"\n>>> RUNNING BENCHMARK CONFIG: {config_desc} <<<")
+                if main_process_logger.isEnabledFor(logging.INFO):
+                     main_process_logger.info(f"\n>>> BENCHMARKING CONFIGURATION: {config_desc} <<<")
             
-            current_config_raw_stats_accumulator = [] 
             
-            overall_config_start_time = time.perf_counter()
-
-            with SelectedExecutor(max_workers=num_workers) as executor:
-                futures = []
-                
-                for worker_idx in range(num_workers): 
-                    for run_idx in range(cli_args.num_runs_per_worker_task): 
-                        
-                        task_id_str = f"P{cli_args.pool_type}-S{file_size_mb}-W{worker_idx+1}-R{run_idx+1}"
-                        
-                        server_file_for_this_task = f"{server_filename_base_for_config}_w{worker_idx+1}_r{run_idx+1}"
-
-                        futures.append(executor.submit(client_worker_task, 
-                                                      task_id_str,
-                                                      current_server_ip,
-                                                      current_server_port,
-                                                      main_log_level, 
-                                                      cli_args.log_file if cli_args.pool_type == ExecutorType.THREAD.value else None, 
-                                                      local_file_to_use, 
-                                                      server_file_for_this_task, 
-                                                      operations_to_run_enums))
-                
-                for future in as_completed(futures):
-                    main_process_logger.debug(f"A future completed for config: {config_desc}.")
-                    try:
-                        list_of_stat_records_from_worker = future.result() 
-                        if list_of_stat_records_from_worker:
-                            current_config_raw_stats_accumulator.extend(list_of_stat_records_from_worker)
-                    except Exception as e_task: 
-                        main_process_logger.error(f"Task (from config {config_desc}) raised an unhandled exception in future: {e_task}", exc_info=True)
-            
-            
-            analyze_and_print_stats(config_desc, current_config_raw_stats_accumulator, overall_config_start_time, main_process_logger)
+                num_trials = max(1, cli_args.trials); trial_summaries = []
+                executor = None if cli_args.pool_type == ExecutorType.ASYNCIO.value else (ThreadPoolExecutor if cli_args.pool_type == ExecutorType.THREAD.value else ProcessPoolExecutor)(max_workers=num_workers)
+                try:
+                    run_warmup(cli_args, current_server_ip, current_server_port, file_size_mb, num_workers, connection_mode, operations_to_run_enums, transfer_options,
+                               main_log_level, main_process_logger, executor)
+                    sampler = start_server_sampler(cli_args, main_process_logger)
+                    for trial_idx in range(num_trials):
+                        overall_config_start_time = time.perf_counter()
+                        current_config_raw_stats_accumulator = run_worker_matrix_config(cli_args, current_server_ip, current_server_port, file_size_mb, num_workers, connection_mode,
+                                                                                        operations_to_run_enums, transfer_options, main_log_level, main_process_logger, executor=executor)
+                        trial_desc = config_desc if num_trials == 1 else f"{config_desc} [Trial {trial_idx+1}/{num_trials}]"
+                        trial_summaries.append(analyze_and_print_stats(trial_desc, current_config_raw_stats_accumulator, overall_config_start_time, main_process_logger))
+                finally:
+                    if executor: executor.shutdown()
+
+                if num_trials == 1: summary = trial_summaries[0]
+                else:
+                    summary = combine_trial_summaries(config_desc, trial_summaries, cli_args.steady_tolerance)
+                    print_trial_summary(config_desc, summary, cli_args.steady_tolerance)
+                finish_server_sampler(sampler, summary, num_workers)
+                summary["key"] = f"P{cli_args.pool_type}-S{file_size_mb}MB-W{num_workers}-{connection_mode}"
+                all_results.append(summary)
+                mode_summaries.setdefault(f"S{file_size_mb}MB-W{num_workers}", {})[connection_mode] = summary
 
+    if len(cli_args.connection_modes) > 1: print_connection_mode_comparison(mode_summaries)
     print_always("="*10 + " Benchmark Suite Finished " + "="*10)
     if main_process_logger.isEnabledFor(logging.INFO): main_process_logger.info("="*10 + " Benchmark Suite Finished " + "="*10)
+    export_results(all_results, cli_args.results_json, cli_args.results_csv, cli_args)
+    if cli_args.baseline and compare_against_baseline(all_results, cli_args.baseline, cli_args.regression_threshold): sys.exit(1)
 
 if __name__ == '__main__':
     
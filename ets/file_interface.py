@@ -1,19 +1,150 @@
 import os
+import re
 import json
+import uuid
 import base64
+import hashlib
+import shutil
+import time
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from glob import glob
 import logging
-BASE_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'files')
+import delta_sync
+import mapped_io
+import memory_budget
+import payload_codec
+BASE_FILES_DIR = os.path.abspath(os.environ.get('ETS_FILES_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'files'))
+SESSIONS_DIR = os.path.join(BASE_FILES_DIR, '.sessions')
+BLOBS_DIR = os.path.join(BASE_FILES_DIR, '.blobs')
+REFS_DIR = os.path.join(BASE_FILES_DIR, '.refs')
+STORAGE_MODE = os.environ.get('ETS_STORAGE_MODE', 'plain').lower()
+DURABILITY_MODES = ('fast', 'safe', 'group')
+DURABILITY_MODE = os.environ.get('ETS_DURABILITY', 'fast').lower()
+GROUP_COMMIT_MS = float(os.environ.get('ETS_GROUP_COMMIT_MS', '5'))
+SHA256_PATTERN = re.compile(r'[0-9a-f]{64}')
+BATCH_WORKERS = int(os.environ.get('ETS_BATCH_WORKERS', '8'))
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+def get_batch_executor():
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+        return _batch_executor
+SESSION_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+def pwrite_all(fd, data, offset):
+    view = memoryview(data)
+    while view:
+        if hasattr(os, 'pwrite'):
+            written = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+def fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+def fsync_dir(path):
+    try:
+        fsync_path(path)
+    except OSError:
+        pass
+class StreamedReply:
+    # A reply whose data_file is encoded while it is being sent; iterating yields the serialised JSON message piece by piece
+    def __init__(self, head, encoded_chunks):
+        self.head = head
+        self.encoded_chunks = encoded_chunks
+    @property
+    def status(self):
+        return self.head.get('status')
+    def __iter__(self):
+        yield json.dumps(self.head)[:-1].encode() + b', "data_file": "'
+        yield from self.encoded_chunks
+        yield b'"}'
+def _compressed_base64(fp, codec, level):
+    with fp:
+        yield from payload_codec.base64_stream(payload_codec.compress_stream(fp, codec, level))
+class GroupCommitter:
+    def __init__(self, interval_ms=GROUP_COMMIT_MS):
+        self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self.interval = max(0.0, interval_ms) / 1000.0
+        self.pending = []
+        self.condition = threading.Condition()
+        self.stats = {"batches": 0, "files": 0, "max_batch": 0}
+        self.thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self.thread.start()
+    def commit(self, tmp_path, publish, dirs):
+        request = dict(tmp_path=tmp_path, publish=publish, dirs=dirs, done=threading.Event(), error=None)
+        with self.condition:
+            self.pending.append(request)
+            self.condition.notify()
+        request['done'].wait()
+        if request['error']:
+            raise request['error']
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+            time.sleep(self.interval)
+            with self.condition:
+                batch, self.pending = self.pending, []
+            self._commit_batch(batch)
+    def _commit_batch(self, batch):
+        synced_paths = []; dirs = set()
+        for request in batch:
+            try:
+                fsync_path(request['tmp_path'])
+                synced_paths.extend(request['publish']())
+                dirs.update(request['dirs'])
+            except Exception as e:
+                request['error'] = e
+        for path in synced_paths:
+            try:
+                fsync_path(path)
+            except OSError as e:
+                self.logger.error(f"Group commit could not fsync {path}: {e}")
+        for path in dirs:
+            fsync_dir(path)
+        self.stats["batches"] += 1; self.stats["files"] += len(batch); self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        self.logger.debug(f"Group commit flushed {len(batch)} file(s) in one batch. Totals: {self.stats}")
+        for request in batch:
+            request['done'].set()
+_group_committer = None
+_group_committer_lock = threading.Lock()
+def get_group_committer():
+    global _group_committer
+    with _group_committer_lock:
+        if _group_committer is None or not _group_committer.thread.is_alive():
+            _group_committer = GroupCommitter()
+        return _group_committer
 class FileInterface:
-    def __init__(self):
+    def __init__(self, storage_mode=None, durability=None):
         self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self.storage_mode = (storage_mode or STORAGE_MODE).lower()
+        if self.storage_mode not in ('plain', 'cas'):
+            self.logger.warning(f"Unknown storage mode '{self.storage_mode}', falling back to 'plain'.")
+            self.storage_mode = 'plain'
+        self.durability = (durability or DURABILITY_MODE).lower()
+        if self.durability not in DURABILITY_MODES:
+            self.logger.warning(f"Unknown durability mode '{self.durability}', falling back to 'fast'.")
+            self.durability = 'fast'
         if not os.path.exists(BASE_FILES_DIR):
             try:
                 os.makedirs(BASE_FILES_DIR)
                 self.logger.warning(f"Created 'files' directory at: {BASE_FILES_DIR}")
             except OSError as e:
                 self.logger.critical(f"Could not create 'files' directory at {BASE_FILES_DIR}: {e}")
-        self.logger.info(f"FileInterface initialized. Using base directory: {BASE_FILES_DIR}")
+        if self.storage_mode == 'cas':
+            os.makedirs(BLOBS_DIR, exist_ok=True)
+            os.makedirs(REFS_DIR, exist_ok=True)
+        self.logger.info(f"FileInterface initialized. Using base directory: {BASE_FILES_DIR} (storage mode: {self.storage_mode}, durability: {self.durability})")
     def _get_full_path(self, filename):
         base_path = os.path.abspath(BASE_FILES_DIR)
         target_path = os.path.abspath(os.path.join(base_path, filename))
@@ -21,6 +152,100 @@ class FileInterface:
             self.logger.warning(f"Potential directory traversal attempt blocked for filename: {filename}")
             return None
         return target_path
+    def _blob_path(self, sha256_hex):
+        return os.path.join(BLOBS_DIR, sha256_hex[:2], sha256_hex)
+    def _ref_path(self, filename):
+        return os.path.join(REFS_DIR, urllib.parse.quote(filename, safe=''))
+    def _read_ref(self, filename):
+        try:
+            with open(self._ref_path(filename)) as fp:
+                return fp.read().strip()
+        except FileNotFoundError:
+            return None
+    def _store_blob(self, tmp_path, sha256_hex):
+        blob_path = self._blob_path(sha256_hex)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        try:
+            os.link(tmp_path, blob_path)
+            self.logger.info(f"Stored new blob {sha256_hex}.")
+        except FileExistsError:
+            self.logger.info(f"Blob {sha256_hex} already stored, deduplicated.")
+        os.remove(tmp_path)
+        return blob_path
+    def _link_name(self, filename, full_path, sha256_hex):
+        blob_path = self._blob_path(sha256_hex)
+        tmp_link = os.path.join(BLOBS_DIR, f".link-{uuid.uuid4().hex}")
+        os.link(blob_path, tmp_link)
+        previous_sha256 = self._read_ref(filename)
+        os.replace(tmp_link, full_path)
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        tmp_ref = f"{self._ref_path(filename)}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_ref, 'w') as fp:
+            fp.write(sha256_hex)
+        os.replace(tmp_ref, self._ref_path(filename))
+        if previous_sha256 and previous_sha256 != sha256_hex:
+            self._release_blob(previous_sha256)
+        return self._ref_path(filename)
+    def _release_blob(self, sha256_hex):
+        blob_path = self._blob_path(sha256_hex)
+        try:
+            if os.stat(blob_path).st_nlink <= 1:
+                os.remove(blob_path)
+                self.logger.info(f"Blob {sha256_hex} has no references left, removed.")
+        except FileNotFoundError:
+            pass
+    def _publish(self, filename, full_path, tmp_path, sha256_hex):
+        if self.storage_mode != 'cas':
+            os.replace(tmp_path, full_path)
+            return []
+        self._store_blob(tmp_path, sha256_hex)
+        return [self._link_name(filename, full_path, sha256_hex)]
+    def _store_file(self, filename, full_path, tmp_path, sha256_hex=None):
+        if self.storage_mode == 'cas' and not sha256_hex:
+            sha256_hex = mapped_io.sha256_file(tmp_path)
+        if self.durability == 'fast':
+            self._publish(filename, full_path, tmp_path, sha256_hex)
+            return
+        dirs = {os.path.dirname(full_path)}
+        if self.storage_mode == 'cas':
+            dirs.update((os.path.dirname(self._blob_path(sha256_hex)), REFS_DIR))
+        if self.durability == 'group':
+            get_group_committer().commit(tmp_path, lambda: self._publish(filename, full_path, tmp_path, sha256_hex), dirs)
+            return
+        fsync_path(tmp_path)
+        for path in self._publish(filename, full_path, tmp_path, sha256_hex):
+            fsync_path(path)
+        for path in dirs:
+            fsync_dir(path)
+    def have(self, params=[]):
+        if not params or not SHA256_PATTERN.fullmatch(params[0].lower()):
+            return dict(status='ERROR', data='HAVE command requires a sha256 hex digest')
+        if self.storage_mode != 'cas':
+            return dict(status='OK', data_have=False, data_refcount=0)
+        try:
+            refcount = os.stat(self._blob_path(params[0].lower())).st_nlink - 1
+            return dict(status='OK', data_have=True, data_refcount=refcount)
+        except FileNotFoundError:
+            return dict(status='OK', data_have=False, data_refcount=0)
+    def link(self, params=[]):
+        if len(params) < 2 or not SHA256_PATTERN.fullmatch(params[1].lower()):
+            return dict(status='ERROR', data='LINK command requires filename and sha256 hex digest')
+        if self.storage_mode != 'cas':
+            return dict(status='ERROR', data='LINK requires the content-addressed storage mode')
+        filename = params[0]; sha256_hex = params[1].lower()
+        full_path = self._get_full_path(filename) if filename else None
+        if not full_path:
+            return dict(status='ERROR', data='Invalid filename for link.')
+        try:
+            self._link_name(filename, full_path, sha256_hex)
+            self.logger.info(f"File {filename} linked to existing blob {sha256_hex}.")
+            return dict(status='OK', data=f"File {filename} uploaded successfully (deduplicated).")
+        except FileNotFoundError:
+            return dict(status='ERROR', data=f'Blob {sha256_hex} not found')
+        except Exception as e:
+            self.logger.error(f"Error in link for {filename}: {e}")
+            return dict(status='ERROR', data=str(e))
     def list(self,params=[]):
         try:
             filelist = [os.path.basename(f) for f in glob(os.path.join(BASE_FILES_DIR, '*.*'))]
@@ -41,10 +266,34 @@ class FileInterface:
             full_path = self._get_full_path(filename)
             if not full_path:
                  return dict(status='ERROR', data='Invalid filename (path traversal suspected).')
+            codec = params[1].lower() if len(params) > 1 else 'none'
+            if codec not in payload_codec.CODECS:
+                return dict(status='ERROR', data=f"Unsupported codec '{codec}'. Choices: {list(payload_codec.CODECS)}")
+            level = int(params[2]) if len(params) > 2 else None
             self.logger.info(f"Attempting to get file: {full_path}")
-            with open(full_path, 'rb') as fp:
-                isifile = base64.b64encode(fp.read()).decode()
-            self.logger.info(f"File {filename} retrieved and encoded from {full_path}.")
+            fp = open(full_path, 'rb')
+            try:
+                file_size = os.fstat(fp.fileno()).st_size
+                if codec != 'none' and not payload_codec.worth_compressing(fp, file_size):
+                    self.logger.info(f"File {filename} looks incompressible, sending it uncompressed.")
+                    codec = 'none'
+                if codec != 'none':
+                    # Compressed replies are streamed: one read chunk, its compressed form and its encoding are held at a time
+                    memory_budget.reserve(2 * memory_budget.encoded_size(payload_codec.STREAM_CHUNK_SIZE))
+                    head = dict(status='OK', data_namafile=filename, data_codec=codec, data_original_size=file_size)
+                    reply = StreamedReply(head, _compressed_base64(fp, codec, level))
+                    fp = None
+                    self.logger.info(f"File {filename} streamed from {full_path} (codec {codec}).")
+                    return reply
+                memory_budget.reserve((file_size if file_size < mapped_io.MMAP_THRESHOLD else 0) + 2 * memory_budget.encoded_size(file_size))
+                with mapped_io.read_view(fp) as view:
+                    isifile = base64.b64encode(view).decode()
+            finally:
+                if fp:
+                    fp.close()
+            self.logger.info(f"File {filename} retrieved and encoded from {full_path} (codec {codec}).")
+            if len(params) > 1:
+                return dict(status='OK',data_namafile=filename,data_codec=codec,data_original_size=file_size,data_file=isifile)
             return dict(status='OK',data_namafile=filename,data_file=isifile)
         except FileNotFoundError:
             self.logger.error(f"File not found: {filename} (expected at {full_path if 'full_path' in locals() else 'N/A'})")
@@ -55,6 +304,40 @@ class FileInterface:
         except Exception as e:
             self.logger.error(f"Error in get for {filename}: {e}")
             return dict(status='ERROR',data=str(e))
+    def _file_version(self, stat_result):
+        return f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+    def getrange(self, params=[]):
+        if len(params) < 3:
+            self.logger.warning("Getrange request with insufficient parameters.")
+            return dict(status='ERROR', data='GETRANGE command requires filename, offset and length')
+        filename = params[0]
+        try:
+            offset = int(params[1]); length = int(params[2])
+        except ValueError:
+            return dict(status='ERROR', data='GETRANGE offset and length must be integers')
+        if offset < 0 or length < 0:
+            return dict(status='ERROR', data='GETRANGE offset and length cannot be negative')
+        full_path = self._get_full_path(filename) if filename else None
+        if not full_path:
+            return dict(status='ERROR', data='Invalid filename for getrange.')
+        try:
+            with open(full_path, 'rb') as fp:
+                stat_result = os.fstat(fp.fileno())
+                segment_length = max(0, min(length, stat_result.st_size - offset))
+                memory_budget.reserve((segment_length if segment_length < mapped_io.MMAP_THRESHOLD else 0) + 2 * memory_budget.encoded_size(segment_length))
+                with mapped_io.read_view(fp, offset, length) as segment:
+                    segment_length = len(segment); segment_sha256 = hashlib.sha256(segment).hexdigest()
+                    segment_base64 = base64.b64encode(segment).decode()
+            self.logger.info(f"Range {offset}+{segment_length} of {filename} (total {stat_result.st_size}) read from {full_path}.")
+            return dict(status='OK', data_namafile=filename, data_offset=offset, data_length=segment_length,
+                        data_total_size=stat_result.st_size, data_version=self._file_version(stat_result),
+                        data_sha256=segment_sha256, data_file=segment_base64)
+        except FileNotFoundError:
+            self.logger.error(f"File not found for getrange: {filename}")
+            return dict(status='ERROR', data=f'File {filename} not found')
+        except Exception as e:
+            self.logger.error(f"Error in getrange for {filename}: {e}")
+            return dict(status='ERROR', data=str(e))
     def upload(self, params=[]):
         if len(params) < 2:
             self.logger.warning("Upload request with insufficient parameters.")
@@ -69,9 +352,27 @@ class FileInterface:
             return dict(status='ERROR', data='Invalid filename for upload (path traversal suspected).')
         try:
             self.logger.info(f"Attempting to upload file to: {full_path}")
-            file_content_bytes = base64.b64decode(file_content_base64)
-            with open(full_path, 'wb') as fp:
-                fp.write(file_content_bytes)
+            codec = params[2].lower() if len(params) > 2 else 'none'
+            if codec not in payload_codec.CODECS:
+                return dict(status='ERROR', data=f"Unsupported codec '{codec}'. Choices: {list(payload_codec.CODECS)}")
+            # The payload is decoded (and decompressed) slice by slice straight into the temporary file
+            memory_budget.reserve(2 * payload_codec.STREAM_CHUNK_SIZE)
+            tmp_path = os.path.join(BLOBS_DIR if self.storage_mode == 'cas' else BASE_FILES_DIR, f".upload-{uuid.uuid4().hex}")
+            sha256 = hashlib.sha256() if self.storage_mode == 'cas' else None
+            try:
+                with open(tmp_path, 'wb') as fp:
+                    def write(block):
+                        fp.write(block)
+                        if sha256:
+                            sha256.update(block)
+                    received, written = payload_codec.decode_base64_to(file_content_base64, codec, write)
+                self._store_file(filename, full_path, tmp_path, sha256.hexdigest() if sha256 else None)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            if codec != 'none':
+                self.logger.info(f"File {filename} uploaded ({received} bytes {codec} -> {written} bytes) to {full_path}.")
+                return dict(status='OK', data=f"File {filename} uploaded successfully.", data_codec=codec, data_original_size=written)
             self.logger.info(f"File {filename} uploaded successfully to {full_path}.")
             return dict(status='OK', data=f"File {filename} uploaded successfully.")
         except base64.binascii.Error:
@@ -80,6 +381,263 @@ class FileInterface:
         except Exception as e:
             self.logger.error(f"Error in upload for {filename} to {full_path}: {e}")
             return dict(status='ERROR', data=str(e))
+    def signature(self, params=[]):
+        if not params or not params[0]:
+            return dict(status='ERROR', data='SIGNATURE command requires filename')
+        filename = params[0]
+        full_path = self._get_full_path(filename)
+        if not full_path:
+            return dict(status='ERROR', data='Invalid filename for signature.')
+        try:
+            with open(full_path, 'rb') as fp:
+                stat_result = os.fstat(fp.fileno())
+                block_size = int(params[1]) if len(params) > 1 else delta_sync.default_block_size(stat_result.st_size)
+                if block_size <= 0:
+                    return dict(status='ERROR', data='SIGNATURE block_size must be positive')
+                signatures = delta_sync.block_signatures(fp, block_size)
+            self.logger.info(f"Computed {len(signatures)} block signatures for {filename} (block size {block_size}).")
+            return dict(status='OK', data_namafile=filename, data_block_size=block_size, data_total_size=stat_result.st_size,
+                        data_version=self._file_version(stat_result), data_signatures=signatures)
+        except FileNotFoundError:
+            return dict(status='ERROR', data=f'File {filename} not found')
+        except ValueError:
+            return dict(status='ERROR', data='SIGNATURE block_size must be an integer')
+        except Exception as e:
+            self.logger.error(f"Error in signature for {filename}: {e}")
+            return dict(status='ERROR', data=str(e))
+    def delta_apply(self, params=[]):
+        if len(params) < 5:
+            return dict(status='ERROR', data='DELTA_APPLY command requires filename, base_version, block_size, sha256 and delta_base64')
+        filename, base_version, block_size, expected_sha256, delta_base64 = params[:5]
+        full_path = self._get_full_path(filename) if filename else None
+        if not full_path:
+            return dict(status='ERROR', data='Invalid filename for delta_apply.')
+        tmp_path = os.path.join(BASE_FILES_DIR, f".delta-{uuid.uuid4().hex}")
+        try:
+            memory_budget.reserve(len(delta_base64) * 3 // 4)
+            delta = base64.b64decode(delta_base64)
+            digest = hashlib.sha256()
+            with open(full_path, 'rb') as base_fp:
+                current_version = self._file_version(os.fstat(base_fp.fileno()))
+                if current_version != base_version:
+                    return dict(status='ERROR', data=f'Base version mismatch: server has {current_version}')
+                with open(tmp_path, 'wb') as out_fp:
+                    def write_block(block):
+                        digest.update(block)
+                        out_fp.write(block)
+                    written = delta_sync.apply_delta(base_fp, delta, int(block_size), write_block)
+            if digest.hexdigest() != expected_sha256.lower():
+                os.remove(tmp_path)
+                return dict(status='ERROR', data='Checksum mismatch for rebuilt file')
+            self._store_file(filename, full_path, tmp_path, digest.hexdigest())
+            self.logger.info(f"File {filename} rebuilt from a {len(delta)} byte delta ({written} bytes).")
+            return dict(status='OK', data=f"File {filename} uploaded successfully (delta, {len(delta)} bytes).", data_total_size=written)
+        except FileNotFoundError:
+            return dict(status='ERROR', data=f'File {filename} not found')
+        except (ValueError, base64.binascii.Error) as e:
+            return dict(status='ERROR', data=f'Invalid delta: {e}')
+        except Exception as e:
+            self.logger.error(f"Error in delta_apply for {filename}: {e}")
+            return dict(status='ERROR', data=str(e))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    def _session_dir(self, session_id):
+        if not session_id or not SESSION_ID_PATTERN.fullmatch(session_id):
+            return None
+        return os.path.join(SESSIONS_DIR, session_id)
+    def _load_session(self, session_id):
+        session_dir = self._session_dir(session_id)
+        if not session_dir:
+            raise ValueError('Invalid upload session id.')
+        try:
+            with open(os.path.join(session_dir, 'meta.json')) as fp:
+                return session_dir, json.load(fp)
+        except FileNotFoundError:
+            raise ValueError(f'Upload session {session_id} not found.')
+    def _session_chunks(self, session_dir):
+        chunks = []
+        for marker in os.listdir(os.path.join(session_dir, 'chunks')):
+            offset, length, sha256 = marker.split('_')
+            chunks.append((int(offset), int(length), sha256))
+        return sorted(chunks)
+    def upload_begin(self, params=[]):
+        if len(params) < 2:
+            self.logger.warning("Upload_begin request with insufficient parameters.")
+            return dict(status='ERROR', data='UPLOAD_BEGIN command requires filename and total_size')
+        filename = params[0]
+        full_path = self._get_full_path(filename) if filename else None
+        if not full_path:
+            return dict(status='ERROR', data='Invalid filename for upload session.')
+        try:
+            total_size = int(params[1])
+            if total_size < 0:
+                raise ValueError
+        except ValueError:
+            return dict(status='ERROR', data='UPLOAD_BEGIN total_size must be a non-negative integer')
+        session_id = uuid.uuid4().hex
+        session_dir = os.path.join(SESSIONS_DIR, session_id)
+        try:
+            os.makedirs(os.path.join(session_dir, 'chunks'))
+            with open(os.path.join(session_dir, 'data.part'), 'wb') as fp:
+                fp.truncate(total_size)
+            with open(os.path.join(session_dir, 'meta.json'), 'w') as fp:
+                json.dump(dict(filename=filename, total_size=total_size), fp)
+            self.logger.info(f"Upload session {session_id} started for {filename} ({total_size} bytes).")
+            return dict(status='OK', data_session=session_id, data_namafile=filename, data_total_size=total_size)
+        except Exception as e:
+            self.logger.error(f"Error in upload_begin for {filename}: {e}")
+            shutil.rmtree(session_dir, ignore_errors=True)
+            return dict(status='ERROR', data=str(e))
+    def upload_chunk(self, params=[]):
+        if len(params) < 4:
+            self.logger.warning("Upload_chunk request with insufficient parameters.")
+            return dict(status='ERROR', data='UPLOAD_CHUNK command requires session_id, offset, sha256 and content_base64')
+        session_id, offset, expected_sha256, content_base64 = params[:4]
+        try:
+            session_dir, meta = self._load_session(session_id)
+            offset = int(offset)
+            memory_budget.reserve(len(content_base64) * 3 // 4)
+            chunk = base64.b64decode(content_base64)
+            if offset < 0 or offset + len(chunk) > meta['total_size']:
+                return dict(status='ERROR', data=f'Chunk {offset}+{len(chunk)} outside declared size {meta["total_size"]}')
+            actual_sha256 = hashlib.sha256(chunk).hexdigest()
+            if actual_sha256 != expected_sha256.lower():
+                self.logger.warning(f"Checksum mismatch for chunk {offset} of session {session_id}.")
+                return dict(status='ERROR', data=f'Checksum mismatch for chunk at offset {offset}')
+            fd = os.open(os.path.join(session_dir, 'data.part'), os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+            try:
+                pwrite_all(fd, chunk, offset)
+            finally:
+                os.close(fd)
+            open(os.path.join(session_dir, 'chunks', f"{offset}_{len(chunk)}_{actual_sha256}"), 'w').close()
+            self.logger.info(f"Chunk {offset}+{len(chunk)} stored for session {session_id}.")
+            return dict(status='OK', data_session=session_id, data_offset=offset, data_length=len(chunk))
+        except ValueError as e:
+            return dict(status='ERROR', data=str(e))
+        except base64.binascii.Error:
+            return dict(status='ERROR', data='Invalid base64 content.')
+        except Exception as e:
+            self.logger.error(f"Error in upload_chunk for session {session_id}: {e}")
+            return dict(status='ERROR', data=str(e))
+    def upload_status(self, params=[]):
+        if not params:
+            return dict(status='ERROR', data='UPLOAD_STATUS command requires session_id')
+        try:
+            session_dir, meta = self._load_session(params[0])
+            chunks = self._session_chunks(session_dir)
+            self.logger.info(f"Upload session {params[0]} has {len(chunks)} verified chunks.")
+            return dict(status='OK', data_session=params[0], data_namafile=meta['filename'], data_total_size=meta['total_size'],
+                        data_received_bytes=sum(length for _, length, _ in chunks), data_chunks=[list(chunk) for chunk in chunks])
+        except ValueError as e:
+            return dict(status='ERROR', data=str(e))
+        except Exception as e:
+            self.logger.error(f"Error in upload_status for session {params[0]}: {e}")
+            return dict(status='ERROR', data=str(e))
+    def upload_commit(self, params=[]):
+        if not params:
+            return dict(status='ERROR', data='UPLOAD_COMMIT command requires session_id')
+        session_id = params[0]
+        expected_sha256 = params[1].lower() if len(params) > 1 else None
+        try:
+            session_dir, meta = self._load_session(session_id)
+            covered = 0
+            for offset, length, _ in self._session_chunks(session_dir):
+                if offset > covered:
+                    break
+                covered = max(covered, offset + length)
+            if covered < meta['total_size']:
+                return dict(status='ERROR', data=f'Upload incomplete: contiguous bytes received {covered} of {meta["total_size"]}')
+            part_path = os.path.join(session_dir, 'data.part')
+            assembled_sha256 = None
+            if expected_sha256 or self.storage_mode == 'cas':
+                assembled_sha256 = mapped_io.sha256_file(part_path)
+                if expected_sha256 and assembled_sha256 != expected_sha256:
+                    return dict(status='ERROR', data='Checksum mismatch for assembled file')
+            full_path = self._get_full_path(meta['filename'])
+            self._store_file(meta['filename'], full_path, part_path, assembled_sha256)
+            shutil.rmtree(session_dir, ignore_errors=True)
+            self.logger.info(f"Upload session {session_id} committed to {full_path}.")
+            return dict(status='OK', data=f"File {meta['filename']} uploaded successfully.")
+        except ValueError as e:
+            return dict(status='ERROR', data=str(e))
+        except Exception as e:
+            self.logger.error(f"Error in upload_commit for session {session_id}: {e}")
+            return dict(status='ERROR', data=str(e))
+    def upload_abort(self, params=[]):
+        session_dir = self._session_dir(params[0]) if params else None
+        if not session_dir or not os.path.isdir(session_dir):
+            return dict(status='ERROR', data='Unknown upload session.')
+        shutil.rmtree(session_dir, ignore_errors=True)
+        return dict(status='OK', data=f'Upload session {params[0]} aborted.')
+    def stat(self, params=[]):
+        if not params or not params[0]:
+            return dict(status='ERROR', data='STAT command requires filename')
+        filename = params[0]
+        full_path = self._get_full_path(filename)
+        if not full_path:
+            return dict(status='ERROR', data='Invalid filename for stat.')
+        try:
+            stat_result = os.stat(full_path)
+            return dict(status='OK', data_namafile=filename, data_size=stat_result.st_size,
+                        data_version=self._file_version(stat_result), data_mtime=stat_result.st_mtime)
+        except FileNotFoundError:
+            return dict(status='ERROR', data_namafile=filename, data=f'File {filename} not found')
+        except Exception as e:
+            self.logger.error(f"Error in stat for {filename}: {e}")
+            return dict(status='ERROR', data_namafile=filename, data=str(e))
+    def _run_batch(self, command, handler, items):
+        executor = get_batch_executor()
+        items = iter(enumerate(items))
+        pending = {}
+        succeeded = failed = 0
+        # Items run on pool threads but belong to the caller's command, so they count its reservations as their own
+        outer = memory_budget.current_scope()
+        def submit_next():
+            for index, item in items:
+                pending[executor.submit(memory_budget.run_in_scope, handler, item, outer=outer)] = index
+                return True
+            return False
+        for _ in range(BATCH_WORKERS * 2):
+            if not submit_next():
+                break
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    scope = None
+                    try:
+                        result, scope = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Item {index} of {command} raised: {e}")
+                        result = dict(status='ERROR', data=str(e))
+                    if result.get('status') == 'OK':
+                        succeeded += 1
+                    else:
+                        failed += 1
+                    try:
+                        yield dict(result, item=index)
+                    finally:
+                        if scope:
+                            scope.release()
+                    submit_next()
+        finally:
+            for future in pending:
+                future.add_done_callback(lambda f: f.exception() is None and f.result()[1].release())
+        self.logger.info(f"Batch {command} finished: {succeeded} OK, {failed} failed.")
+        yield dict(status='OK', batch_end=True, data=dict(command=command, count=succeeded + failed, succeeded=succeeded, failed=failed))
+    def mget(self, params=[]):
+        yield from self._run_batch('MGET', lambda filename: self.get([filename]), params)
+    def mstat(self, params=[]):
+        yield from self._run_batch('MSTAT', lambda filename: self.stat([filename]), params)
+    def mdelete(self, params=[]):
+        yield from self._run_batch('MDELETE', lambda filename: dict(self.delete([filename]), data_namafile=filename), params)
+    def mupload(self, params=[]):
+        if len(params) % 2:
+            yield dict(status='ERROR', batch_end=True, data='MUPLOAD command requires filename and content_base64 pairs')
+            return
+        yield from self._run_batch('MUPLOAD', lambda pair: dict(self.upload(list(pair)), data_namafile=pair[0]), zip(params[0::2], params[1::2]))
     def delete(self, params=[]):
         if not params:
             self.logger.warning("Delete request with no filename parameter.")
@@ -94,6 +652,11 @@ class FileInterface:
                 return dict(status='ERROR', data='Invalid filename for delete (path traversal suspected).')
             self.logger.info(f"Attempting to delete file: {full_path}")
             os.remove(full_path)
+            if self.storage_mode == 'cas':
+                sha256_hex = self._read_ref(filename)
+                if sha256_hex:
+                    os.remove(self._ref_path(filename))
+                    self._release_blob(sha256_hex)
             self.logger.info(f"File {filename} deleted successfully from {full_path}.")
             return dict(status='OK', data=f"File {filename} deleted successfully.")
         except FileNotFoundError:
@@ -1,27 +1,30 @@
 import json
+import inspect
 import logging
-from file_interface import FileInterface
+from file_interface import FileInterface, StreamedReply
+class Reply(str):
+    # Balasan JSON yang membawa status-nya, supaya server tidak perlu mem-parse ulang JSON yang baru diserialisasi
+    def __new__(cls, hasil):
+        reply = str.__new__(cls, json.dumps(hasil))
+        reply.status = hasil.get('status')
+        return reply
 class FileProtocol:
     def __init__(self):
         self.file = FileInterface()
-    def proses_string(self, string_datamasuk=''):
+    def proses_string(self, string_datamasuk='', stream=False):
         logging.info(f"Proses string dimulai untuk: {string_datamasuk[:100]}{'...' if len(string_datamasuk) > 100 else ''}")
         if not string_datamasuk.strip():
             logging.warning("String kosong diterima.")
-            return json.dumps(dict(status='ERROR', data='Perintah kosong diterima'))
+            return Reply(dict(status='ERROR', data='Perintah kosong diterima'))
         try:
-            parts = string_datamasuk.split(None, 2)
+            parts = string_datamasuk.split()
             if not parts:
                 logging.warning("Gagal mem-parse string (split menghasilkan list kosong).")
-                return json.dumps(dict(status='ERROR', data='Gagal mem-parse perintah'))
+                return Reply(dict(status='ERROR', data='Gagal mem-parse perintah'))
             c_request_original = parts[0]
             c_request = c_request_original.lower().strip()
             logging.info(f"Request yang diproses (setelah lower()): {c_request}")
-            params = []
-            if len(parts) > 1:
-                params.append(parts[1])
-            if len(parts) > 2:
-                params.append(parts[2])
+            params = parts[1:]
             if params:
                 param_log_snippet = str(params[0])[:50] + ('...' if len(str(params[0])) > 50 else '')
                 logging.info(f"Parameter untuk '{c_request}': [{param_log_snippet}{', ...' if len(params) > 1 else ''}]")
@@ -29,16 +32,37 @@ class FileProtocol:
                 logging.info(f"Tidak ada parameter untuk '{c_request}'")
             if hasattr(self.file, c_request):
                 cl = getattr(self.file, c_request)(params)
-                return json.dumps(cl)
+                if inspect.isgenerator(cl):
+                    items = list(cl)
+                    summary = items[-1] if items else dict(status='ERROR', data='Batch kosong')
+                    return Reply(dict(status=summary.get('status', 'ERROR'), data=summary.get('data'), data_items=items[:-1]))
+                if isinstance(cl, StreamedReply):
+                    # Balasan yang dialirkan hanya digabung bila pemanggil tidak bisa mengirimnya bertahap
+                    return cl if stream else b''.join(cl).decode()
+                return Reply(cl)
             else:
                 logging.warning(f"Request tidak dikenali: {c_request_original} (diproses sebagai {c_request})")
-                return json.dumps(dict(status='ERROR', data=f"Request '{c_request_original}' tidak dikenali"))
+                return Reply(dict(status='ERROR', data=f"Request '{c_request_original}' tidak dikenali"))
         except IndexError:
             logging.error(f"IndexError saat memproses string: '{string_datamasuk}'. Kemungkinan format perintah salah atau parameter kurang.", exc_info=True)
-            return json.dumps(dict(status='ERROR', data='Format perintah salah atau parameter kurang'))
+            return Reply(dict(status='ERROR', data='Format perintah salah atau parameter kurang'))
         except Exception as e:
             logging.error(f"Exception umum saat memproses string '{string_datamasuk[:60]}...': {e}", exc_info=True)
-            return json.dumps(dict(status='ERROR', data=f'Terjadi kesalahan internal: {str(e)}'))
+            return Reply(dict(status='ERROR', data=f'Terjadi kesalahan internal: {str(e)}'))
+    def proses_string_iter(self, string_datamasuk=''):
+        head = string_datamasuk.lstrip()[:64].split(None, 1)
+        c_request = head[0].lower() if head else ''
+        handler = getattr(self.file, c_request, None) if c_request and not c_request.startswith('_') else None
+        if not inspect.isgeneratorfunction(handler):
+            yield self.proses_string(string_datamasuk, stream=True)
+            return
+        logging.info(f"Batch request '{c_request}' dimulai, hasil per item dikirim bertahap.")
+        try:
+            for item in handler(string_datamasuk.split()[1:]):
+                yield Reply(item)
+        except Exception as e:
+            logging.error(f"Exception saat memproses batch '{c_request}': {e}", exc_info=True)
+            yield Reply(dict(status='ERROR', batch_end=True, data=f'Terjadi kesalahan internal: {str(e)}'))
 if __name__=='__main__':
     logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
     fp = FileProtocol()
@@ -53,4 +77,6 @@ if __name__=='__main__':
     print(f"Input: 'UNKNOWNCOMMAND param1 param2', Output: {fp.proses_string('UNKNOWNCOMMAND param1 param2')}")
     print(f"Input: ' ', Output: {fp.proses_string(' ')}")
     print(f"Input: '', Output: {fp.proses_string('')}")
-    print(f"Input: 'GET', Output: {fp.proses_string('GET')}")
\ No newline at end of file
+    print(f"Input: 'GET', Output: {fp.proses_string('GET')}")
+    print(f"Input: 'GETRANGE newFile.txt 5 4', Output: {fp.proses_string('GETRANGE newFile.txt 5 4')}")
+    print(f"Input: 'MSTAT newFile.txt another.TXT missing.txt', Output: {list(fp.proses_string_iter('MSTAT newFile.txt another.TXT missing.txt'))}")
\ No newline at end of file
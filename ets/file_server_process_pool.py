@@ -6,6 +6,8 @@ import time
 import sys
 import os
 import json
+import memory_budget
+import traffic_trace
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import multiprocessing
 if sys.platform != "win32":
@@ -18,7 +20,8 @@ server_worker_stats_main = {
     "failed_tasks": 0,
 }
 main_stats_lock = threading.Lock()
-from file_protocol import FileProtocol
+from file_protocol import FileProtocol, Reply
+from file_interface import StreamedReply
 def process_client_connection(connection_socket, client_address):
     worker_log_format = '%(asctime)s - %(levelname)s - %(processName)s (%(process)d) - %(threadName)s - WORKER - %(module)s - %(funcName)s - %(lineno)d - %(message)s'
     logging.basicConfig(level=logging.DEBUG, format=worker_log_format, force=True if sys.version_info >= (3,8) else False)
@@ -28,11 +31,15 @@ def process_client_connection(connection_socket, client_address):
     logger.info(f"Worker process {process_id} processing connection from {client_address}")
     command_buffer = ""
     connection_successful = True
+    recv_scope = memory_budget.TransferScope(memory_budget.get_budget())
+    trace = traffic_trace.connection_trace()
     try:
         while True:
             buffer_size = 1048576
             data = connection_socket.recv(buffer_size)
             if data:
+                trace.received()
+                recv_scope.reserve(len(data))
                 try:
                     decoded_chunk = data.decode()
                 except UnicodeDecodeError as ude:
@@ -42,28 +49,37 @@ def process_client_connection(connection_socket, client_address):
                     break
                 logger.debug(f"Worker {process_id} received chunk from {client_address}: {decoded_chunk[:60]}{'...' if len(decoded_chunk)>60 else ''} (length: {len(data)})")
                 command_buffer += decoded_chunk
-                if "\r\n\r\n" in command_buffer:
+                while "\r\n\r\n" in command_buffer:
                     complete_command, _, rest_of_buffer = command_buffer.partition("\r\n\r\n")
                     command_buffer = rest_of_buffer
                     logger.info(f"Worker {process_id} processing command from {client_address}: {complete_command[:100]}{'...' if len(complete_command)>100 else ''}")
-                    hasil_json_str = fp_worker.proses_string(complete_command.strip())
-                    logger.debug(f"Worker {process_id}: fp_worker.proses_string returned for {client_address}: {hasil_json_str[:100]}{'...' if len(hasil_json_str)>100 else ''}")
-                    if hasil_json_str is None:
-                        logger.error(f"Worker {process_id}: fp_worker.proses_string returned None. Sending generic error.")
-                        hasil_json_str = json.dumps({"status": "ERROR", "data": "Internal server processing error (protocol returned None)"})
-                        try:
-                            if json.loads(hasil_json_str).get("status") == "ERROR": connection_successful = False
-                        except: connection_successful = False
-                    try:
-                        response_dict = json.loads(hasil_json_str)
-                        if response_dict.get("status") == "ERROR":
-                            connection_successful = False
-                    except json.JSONDecodeError:
-                        connection_successful = False
-                    response_to_send = hasil_json_str + "\r\n\r\n"
-                    logger.debug(f"Worker {process_id}: Sending response to {client_address}: {response_to_send[:100]}{'...' if len(response_to_send)>100 else ''}")
-                    connection_socket.sendall(response_to_send.encode())
-                    logger.debug(f"Worker {process_id}: Response sent to {client_address}")
+                    trace.begin(complete_command, bool(command_buffer))
+                    with memory_budget.transfer_scope(recv_scope):
+                        for hasil_json_str in fp_worker.proses_string_iter(complete_command.strip()):
+                            if isinstance(hasil_json_str, StreamedReply):
+                                # data_file is encoded chunk by chunk while it is sent, so the reply is never held whole
+                                sent = 0
+                                for piece in hasil_json_str:
+                                    connection_socket.sendall(piece)
+                                    sent += len(piece)
+                                connection_socket.sendall(b"\r\n\r\n")
+                                logger.debug(f"Worker {process_id}: Streamed {sent} byte response to {client_address}")
+                                trace.reply(json.dumps(hasil_json_str.head), hasil_json_str.status, sent)
+                                continue
+                            logger.debug(f"Worker {process_id}: fp_worker.proses_string returned for {client_address}: {hasil_json_str[:100]}{'...' if len(hasil_json_str)>100 else ''}")
+                            if hasil_json_str is None:
+                                logger.error(f"Worker {process_id}: fp_worker.proses_string returned None. Sending generic error.")
+                                hasil_json_str = Reply({"status": "ERROR", "data": "Internal server processing error (protocol returned None)"})
+                            # The protocol hands the status over with the reply, so the JSON is not parsed back here
+                            if hasil_json_str.status == "ERROR":
+                                connection_successful = False
+                            response_to_send = hasil_json_str + "\r\n\r\n"
+                            logger.debug(f"Worker {process_id}: Sending response to {client_address}: {response_to_send[:100]}{'...' if len(response_to_send)>100 else ''}")
+                            connection_socket.sendall(response_to_send.encode())
+                            logger.debug(f"Worker {process_id}: Response sent to {client_address}")
+                            trace.reply(hasil_json_str, hasil_json_str.status)
+                    trace.end()
+                    recv_scope.release(len(complete_command) + 4)
             else:
                 logger.info(f"Worker {process_id}: Client {client_address} disconnected (recv returned no data).")
                 break
@@ -73,11 +89,18 @@ def process_client_connection(connection_socket, client_address):
     except BrokenPipeError:
         logger.warning(f"Worker {process_id}: Broken pipe with client {client_address}.")
         connection_successful = False
+    except memory_budget.MemoryBudgetExceeded as e:
+        logger.warning(f"Worker {process_id}: Rejecting client {client_address}: {e}")
+        handle_error_response_worker(connection_socket, client_address, str(e), logger)
+        connection_successful = False
     except Exception as e:
         logger.error(f"Worker {process_id}: Generic error processing client {client_address}: {e}", exc_info=True)
         handle_error_response_worker(connection_socket, client_address, f"Server error: {str(e)}", logger)
         connection_successful = False
     finally:
+        recv_scope.release()
+        if memory_budget.get_budget().enabled:
+            logger.info(f"Worker {process_id}: Memory budget after {client_address}: {memory_budget.get_budget().snapshot()}")
         logger.info(f"Worker {process_id}: Closing connection with {client_address}. Final success state: {connection_successful}")
         try:
             connection_socket.close()
@@ -98,7 +121,9 @@ class Server(threading.Thread):
         self.ipinfo = (ipaddress, port)
         self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.process_pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.memory_budget = memory_budget.new_shared_budget()
+        memory_budget.install(self.memory_budget)
+        self.process_pool = ProcessPoolExecutor(max_workers=max_workers, initializer=memory_budget.install, initargs=(self.memory_budget,))
         threading.Thread.__init__(self)
         self.main_logger.debug(f"Server class initialized for {self.ipinfo} with {max_workers} max worker processes.")
         self.running = True
@@ -159,6 +184,9 @@ class Server(threading.Thread):
             self.main_logger.info(f"Total Tasks Processed (results retrieved): {server_worker_stats_main['processed_tasks']}")
             self.main_logger.info(f"  Successful Tasks: {server_worker_stats_main['successful_tasks']}")
             self.main_logger.info(f"  Failed Tasks: {server_worker_stats_main['failed_tasks']}")
+        budget_stats = self.memory_budget.snapshot()
+        if budget_stats['limit']:
+            self.main_logger.info(f"Memory Budget (shared by all workers): limit {budget_stats['limit']} bytes, current {budget_stats['current']}, peak {budget_stats['peak']}, waits {budget_stats['waits']}, rejected {budget_stats['rejected']}")
         self.main_logger.info("=" * 88)
     def stop_server(self):
         self.main_logger.info("Stop server called in main process.")
@@ -180,9 +208,10 @@ class Server(threading.Thread):
 def main():
     main_script_logger = logging.getLogger(__name__)
     main_script_logger.info("Executing main() function to start server (Process Pool Version).")
-    num_workers = 50
+    num_workers = int(os.environ.get('ETS_SERVER_WORKERS', '50'))
+    port = int(os.environ.get('ETS_SERVER_PORT', '6677'))
     main_script_logger.info(f"Setting num_workers to {num_workers} (CPU cores: {os.cpu_count()}).")
-    svr = Server(ipaddress='0.0.0.0', port=6677, max_workers=num_workers)
+    svr = Server(ipaddress='0.0.0.0', port=port, max_workers=num_workers)
     svr.start()
     main_script_logger.info(f"Server thread started with a process pool of {num_workers} workers.")
     try:
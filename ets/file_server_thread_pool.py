@@ -4,12 +4,16 @@ import threading
 import logging
 import time
 import sys
+import os
 import json
+import memory_budget
+import traffic_trace
 from concurrent.futures import ThreadPoolExecutor
 log_format = '%(asctime)s - %(levelname)s - %(threadName)s - SERVER - %(module)s - %(funcName)s - %(lineno)d - %(message)s'
 logging.basicConfig(level=logging.DEBUG, format=log_format, force=True if sys.version_info >= (3, 8) else False)
 logging.debug("--- Top-level logging configured (Thread Pool Version) ---")
-from file_protocol import FileProtocol
+from file_protocol import FileProtocol, Reply
+from file_interface import StreamedReply
 fp = FileProtocol()
 server_worker_stats = {
     "processed_connections": 0,
@@ -29,11 +33,15 @@ def process_client_connection(connection, address):
     logger.info(f"Worker thread {threading.get_ident()} processing connection from {address}")
     command_buffer = ""
     connection_successful = True
+    recv_scope = memory_budget.TransferScope(memory_budget.get_budget())
+    trace = traffic_trace.connection_trace()
     try:
         while True:
             buffer_size = 1048576
             data = connection.recv(buffer_size)
             if data:
+                trace.received()
+                recv_scope.reserve(len(data))
                 try:
                     decoded_chunk = data.decode()
                 except UnicodeDecodeError as ude:
@@ -43,33 +51,38 @@ def process_client_connection(connection, address):
                     break
                 logger.debug(f"Received chunk from {address} by thread {threading.get_ident()}: {decoded_chunk[:60]}{'...' if len(decoded_chunk)>60 else ''} (length: {len(data)})")
                 command_buffer += decoded_chunk
-                if "\r\n\r\n" in command_buffer:
+                while "\r\n\r\n" in command_buffer:
                     complete_command, _, rest_of_buffer = command_buffer.partition("\r\n\r\n")
                     command_buffer = rest_of_buffer
                     logger.info(f"Processing complete command from {address} by thread {threading.get_ident()}: {complete_command[:100]}{'...' if len(complete_command)>100 else ''}")
-                    hasil_json_str = fp.proses_string(complete_command.strip())
-                    logger.debug(f"fp.proses_string returned for {address}: {hasil_json_str[:100]}{'...' if len(hasil_json_str)>100 else ''}")
-                    if hasil_json_str is None:
-                        logger.error(f"fp.proses_string returned None for command: {complete_command[:60]} from {address}. Sending generic error.")
-                        hasil_json_str = json.dumps({"status": "ERROR", "data": "Internal server processing error (protocol returned None)"})
-                        try:
-                            response_dict = json.loads(hasil_json_str)
-                            if response_dict.get("status") == "ERROR":
+                    trace.begin(complete_command, bool(command_buffer))
+                    with memory_budget.transfer_scope(recv_scope):
+                        for hasil_json_str in fp.proses_string_iter(complete_command.strip()):
+                            if isinstance(hasil_json_str, StreamedReply):
+                                # data_file is encoded chunk by chunk while it is sent, so the reply is never held whole
+                                sent = 0
+                                for piece in hasil_json_str:
+                                    connection.sendall(piece)
+                                    sent += len(piece)
+                                connection.sendall(b"\r\n\r\n")
+                                logger.debug(f"Streamed {sent} byte response to {address}")
+                                trace.reply(json.dumps(hasil_json_str.head), hasil_json_str.status, sent)
+                                continue
+                            logger.debug(f"fp.proses_string returned for {address}: {hasil_json_str[:100]}{'...' if len(hasil_json_str)>100 else ''}")
+                            if hasil_json_str is None:
+                                logger.error(f"fp.proses_string returned None for command: {complete_command[:60]} from {address}. Sending generic error.")
+                                hasil_json_str = Reply({"status": "ERROR", "data": "Internal server processing error (protocol returned None)"})
+                            # The protocol hands the status over with the reply, so the JSON is not parsed back here
+                            if hasil_json_str.status == "ERROR":
+                                logger.warning(f"Command processing for {address} resulted in ERROR: {hasil_json_str[:200]}")
                                 connection_successful = False
-                        except json.JSONDecodeError:
-                            connection_successful = False
-                    try:
-                        response_dict = json.loads(hasil_json_str)
-                        if response_dict.get("status") == "ERROR":
-                            logger.warning(f"Command processing for {address} resulted in ERROR: {response_dict.get('data')}")
-                            connection_successful = False
-                    except json.JSONDecodeError:
-                        logger.error(f"Could not parse JSON from fp.proses_string for {address}: {hasil_json_str}")
-                        connection_successful = False
-                    response_to_send = hasil_json_str + "\r\n\r\n"
-                    logger.debug(f"Sending response to {address}: {response_to_send[:100]}{'...' if len(response_to_send)>100 else ''}")
-                    connection.sendall(response_to_send.encode())
-                    logger.debug(f"Response sent to {address}")
+                            response_to_send = hasil_json_str + "\r\n\r\n"
+                            logger.debug(f"Sending response to {address}: {response_to_send[:100]}{'...' if len(response_to_send)>100 else ''}")
+                            connection.sendall(response_to_send.encode())
+                            logger.debug(f"Response sent to {address}")
+                            trace.reply(hasil_json_str, hasil_json_str.status)
+                    trace.end()
+                    recv_scope.release(len(complete_command) + 4)
             else:
                 logger.info(f"Client {address} disconnected (recv returned no data).")
                 break
@@ -79,12 +92,19 @@ def process_client_connection(connection, address):
     except BrokenPipeError:
         logger.warning(f"Broken pipe with client {address}. Client may have closed connection abruptly.")
         connection_successful = False
+    except memory_budget.MemoryBudgetExceeded as e:
+        logger.warning(f"Rejecting client {address}: {e}")
+        handle_error_response(connection, address, str(e))
+        connection_successful = False
     except Exception as e:
         logger.error(f"Generic error processing client {address} in worker thread {threading.get_ident()}: {e}", exc_info=True)
         handle_error_response(connection, address, f"Server error: {str(e)}")
         connection_successful = False
     finally:
         logger.info(f"Closing connection with {address} by worker thread {threading.get_ident()}. Success: {connection_successful}")
+        recv_scope.release()
+        if memory_budget.get_budget().enabled:
+            logger.info(f"Memory budget after {address}: {memory_budget.get_budget().snapshot()}")
         connection.close()
         update_worker_stats(connection_successful)
 def handle_error_response(connection, address, error_message):
@@ -141,6 +161,9 @@ class Server(threading.Thread):
             self.logger.info(f"Total Connections Processed by Workers: {server_worker_stats['processed_connections']}")
             self.logger.info(f"  Successful Connections: {server_worker_stats['successful_connections']}")
             self.logger.info(f"  Failed Connections: {server_worker_stats['failed_connections']}")
+        budget_stats = memory_budget.get_budget().snapshot()
+        if budget_stats['limit']:
+            self.logger.info(f"Memory Budget: limit {budget_stats['limit']} bytes, current {budget_stats['current']}, peak {budget_stats['peak']}, waits {budget_stats['waits']}, rejected {budget_stats['rejected']}")
         self.logger.info("=" * 78)
     def stop_server(self):
         self.logger.info("Stop server called.")
@@ -165,8 +188,9 @@ class Server(threading.Thread):
 def main():
     main_logger = logging.getLogger(__name__)
     main_logger.info("Executing main() function to start server (Thread Pool Version).")
-    num_workers = 50
-    svr = Server(ipaddress='0.0.0.0', port=6677, max_workers=num_workers)
+    num_workers = int(os.environ.get('ETS_SERVER_WORKERS', '50'))
+    port = int(os.environ.get('ETS_SERVER_PORT', '6677'))
+    svr = Server(ipaddress='0.0.0.0', port=port, max_workers=num_workers)
     svr.start()
     main_logger.info(f"Server thread started with a pool of {num_workers} workers.")
     try:
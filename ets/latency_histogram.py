@@ -0,0 +1,60 @@
+import math
+class LogHistogram:
+    def __init__(self, precision=0.01, min_value=1e-6):
+        # Bucket k holds values in (min_value*(1+precision)**(k-1), min_value*(1+precision)**k], so every
+        # reported percentile is within `precision` relative error and histograms merge by adding counts
+        self.precision = precision
+        self.min_value = min_value
+        self.log_base = math.log1p(precision)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    def _index(self, value):
+        return 0 if value <= self.min_value else int(math.ceil(math.log(value / self.min_value) / self.log_base))
+    def _bucket_value(self, index):
+        return self.min_value if index == 0 else self.min_value * math.exp((index - 0.5) * self.log_base)
+    def record(self, value):
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    def merge(self, other):
+        if (other.precision, other.min_value) != (self.precision, self.min_value):
+            raise ValueError(f"Cannot merge histograms with different bucketing ({other.precision}/{other.min_value} vs {self.precision}/{self.min_value})")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+    def mean(self):
+        return self.total / self.count if self.count else None
+    def percentile(self, pct):
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(pct / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+    def distribution(self):
+        if not self.count:
+            return {}
+        return {"p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99), "min": self.min, "max": self.max}
+    def to_dict(self):
+        return {"precision": self.precision, "min_value": self.min_value, "count": self.count, "total": self.total, "min": self.min, "max": self.max,
+                "buckets": {str(index): count for index, count in self.buckets.items()}}
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["precision"], data["min_value"])
+        histogram.buckets = {int(index): count for index, count in data["buckets"].items()}
+        histogram.count = data["count"]; histogram.total = data["total"]; histogram.min = data["min"]; histogram.max = data["max"]
+        return histogram
@@ -0,0 +1,27 @@
+import os
+import mmap
+import hashlib
+from contextlib import contextmanager
+MMAP_THRESHOLD = int(os.environ.get('ETS_MMAP_THRESHOLD', str(4 * 1024 * 1024)))
+@contextmanager
+def read_view(fp, offset=0, length=None, threshold=None):
+    file_size = os.fstat(fp.fileno()).st_size
+    offset = min(offset, file_size)
+    length = file_size - offset if length is None else max(0, min(length, file_size - offset))
+    if length == 0 or length < (MMAP_THRESHOLD if threshold is None else threshold):
+        fp.seek(offset)
+        yield fp.read(length)
+        return
+    map_start = offset - offset % mmap.ALLOCATIONGRANULARITY
+    mapped = mmap.mmap(fp.fileno(), offset - map_start + length, offset=map_start, access=mmap.ACCESS_READ)
+    if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    view = memoryview(mapped)[offset - map_start:]
+    try:
+        yield view
+    finally:
+        view.release()
+        mapped.close()
+def sha256_file(path, threshold=None):
+    with open(path, 'rb') as fp, read_view(fp, threshold=threshold) as view:
+        return hashlib.sha256(view).hexdigest()
@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+BUDGET_MB = float(os.environ.get('ETS_MEMORY_BUDGET_MB', '0'))
+WAIT_SECONDS = float(os.environ.get('ETS_MEMORY_WAIT_S', '30'))
+CURRENT, PEAK, WAITS, REJECTED, TICKETS = range(5)
+# Slots for the admission tickets of connections currently holding budget; a holder without a slot just gets no priority
+MAX_HOLDERS = 1024
+class MemoryBudgetExceeded(MemoryError):
+    pass
+def encoded_size(raw_bytes):
+    return (raw_bytes + 2) // 3 * 4
+class MemoryBudget:
+    def __init__(self, limit_bytes, shared=False, wait_seconds=WAIT_SECONDS):
+        self.limit = int(limit_bytes)
+        self.wait_seconds = wait_seconds
+        if shared:
+            self.condition = multiprocessing.Condition()
+            self.counters = multiprocessing.RawArray('q', 5)
+            self.holders = multiprocessing.RawArray('q', MAX_HOLDERS)
+        else:
+            self.condition = threading.Condition()
+            self.counters = [0] * 5
+            self.holders = [0] * MAX_HOLDERS
+    @property
+    def enabled(self):
+        return self.limit > 0
+    def reserve(self, nbytes, wait_seconds=None, own=0, ticket=0):
+        if not self.enabled or nbytes <= 0:
+            return
+        wait_seconds = self.wait_seconds if wait_seconds is None else wait_seconds
+        deadline = time.monotonic() + wait_seconds
+        with self.condition:
+            waited = False
+            # A request bigger than the whole budget is admitted only when nothing else is in flight; `own` is what the
+            # caller already holds, so a command never waits on its own earlier reservations. Receive memory grows a recv
+            # at a time, so holders could each end up waiting for the others; the oldest holder is always admitted, even
+            # past the limit, and finishes and frees its share, so the others are served in the order they started holding
+            while self.counters[CURRENT] > own and self.counters[CURRENT] + nbytes > self.limit and not self._is_oldest(ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters[REJECTED] += 1
+                    raise MemoryBudgetExceeded(f"Server memory budget exhausted: {nbytes} bytes requested, {self.counters[CURRENT]} of {self.limit} in use")
+                if not waited:
+                    self.counters[WAITS] += 1; waited = True
+                self.condition.wait(remaining)
+            self.counters[CURRENT] += nbytes
+            self.counters[PEAK] = max(self.counters[PEAK], self.counters[CURRENT])
+    def _is_oldest(self, ticket):
+        return ticket > 0 and ticket == min((held for held in self.holders if held), default=0)
+    def take_ticket(self, scope):
+        # Under the lock, since batch items reserve for the same connection scope from several threads
+        with self.condition:
+            if scope.ticket:
+                return
+            for slot, held in enumerate(self.holders):
+                if not held:
+                    self.counters[TICKETS] += 1
+                    self.holders[slot] = scope.ticket = self.counters[TICKETS]
+                    return
+    def drop_ticket(self, ticket):
+        with self.condition:
+            for slot, held in enumerate(self.holders):
+                if held == ticket:
+                    self.holders[slot] = 0
+            self.condition.notify_all()
+    def release(self, nbytes):
+        if not self.enabled or nbytes <= 0:
+            return
+        with self.condition:
+            self.counters[CURRENT] = max(0, self.counters[CURRENT] - nbytes)
+            self.condition.notify_all()
+    def snapshot(self):
+        with self.condition:
+            return dict(limit=self.limit, current=self.counters[CURRENT], peak=self.counters[PEAK], waits=self.counters[WAITS], rejected=self.counters[REJECTED])
+class TransferScope:
+    def __init__(self, budget, outer=None):
+        self.budget = budget
+        self.outer = outer
+        self.held = 0
+        self.ticket = 0
+    def owned(self):
+        return self.held + (self.outer.owned() if self.outer else 0)
+    def root(self):
+        return self.outer.root() if self.outer else self
+    def reserve(self, nbytes, wait_seconds=None):
+        # Nested scopes (a command inside its connection's receive scope) share the connection's ticket
+        root = self.root()
+        self.budget.reserve(nbytes, wait_seconds, own=self.owned(), ticket=root.ticket)
+        if self.budget.enabled and nbytes > 0:
+            self.held += nbytes
+            if not root.ticket:
+                self.budget.take_ticket(root)
+    def release(self, nbytes=None):
+        nbytes = self.held if nbytes is None else min(nbytes, self.held)
+        self.budget.release(nbytes)
+        self.held -= nbytes
+        if self.ticket and not self.held:
+            self.budget.drop_ticket(self.ticket)
+            self.ticket = 0
+_budget = MemoryBudget(BUDGET_MB * 1024 * 1024)
+_local = threading.local()
+def install(budget):
+    global _budget
+    _budget = budget
+    if budget.enabled:
+        logging.getLogger(__name__).info(f"Memory budget installed: {budget.limit} bytes (wait up to {budget.wait_seconds}s).")
+def get_budget():
+    return _budget
+def new_shared_budget():
+    return MemoryBudget(BUDGET_MB * 1024 * 1024, shared=True)
+def current_scope():
+    return getattr(_local, 'scope', None)
+@contextmanager
+def transfer_scope(outer=None):
+    scope = TransferScope(_budget, outer)
+    previous = getattr(_local, 'scope', None)
+    _local.scope = scope
+    try:
+        yield scope
+    finally:
+        _local.scope = previous
+        scope.release()
+def run_in_scope(func, *args, outer=None):
+    scope = TransferScope(_budget, outer)
+    previous = getattr(_local, 'scope', None)
+    _local.scope = scope
+    try:
+        return func(*args), scope
+    except BaseException:
+        scope.release()
+        raise
+    finally:
+        _local.scope = previous
+def reserve(nbytes):
+    scope = getattr(_local, 'scope', None)
+    if scope is not None:
+        scope.reserve(nbytes)
@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import uuid
+import base64
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import importlib.util
+import file_interface
+from file_interface import FileInterface
+from file_protocol import FileProtocol
+ETS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(ETS_DIR)
+RESULTS_DIR = os.path.join(ETS_DIR, 'microbench_results')
+
+def load_http_server():
+    # tugas4/http.py shadows the standard library 'http' package, so it is loaded under another module name
+    spec = importlib.util.spec_from_file_location('tugas4_http', os.path.join(REPO_DIR, 'tugas4', 'http.py'))
+    module = importlib.util.module_from_spec(spec); spec.loader.exec_module(module)
+    return module.HttpServer
+
+def use_storage_dir(path):
+    file_interface.BASE_FILES_DIR = path
+    file_interface.SESSIONS_DIR = os.path.join(path, '.sessions'); file_interface.BLOBS_DIR = os.path.join(path, '.blobs'); file_interface.REFS_DIR = os.path.join(path, '.refs')
+    os.makedirs(path, exist_ok=True)
+
+def populate(directory, count):
+    existing = sum(1 for name in os.listdir(directory) if name.startswith('entry_'))
+    for idx in range(existing, count):
+        open(os.path.join(directory, f"entry_{idx:06d}.dat"), 'wb').close()
+
+def multipart_request(filename, payload):
+    boundary = f"----MicrobenchBoundary{uuid.uuid4().hex}"
+    body = b'\r\n'.join([f"--{boundary}".encode(), f'Content-Disposition: form-data; name="fileToUpload"; filename="{filename}"'.encode(),
+                         b'Content-Type: application/octet-stream', b'', payload, f"--{boundary}--".encode(), b''])
+    return (f"POST /upload HTTP/1.0\r\nHost: localhost\r\nContent-Type: multipart/form-data; boundary={boundary}\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+
+def response_bytes(parts):
+    # HttpServer.proses returns the header and body as separate parts (large files as a generator), like the servers send them
+    return sum(len(part) for part in parts)
+
+def build_cases(work_dir, sizes_kb, dir_sizes):
+    """Returns (name, setup, call) tuples; setup points the storage at the right directory before timing."""
+    HttpServer = load_http_server()
+    cases = []
+    payload_dir = os.path.join(work_dir, 'payload')
+    http_payload = HttpServer(); http_payload.base_dir = payload_dir; http_payload.upload_dir = os.path.join(payload_dir, 'uploads')
+    setup_payload = lambda: use_storage_dir(http_payload.upload_dir)
+    use_storage_dir(http_payload.upload_dir)
+    fi = FileInterface(); fp = FileProtocol()
+    for size_kb in sizes_kb:
+        # The trailing byte avoids \r, \n and '-', which tugas4's multipart parser strips from uploads
+        payload = os.urandom(max(0, size_kb * 1024 - 1)) + b'x'
+        payload_b64 = base64.b64encode(payload).decode()
+        name = f"payload_{size_kb}kb.bin"
+        with open(os.path.join(http_payload.upload_dir, name), 'wb') as f: f.write(payload)
+        upload_command = f"UPLOAD upload_{size_kb}kb.bin {payload_b64}"
+        http_post = multipart_request(f"post_{size_kb}kb.bin", payload)
+        cases += [(f"interface.get[{size_kb}KB]", setup_payload, lambda name=name: fi.get([name])),
+                  (f"interface.upload[{size_kb}KB]", setup_payload, lambda size_kb=size_kb, data=payload_b64: fi.upload([f"upload_{size_kb}kb.bin", data])),
+                  (f"protocol.get[{size_kb}KB]", setup_payload, lambda name=name: fp.proses_string(f"GET {name}")),
+                  (f"protocol.upload[{size_kb}KB]", setup_payload, lambda command=upload_command: fp.proses_string(command)),
+                  (f"http.get[{size_kb}KB]", None, lambda name=name: response_bytes(http_payload.proses(f"GET /uploads/{name} HTTP/1.0\r\nHost: localhost\r\n\r\n".encode()))),
+                  (f"http.post_multipart[{size_kb}KB]", None, lambda request=http_post: response_bytes(http_payload.proses(request)))]
+    for count in dir_sizes:
+        base_dir = os.path.join(work_dir, f"dir_{count}")
+        http_dir = HttpServer(); http_dir.base_dir = base_dir; http_dir.upload_dir = os.path.join(base_dir, 'uploads')
+        use_storage_dir(http_dir.upload_dir); populate(http_dir.upload_dir, count)
+        setup_dir = lambda directory=http_dir.upload_dir: use_storage_dir(directory)
+        cases += [(f"interface.list[{count} files]", setup_dir, lambda: fi.list([])),
+                  (f"protocol.list[{count} files]", setup_dir, lambda: fp.proses_string("LIST")),
+                  (f"protocol.stat[{count} files]", setup_dir, lambda: fp.proses_string("STAT entry_000000.dat")),
+                  (f"http.list[{count} files]", None, lambda server=http_dir: response_bytes(server.proses(b"GET /files HTTP/1.0\r\nHost: localhost\r\n\r\n")))]
+    return cases
+
+def measure(call, min_time, alloc_iterations):
+    call()
+    iterations, batch, elapsed = 0, 1, 0.0
+    start = time.perf_counter()
+    while elapsed < min_time:
+        for _ in range(batch): call()
+        iterations += batch; elapsed = time.perf_counter() - start
+        batch = min(batch * 2, 1024)
+    # Allocations are measured in a separate pass because tracemalloc slows every allocation down
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            before = tracemalloc.get_traced_memory()[0]; tracemalloc.reset_peak()
+            call()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before); retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {"iterations": iterations, "seconds": elapsed, "ops_per_s": iterations / elapsed, "us_per_op": elapsed / iterations * 1e6,
+            "peak_alloc_kb": max(peaks) / 1024, "retained_kb": sum(retained) / len(retained) / 1024}
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short=12", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def resolve_baseline(ref, results_dir):
+    if os.path.exists(ref): return ref
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short=12", ref], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ref
+    for candidate in (commit, f"{commit}-dirty"):
+        path = os.path.join(results_dir, f"{candidate}.json")
+        if os.path.exists(path): return path
+    return None
+
+def compare(results, baseline_results, threshold):
+    """Prints the change per case; a case regresses when ops/s drop or peak allocation grows by more than threshold."""
+    regressions = []
+    print(f"\n{'Case':<36}{'base ops/s':>14}{'ops/s':>14}{'change':>10}{'base peak KB':>14}{'peak KB':>12}")
+    for name, result in results.items():
+        base = baseline_results.get(name)
+        if not base: continue
+        speed_change = result["ops_per_s"] / base["ops_per_s"] - 1 if base["ops_per_s"] else 0.0
+        slower = speed_change < -threshold
+        more_memory = result["peak_alloc_kb"] > base["peak_alloc_kb"] * (1 + threshold) + 1
+        flag = "  REGRESSION" if slower or more_memory else ""
+        if flag: regressions.append(name)
+        print(f"{name:<36}{base['ops_per_s']:>14.1f}{result['ops_per_s']:>14.1f}{speed_change:>+10.1%}{base['peak_alloc_kb']:>14.1f}{result['peak_alloc_kb']:>12.1f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket-free microbenchmarks of FileProtocol.proses_string, FileInterface get/upload/list and tugas4 HttpServer.proses. Results are stored per git commit.")
+    parser.add_argument("-s", "--sizes_kb", type=int, nargs='+', default=[1, 64, 1024], help="Payload sizes in KB (default: 1 64 1024).")
+    parser.add_argument("-d", "--dir_sizes", type=int, nargs='+', default=[10, 1000, 100000], help="Directory sizes for LIST/STAT cases (default: 10 1000 100000).")
+    parser.add_argument("-k", "--filter", nargs='*', default=[], help="Only run cases whose name contains one of these substrings.")
+    parser.add_argument("--min_time", type=float, default=0.5, help="Minimum timed seconds per case (default: 0.5).")
+    parser.add_argument("--alloc_iterations", type=int, default=5, help="Calls per case traced with tracemalloc (default: 5).")
+    parser.add_argument("--results_dir", default=RESULTS_DIR, help=f"Where results are stored as <commit>.json (default: {os.path.relpath(RESULTS_DIR, REPO_DIR)}).")
+    parser.add_argument("--no_save", action="store_true", help="Do not store the results.")
+    parser.add_argument("--baseline", default=None, help="Commit-ish (e.g. HEAD~1) or results file to compare against; exits 1 on regression.")
+    parser.add_argument("--regression_threshold", type=float, default=0.10, help="Relative ops/s drop or peak allocation growth counted as a regression (default: 0.10).")
+    parser.add_argument("--work_dir", default=None, help="Directory for the generated files (default: a temporary directory, removed afterwards).")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="ets_microbench_")
+    results = {}
+    try:
+        cases = [case for case in build_cases(work_dir, args.sizes_kb, args.dir_sizes) if not args.filter or any(key in case[0] for key in args.filter)]
+        print(f"{'Case':<36}{'ops/s':>14}{'us/op':>14}{'peak KB':>12}{'retained KB':>13}")
+        for name, setup, call in cases:
+            if setup: setup()
+            results[name] = result = measure(call, args.min_time, args.alloc_iterations)
+            print(f"{name:<36}{result['ops_per_s']:>14.1f}{result['us_per_op']:>14.1f}{result['peak_alloc_kb']:>12.1f}{result['retained_kb']:>13.1f}", flush=True)
+    finally:
+        if not args.work_dir: shutil.rmtree(work_dir, ignore_errors=True)
+
+    revision = git_revision()
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"{revision}.json")
+        with open(path, 'w') as f:
+            json.dump({"commit": revision, "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'), "python": platform.python_version(), "machine": platform.platform(),
+                       "args": {key: getattr(args, key) for key in ("sizes_kb", "dir_sizes", "min_time", "alloc_iterations")}, "results": results}, f, indent=2)
+        print(f"\nResults for {revision} written to {path}")
+    if args.baseline:
+        baseline_path = resolve_baseline(args.baseline, args.results_dir)
+        if not baseline_path:
+            print(f"No stored results for baseline '{args.baseline}' in {args.results_dir}"); return 2
+        with open(baseline_path) as f: baseline = json.load(f)
+        print(f"\nComparing against {baseline.get('commit')} ({baseline_path}), threshold {args.regression_threshold:.0%}")
+        regressions = compare(results, baseline["results"], args.regression_threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}"); return 1
+        print("No regressions.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import sys
+import time
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import threading
+CHUNK_BYTES = 16 * 1024
+SEGMENT_BYTES = 1460
+
+class TokenBucket:
+    def __init__(self, rate_bytes_s, burst_bytes):
+        self.rate = rate_bytes_s; self.burst = burst_bytes
+        self.tokens = burst_bytes; self.updated = time.monotonic()
+    def reserve(self, nbytes):
+        # Tokens may go negative; each sender waits off its own debt, so connections sharing the link split its rate
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate); self.updated = now
+        self.tokens -= nbytes
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+class Impairment:
+    def __init__(self, rtt_ms=0.0, jitter_ms=0.0, bandwidth_mbps=0.0, stall_probability=0.0, stall_ms=0.0, seed=None):
+        self.rtt_ms = rtt_ms; self.jitter_ms = jitter_ms; self.bandwidth_mbps = bandwidth_mbps
+        self.stall_probability = stall_probability; self.stall_ms = stall_ms
+        self.random = random.Random(seed)
+        rate = bandwidth_mbps * 1e6 / 8
+        # Upstream and downstream are separate links, like a full-duplex WAN path shared by every proxied connection
+        self.links = {direction: TokenBucket(rate, max(CHUNK_BYTES, rate * 0.01)) for direction in ("up", "down")} if rate > 0 else {}
+    @property
+    def active(self):
+        return any((self.rtt_ms, self.jitter_ms, self.bandwidth_mbps, self.stall_probability and self.stall_ms))
+    def describe(self):
+        parts = [f"RTT {self.rtt_ms:g} ms", f"jitter {self.jitter_ms:g} ms"]
+        if self.bandwidth_mbps: parts.append(f"{self.bandwidth_mbps:g} Mbit/s per direction")
+        if self.stall_probability and self.stall_ms: parts.append(f"{self.stall_ms:g} ms stall on {self.stall_probability:g} of {SEGMENT_BYTES}-byte segments")
+        return ", ".join(parts)
+    def delay(self):
+        one_way = self.rtt_ms / 2000.0
+        return max(0.0, one_way + self.random.gauss(0, self.jitter_ms / 1000.0)) if self.jitter_ms else one_way
+    def stall(self, nbytes):
+        # A chunk stalls when any of its segments would have been lost and retransmitted
+        if not self.stall_probability or not self.stall_ms: return 0.0
+        segments = -(-nbytes // SEGMENT_BYTES)
+        return self.stall_ms / 1000.0 if self.random.random() < 1 - (1 - self.stall_probability) ** segments else 0.0
+    def throttle(self, direction, nbytes):
+        link = self.links.get(direction)
+        return link.reserve(nbytes) if link else 0.0
+
+class NetProxy(threading.Thread):
+    def __init__(self, target_host, target_port, impairment, listen_host='127.0.0.1', listen_port=0, buffer_kb=256):
+        threading.Thread.__init__(self, daemon=True)
+        self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self.target = (target_host, target_port); self.listen = (listen_host, listen_port)
+        self.impairment = impairment; self.queue_chunks = max(1, buffer_kb * 1024 // CHUNK_BYTES)
+        self.port = None; self.ready = threading.Event(); self.loop = None; self.stop_event = None; self.error = None
+        self.stats = {"connections": 0, "failed_connects": 0, "bytes_up": 0, "bytes_down": 0, "stalls": 0, "stall_s": 0.0, "throttle_s": 0.0}
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        try: self.loop.run_until_complete(self._serve())
+        except OSError as e: self.error = e; self.ready.set()
+        finally: self.loop.close()
+    async def _serve(self):
+        self.stop_event = asyncio.Event()
+        server = await asyncio.start_server(self._handle, *self.listen)
+        self.port = server.sockets[0].getsockname()[1]; self.ready.set()
+        self.logger.debug(f"Proxy {self.listen[0]}:{self.port} -> {self.target[0]}:{self.target[1]} ({self.impairment.describe()})")
+        await self.stop_event.wait()
+        server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers: task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+    def wait_ready(self, timeout=5):
+        if not self.ready.wait(timeout) or self.error: raise RuntimeError(f"Proxy did not start listening on {self.listen[0]}:{self.listen[1]}: {self.error}")
+        return self.port
+    def stop(self):
+        if self.loop and self.stop_event and not self.loop.is_closed(): self.loop.call_soon_threadsafe(self.stop_event.set)
+        self.join(5)
+    async def _handle(self, client_reader, client_writer):
+        # Loopback completes the TCP handshake at once; holding the first request bytes for one extra RTT charges it like a WAN would
+        handshake_done = asyncio.get_running_loop().time() + self.impairment.rtt_ms / 1000.0
+        try: server_reader, server_writer = await asyncio.open_connection(*self.target)
+        except OSError as e:
+            self.logger.warning(f"Cannot reach {self.target[0]}:{self.target[1]}: {e}"); self.stats["failed_connects"] += 1
+            client_writer.close(); return
+        self.stats["connections"] += 1
+        for writer in (client_writer, server_writer): writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writers = (client_writer, server_writer)
+        try: await asyncio.gather(self._pipe(client_reader, server_writer, "up", writers, handshake_done), self._pipe(server_reader, client_writer, "down", writers))
+        except asyncio.CancelledError: pass  # stop() cancels connections that are still open
+        finally:
+            for writer in writers: writer.close()
+    async def _pipe(self, reader, writer, direction, writers, not_before=0.0):
+        # The reader stamps each chunk with its delivery time; delivery times never decrease, so jitter cannot reorder the byte stream
+        chunks = asyncio.Queue(maxsize=self.queue_chunks); loop = asyncio.get_running_loop()
+        async def receive():
+            last_delivery = 0.0
+            while True:
+                try: data = await reader.read(CHUNK_BYTES)
+                except OSError: data = b""
+                last_delivery = max(last_delivery, max(loop.time(), not_before) + self.impairment.delay())
+                await chunks.put((last_delivery, data))
+                if not data: return
+        receiver = asyncio.ensure_future(receive())
+        try:
+            while True:
+                deliver_at, data = await chunks.get()
+                if deliver_at > loop.time(): await asyncio.sleep(deliver_at - loop.time())
+                if not data:
+                    if writer.can_write_eof(): writer.write_eof()
+                    return
+                stall = self.impairment.stall(len(data))
+                if stall: self.stats["stalls"] += 1; self.stats["stall_s"] += stall; await asyncio.sleep(stall)
+                wait = self.impairment.throttle(direction, len(data))
+                if wait: self.stats["throttle_s"] += wait; await asyncio.sleep(wait)
+                writer.write(data); await writer.drain()
+                self.stats[f"bytes_{direction}"] += len(data)
+        except OSError as e:
+            self.logger.debug(f"{direction} pipe closed: {e}")
+            for peer in writers: peer.close()
+        finally:
+            receiver.cancel()
+
+def add_impairment_arguments(parser):
+    parser.add_argument("--rtt_ms", type=float, default=0.0, help="Round-trip latency added by the proxy; half is applied in each direction (default: 0).")
+    parser.add_argument("--jitter_ms", type=float, default=0.0, help="Standard deviation of the one-way delay, without reordering bytes (default: 0).")
+    parser.add_argument("--bandwidth_mbps", type=float, default=0.0, help="Bandwidth cap in Mbit/s per direction, shared by all connections (default: unlimited).")
+    parser.add_argument("--stall_probability", type=float, default=0.0, help=f"Probability that a {SEGMENT_BYTES}-byte segment stalls, like a lost packet awaiting retransmission (default: 0).")
+    parser.add_argument("--stall_ms", type=float, default=200.0, help="Length of each stall (default: 200, a typical minimum retransmission timeout).")
+    parser.add_argument("--impairment_seed", type=int, default=None, help="Seed for jitter and stalls, for repeatable runs.")
+
+def impairment_from_args(args):
+    return Impairment(args.rtt_ms, args.jitter_ms, args.bandwidth_mbps, args.stall_probability, args.stall_ms, args.impairment_seed)
+
+def format_stats(stats):
+    return (f"{stats['connections']} connections ({stats['failed_connects']} failed to reach the server), {stats['bytes_up']/(1024*1024):.2f} MB up, "
+            f"{stats['bytes_down']/(1024*1024):.2f} MB down, {stats['stalls']} stalls ({stats['stall_s']:.2f} s), {stats['throttle_s']:.2f} s waiting on the bandwidth cap")
+
+def main():
+    parser = argparse.ArgumentParser(description="TCP proxy that adds latency, jitter, a bandwidth cap and stalls between a client (file_client_cli.py, tugas4 client.py, ...) and a server.")
+    parser.add_argument("target_host", help="Server host to forward to")
+    parser.add_argument("target_port", type=int, help="Server port to forward to")
+    parser.add_argument("--listen_host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument("--listen_port", type=int, default=0, help="Port to listen on (default: an ephemeral port, printed at start).")
+    parser.add_argument("--buffer_kb", type=int, default=256, help="Data held in flight per direction and connection before the sender is pushed back (default: 256).")
+    add_impairment_arguments(parser)
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable DEBUG level logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(asctime)s - %(levelname)s - PROXY - %(message)s')
+    proxy = NetProxy(args.target_host, args.target_port, impairment_from_args(args), args.listen_host, args.listen_port, args.buffer_kb)
+    proxy.start()
+    try: port = proxy.wait_ready()
+    except RuntimeError as e: print(e); return 1
+    print(f"Proxy listening on {args.listen_host}:{port}, forwarding to {args.target_host}:{args.target_port} ({proxy.impairment.describe()}). Ctrl-C to stop.", flush=True)
+    try:
+        while proxy.is_alive(): proxy.join(1)
+    except KeyboardInterrupt:
+        proxy.stop()
+    print(f"Proxy stats: {format_stats(proxy.stats)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import math
+import base64
+import binascii
+import lzma
+import zlib
+CODECS = ('none', 'zlib', 'lzma')
+STREAM_CHUNK_SIZE = 1048576
+SAMPLE_SIZE = 16384
+SAMPLE_COUNT = 4
+ENTROPY_THRESHOLD = 7.5
+def byte_entropy(sample):
+    if not sample:
+        return 0.0
+    total = len(sample)
+    entropy = 0.0
+    for value in range(256):
+        count = sample.count(value)
+        if count:
+            p = count / total
+            entropy -= p * math.log2(p)
+    return entropy
+def sample_entropy(fp, file_size):
+    samples = []
+    for index in range(SAMPLE_COUNT):
+        fp.seek(max(0, (file_size - SAMPLE_SIZE) * index // max(1, SAMPLE_COUNT - 1)))
+        samples.append(fp.read(SAMPLE_SIZE))
+    fp.seek(0)
+    return byte_entropy(b''.join(samples))
+def worth_compressing(fp, file_size):
+    return sample_entropy(fp, file_size) < ENTROPY_THRESHOLD
+def new_compressor(codec, level=None):
+    if codec == 'zlib':
+        return zlib.compressobj(6 if level is None else level)
+    if codec == 'lzma':
+        return lzma.LZMACompressor(preset=6 if level is None else level)
+    raise ValueError(f'Unsupported codec: {codec}')
+def new_decompressor(codec):
+    if codec == 'zlib':
+        return zlib.decompressobj()
+    if codec == 'lzma':
+        return lzma.LZMADecompressor()
+    raise ValueError(f'Unsupported codec: {codec}')
+def compress_stream(fp, codec, level=None):
+    compressor = new_compressor(codec, level)
+    for chunk in iter(lambda: fp.read(STREAM_CHUNK_SIZE), b''):
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+def base64_stream(blocks, chunk_size=STREAM_CHUNK_SIZE):
+    # Regroups arbitrary blocks into multiples of 3 bytes, so the encoded pieces concatenate into one valid base64 string
+    pending = bytearray()
+    for block in blocks:
+        pending += block
+        if len(pending) >= chunk_size:
+            usable = len(pending) - len(pending) % 3
+            yield base64.b64encode(pending[:usable])
+            del pending[:usable]
+    yield base64.b64encode(pending)
+def bounded_decompress(decompressor, block, max_length=STREAM_CHUNK_SIZE):
+    # Each call returns at most max_length bytes, so a small, highly compressed payload cannot expand in memory at once
+    while True:
+        output = decompressor.decompress(block, max_length)
+        if output:
+            yield output
+        if decompressor.eof:
+            return
+        if hasattr(decompressor, 'unconsumed_tail'):
+            block = decompressor.unconsumed_tail
+            if not block and len(output) < max_length:
+                return
+        else:
+            block = b''
+            if decompressor.needs_input:
+                return
+def check_complete(decompressor):
+    if not decompressor.eof:
+        raise ValueError('Compressed payload is truncated (stream ended before its end marker)')
+def decode_base64_to(encoded, codec, write):
+    # Decodes (and decompresses) in slices of whole base64 quanta, so only one slice is ever held decoded
+    decompressor = new_decompressor(codec) if codec != 'none' else None
+    step = STREAM_CHUNK_SIZE // 3 * 4
+    received = written = 0
+    for start in range(0, len(encoded), step):
+        block = binascii.a2b_base64(encoded[start:start + step])
+        received += len(block)
+        for output in (bounded_decompress(decompressor, block) if decompressor is not None else (block,)):
+            if output:
+                write(output)
+                written += len(output)
+    if decompressor is not None:
+        check_complete(decompressor)
+    return received, written
+def decompress_to(payload, codec, write):
+    decompressor = new_decompressor(codec)
+    view = memoryview(payload)
+    written = 0
+    for start in range(0, len(view), STREAM_CHUNK_SIZE):
+        for block in bounded_decompress(decompressor, view[start:start + STREAM_CHUNK_SIZE]):
+            write(block)
+            written += len(block)
+    check_complete(decompressor)
+    return written
@@ -0,0 +1,68 @@
+import os
+import time
+import threading
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+def proc_available():
+    return os.path.isdir('/proc/self')
+def _read_stat(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        # The command name may contain spaces, so split after its closing parenthesis
+        fields = f.read().rsplit(')', 1)[1].split()
+    return {"ppid": int(fields[1]), "cpu_ticks": int(fields[11]) + int(fields[12]), "child_cpu_ticks": int(fields[13]) + int(fields[14]),
+            "threads": int(fields[17]), "rss": int(fields[21]) * PAGE_SIZE}
+def _read_ctxt_switches(pid):
+    voluntary = involuntary = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('voluntary_ctxt_switches:'): voluntary = int(line.split()[1])
+            elif line.startswith('nonvoluntary_ctxt_switches:'): involuntary = int(line.split()[1])
+    return voluntary, involuntary
+def process_tree(root_pid):
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit(): continue
+        try: children.setdefault(_read_stat(entry)["ppid"], []).append(int(entry))
+        except (OSError, IndexError, ValueError): continue
+    tree, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop(); tree.append(pid); pending.extend(children.get(pid, []))
+    return tree
+def sample_tree(root_pid):
+    totals = {"cpu_s": 0.0, "rss": 0, "threads": 0, "fds": 0, "voluntary_ctxt": 0, "involuntary_ctxt": 0, "processes": 0}
+    for pid in process_tree(root_pid):
+        try:
+            stat = _read_stat(pid)
+            voluntary, involuntary = _read_ctxt_switches(pid)
+            fds = len(os.listdir(f'/proc/{pid}/fd'))
+        except (OSError, IndexError, ValueError):
+            continue
+        # Children reaped by the root (e.g. recycled pool workers) still count through the root's cutime/cstime
+        cpu_ticks = stat["cpu_ticks"] + (stat["child_cpu_ticks"] if pid == root_pid else 0)
+        totals["cpu_s"] += cpu_ticks / CLOCK_TICKS; totals["rss"] += stat["rss"]; totals["threads"] += stat["threads"]; totals["fds"] += fds
+        totals["voluntary_ctxt"] += voluntary; totals["involuntary_ctxt"] += involuntary; totals["processes"] += 1
+    return totals
+class ProcSampler(threading.Thread):
+    def __init__(self, root_pid, interval=0.5):
+        threading.Thread.__init__(self, name=f"proc-sampler-{root_pid}", daemon=True)
+        self.root_pid = root_pid; self.interval = interval
+        self.samples = []; self.stop_event = threading.Event()
+    def run(self):
+        while True:
+            sample = sample_tree(self.root_pid)
+            if sample["processes"]: self.samples.append(dict(sample, t=time.perf_counter()))
+            if self.stop_event.wait(self.interval): break
+    def stop(self):
+        self.stop_event.set(); self.join()
+        final = sample_tree(self.root_pid)
+        if final["processes"]: self.samples.append(dict(final, t=time.perf_counter()))
+        return self.summary()
+    def summary(self):
+        if len(self.samples) < 2: return None
+        first, last = self.samples[0], self.samples[-1]
+        return {"samples": len(self.samples), "interval_s": self.interval, "elapsed_s": last["t"] - first["t"],
+                "cpu_s": max(0.0, last["cpu_s"] - first["cpu_s"]),
+                "avg_rss": sum(sample["rss"] for sample in self.samples) / len(self.samples), "peak_rss": max(sample["rss"] for sample in self.samples),
+                "peak_threads": max(sample["threads"] for sample in self.samples), "peak_fds": max(sample["fds"] for sample in self.samples),
+                "peak_processes": max(sample["processes"] for sample in self.samples),
+                "voluntary_ctxt": max(0, last["voluntary_ctxt"] - first["voluntary_ctxt"]), "involuntary_ctxt": max(0, last["involuntary_ctxt"] - first["involuntary_ctxt"])}
@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import json
+import time
+import base64
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import payload_codec
+from file_client_cli import ServerConnection, STREAM_CHUNK_BYTES, distribution
+# Commands the replayer can rebuild from metadata alone; session, delta and batch commands need arguments the trace does not keep
+REPLAYABLE_OPS = ('UPLOAD', 'GET', 'STAT', 'DELETE', 'LIST')
+
+def load_trace(path):
+    with open(path) as f: records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda record: (record["ts"], record["conn"], record["seq"]))
+    return records
+
+def group_connections(records):
+    connections = {}
+    for record in records: connections.setdefault(record["conn"], []).append(record)
+    for commands in connections.values(): commands.sort(key=lambda record: record["seq"])
+    return sorted(connections.values(), key=lambda commands: commands[0]["ts"])
+
+def name_dependencies(records):
+    # Each command waits for the previous recorded command on the same file, so a faster replay cannot GET a file
+    # before its UPLOAD finished or DELETE it while it is still being read
+    last_command, waits_for = {}, {}
+    for idx, record in enumerate(records):
+        record["idx"] = idx
+        if record["op"] not in REPLAYABLE_OPS or not record.get("name"): continue
+        if record["name"] in last_command: waits_for[idx] = last_command[record["name"]]
+        last_command[record["name"]] = idx
+    return waits_for, {done_idx: threading.Event() for done_idx in set(waits_for.values())}
+
+def waiting_connections(records, waits_for):
+    # Connections with a command that waits for another connection's command; each can hold a worker while it waits
+    return len({records[idx]["conn"] for idx, done_idx in waits_for.items() if records[done_idx]["conn"] != records[idx]["conn"]})
+
+def files_to_prepare(records, name_prefix, default_size):
+    # Files a command reads before the trace itself uploads them must exist on the target beforehand
+    uploaded, needed = set(), {}
+    for record in records:
+        if record["op"] not in REPLAYABLE_OPS or not record.get("name"): continue
+        name = name_prefix + record["name"]
+        if record["op"] == 'UPLOAD': uploaded.add(name)
+        elif name not in uploaded and name not in needed and (record["op"] != 'DELETE' or record.get("status") == "OK"):
+            needed[name] = record["size"] if record["op"] == 'GET' and record.get("size") is not None else default_size
+    return needed
+
+def compressed_blocks(block, size, codec):
+    compressor = payload_codec.new_compressor(codec)
+    for start in range(0, size, STREAM_CHUNK_BYTES): yield compressor.compress(block[start:min(size, start + STREAM_CHUNK_BYTES)])
+    yield compressor.flush()
+
+def upload_chunks(block, server_filename, size, codec='none'):
+    yield f"UPLOAD {server_filename} ".encode()
+    # STREAM_CHUNK_BYTES is a multiple of 3, so the encoded slices concatenate into one valid base64 string
+    if codec == 'none':
+        for start in range(0, size, STREAM_CHUNK_BYTES): yield base64.b64encode(block[start:min(size, start + STREAM_CHUNK_BYTES)])
+        return
+    # A compressed upload is rebuilt from its original size, so the server decompresses and writes as many bytes as in the capture.
+    # The synthetic block is random, though, so it stays about as large on the wire as it is on disk
+    yield from payload_codec.base64_stream(compressed_blocks(block, size, codec), STREAM_CHUNK_BYTES)
+    yield f" {codec}".encode()
+
+class CountingSink:
+    # Counts a GET reply's data_file characters as they stream past instead of keeping them
+    def reset(self): self.encoded = 0; self.original_size = None
+    def begin(self, head):
+        match = re.search(rb'"data_original_size": (\d+)', head)
+        if match: self.original_size = int(match.group(1))
+    def write(self, encoded): self.encoded += len(encoded)
+
+def issue(conn, op, name, size, block, codec='none'):
+    if op == 'UPLOAD': conn.send_chunks(upload_chunks(block, name, size, codec)); return conn.recv_message(), size
+    command = f"{op} {name}" if name else op
+    if op == 'GET' and codec != 'none': command += f" {codec}"
+    conn.send_message(command)
+    if op != 'GET': return conn.recv_message(), 0
+    sink = CountingSink(); sink.reset()
+    reply = conn.recv_message_to(sink)
+    return reply, sink.original_size if sink.original_size is not None else sink.encoded * 3 // 4
+
+def replay_connection(commands, args, block, replay_start, trace_start, dependencies, results, skipped, lock, logger):
+    waits_for, finished = dependencies
+    conn = None
+    try:
+        for record in commands:
+            target = None if args.max_speed else replay_start + (record["ts"] - trace_start) / args.speed
+            delay = target - time.perf_counter() if target is not None else 0
+            if delay > 0: time.sleep(delay)
+            if record["op"] not in REPLAYABLE_OPS:
+                with lock: skipped[record["op"]] = skipped.get(record["op"], 0) + 1
+                continue
+            if record["idx"] in waits_for and not finished[waits_for[record["idx"]]].wait(args.timeout):
+                logger.warning(f"{record['op']} {record['name']} issued before the previous command on that file finished (timed out)")
+            lag = max(0.0, time.perf_counter() - target) if target is not None else None
+            name = args.name_prefix + record["name"] if record.get("name") else None
+            start = time.perf_counter(); status = "FAILED"; transferred = 0
+            try:
+                # The capture starts its clock at the first request byte, so connection set-up is left out here too
+                if conn is None: conn = ServerConnection(args.server_ip, args.server_port, timeout=args.timeout); start = time.perf_counter()
+                reply, transferred = issue(conn, record["op"], name, record.get("size") or 0, block, record.get("codec") or 'none')
+                status = json.loads(reply).get("status", "ERROR")
+            except (OSError, ConnectionError, ValueError) as e:
+                logger.warning(f"Replay of {record['op']} {name} (connection {record['conn']}) failed: {e}")
+                if conn: conn.close(); conn = None
+            finally:
+                if record["idx"] in finished: finished[record["idx"]].set()
+            result = {"op": record["op"], "captured_s": record.get("latency_s"), "replayed_s": time.perf_counter() - start, "lag_s": lag,
+                      "captured_status": record.get("status"), "status": status, "bytes": transferred}
+            with lock: results.append(result)
+    finally:
+        if conn: conn.close()
+
+def prepare_files(args, needed, block, logger):
+    for name, size in needed.items():
+        conn = ServerConnection(args.server_ip, args.server_port, timeout=args.timeout)
+        try:
+            reply, _ = issue(conn, 'UPLOAD', name, size, block)
+            if json.loads(reply).get("status") != "OK": logger.warning(f"Could not prepare {name}: {reply[:200]}")
+        finally: conn.close()
+
+def cleanup(args, names, logger):
+    for name in names:
+        try:
+            conn = ServerConnection(args.server_ip, args.server_port, timeout=args.timeout)
+            try: issue(conn, 'DELETE', name, 0, None)
+            finally: conn.close()
+        except (OSError, ConnectionError) as e: logger.warning(f"Could not delete {name}: {e}")
+
+def summarize(results, skipped, records, replay_duration, args):
+    trace_span = records[-1]["ts"] - records[0]["ts"] if records else 0.0
+    ops = {}
+    for result in results: ops.setdefault(result["op"], []).append(result)
+    summary = {"trace": args.trace_file, "speed": None if args.max_speed else args.speed, "captured_span_s": trace_span, "replay_duration_s": replay_duration,
+               "skipped": skipped, "operations": {}}
+    for op, op_results in ops.items():
+        ok = [result for result in op_results if result["status"] == "OK"]
+        captured = [result["captured_s"] for result in op_results if result["captured_s"] is not None]
+        summary["operations"][op] = {"count": len(op_results), "ok": len(ok), "status_changed": sum(result["status"] != result["captured_status"] for result in op_results),
+                                     "bytes": sum(result["bytes"] for result in ok), "captured_latency_s": distribution(captured),
+                                     "replayed_latency_s": distribution([result["replayed_s"] for result in ok])}
+    lags = [result["lag_s"] for result in results if result["lag_s"] is not None]
+    summary["schedule_lag_s"] = distribution(lags)
+    return summary
+
+def print_summary(summary):
+    speed = "max speed" if summary["speed"] is None else f"{summary['speed']:g}x"
+    print("\n" + "=" * 15 + f" TRACE REPLAY ({speed}) OF {summary['trace']} " + "=" * 15)
+    print(f"Captured span {summary['captured_span_s']:.3f} s, replayed in {summary['replay_duration_s']:.3f} s")
+    print(f"{'Op':<8}{'Count':>7}{'OK':>7}{'Changed':>9}{'Cap p50':>10}{'Rep p50':>10}{'Δ p50':>9}{'Cap p99':>10}{'Rep p99':>10}{'Δ p99':>9}")
+    for op, op_summary in summary["operations"].items():
+        captured = op_summary["captured_latency_s"]; replayed = op_summary["replayed_latency_s"]
+        cells = []
+        for pct in ("p50", "p99"):
+            cap = captured.get(pct); rep = replayed.get(pct)
+            change = f"{(rep - cap) / cap * 100:+.0f}%" if cap and rep is not None else "n/a"
+            cells.append(f"{cap if cap is not None else float('nan'):>10.4f}{rep if rep is not None else float('nan'):>10.4f}{change:>9}")
+        print(f"{op:<8}{op_summary['count']:>7}{op_summary['ok']:>7}{op_summary['status_changed']:>9}" + "".join(cells))
+    if summary["skipped"]: print("Not replayable (skipped): " + ", ".join(f"{op} x{count}" for op, count in summary["skipped"].items()))
+    lag = summary["schedule_lag_s"]
+    if lag: print(f"Schedule lag p50/p99/max: {lag['p50']:.4f} / {lag['p99']:.4f} / {lag['max']:.4f} s" + ("  (behind schedule: too few --workers, or commands waiting for the previous command on the same file)" if lag['p99'] > 0.05 else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a trace captured with ETS_TRACE_FILE against any file server, using synthetic payloads of the recorded sizes and codecs, and compare latencies with the capture.")
+    parser.add_argument("server_ip", help="IP address of the file server")
+    parser.add_argument("server_port", type=int, help="Port number of the file server")
+    parser.add_argument("trace_file", help="Trace written by a server started with ETS_TRACE_FILE=<path>")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time scale: 1 replays the recorded inter-arrival times, N replays N times faster (default: 1).")
+    parser.add_argument("--max_speed", action="store_true", help="Ignore recorded timing; every connection issues its commands back to back.")
+    parser.add_argument("-w", "--workers", type=int, default=64, help="Connections replayed at the same time (default: 64; raised when more connections than that wait on another connection's command).")
+    parser.add_argument("--name_prefix", default="replay_", help="Prefix for every filename on the target server (default: replay_).")
+    parser.add_argument("--default_size", type=int, default=1024, help="Size in bytes of prepared files whose size the trace does not show (default: 1024).")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Socket timeout per connection in seconds (default: 600).")
+    parser.add_argument("--no_cleanup", action="store_true", help="Leave the replayed files on the server.")
+    parser.add_argument("--output_json", default=None, help="Write the summary to this JSON file.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable DEBUG level logging")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format='%(asctime)s - %(levelname)s - %(threadName)s - REPLAY - %(message)s')
+    logger = logging.getLogger(__name__)
+    if args.speed <= 0: parser.error("--speed must be positive")
+
+    records = load_trace(args.trace_file)
+    if not records: print(f"{args.trace_file} holds no commands."); return 1
+    connections = group_connections(records); dependencies = name_dependencies(records)
+    max_size = max([record.get("size") or 0 for record in records if record["op"] in ('UPLOAD', 'GET')] + [args.default_size])
+    block = memoryview(os.urandom(max_size))
+    needed = files_to_prepare(records, args.name_prefix, args.default_size)
+    print(f"Replaying {len(records)} commands on {len(connections)} connections from {args.trace_file}; preparing {len(needed)} file(s)", flush=True)
+    try:
+        prepare_files(args, needed, block, logger)
+    except (OSError, ConnectionError) as e:
+        print(f"Cannot reach {args.server_ip}:{args.server_port}: {e}"); return 1
+
+    results, skipped, lock = [], {}, threading.Lock()
+    # Connections start in recorded order, so a worker only ever waits for the next connection that is due.
+    # Waiting connections could otherwise fill every worker while the commands they wait for sit in the queue,
+    # so there is always one worker more than there are connections that can wait
+    workers = min(len(connections), max(args.workers, waiting_connections(records, dependencies[0]) + 1))
+    if workers > args.workers: print(f"Using {workers} workers so connections waiting on another connection's command cannot stall the replay", flush=True)
+    replay_start = time.perf_counter() + (0 if args.max_speed else 0.1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(replay_connection, commands, args, block, replay_start, records[0]["ts"], dependencies, results, skipped, lock, logger) for commands in connections]
+        for future in futures: future.result()
+    replay_duration = time.perf_counter() - replay_start
+
+    if not args.no_cleanup:
+        names = set(needed) | {args.name_prefix + record["name"] for record in records if record["op"] == 'UPLOAD' and record.get("name")}
+        cleanup(args, sorted(names), logger)
+    summary = summarize(results, skipped, records, replay_duration, args)
+    print_summary(summary)
+    if args.output_json:
+        with open(args.output_json, 'w') as f: json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.output_json}")
+    return 0 if all(result["status"] == "OK" or result["captured_status"] != "OK" for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
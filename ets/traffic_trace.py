@@ -0,0 +1,86 @@
+import os
+import re
+import json
+import time
+import itertools
+import threading
+TRACE_FILE = os.environ.get('ETS_TRACE_FILE')
+# Only this much of a command or reply is inspected; payloads are measured, never copied into the trace
+HEAD_CHARS = 512
+_connection_ids = itertools.count(1)
+_DATA_FILE_RE = re.compile(r'"data_file": "')
+_ORIGINAL_SIZE_RE = re.compile(r'"data_original_size": (\d+)')
+
+def describe_command(command):
+    head = command[:HEAD_CHARS].split()
+    op = head[0].upper() if head else ''
+    name = head[1] if len(head) > 1 and op != 'LIST' else None
+    # UPLOAD carries base64 after the filename; every other command's arguments are small
+    size = None; codec = 'none' if op in ('UPLOAD', 'GET') else None
+    if op == 'GET' and len(head) > 2: codec = head[2].lower()
+    if op == 'UPLOAD' and len(head) > 2:
+        payload_at = command.find(name, command.find(head[0]) + len(head[0])) + len(name)
+        while command[payload_at].isspace(): payload_at += 1
+        payload_end = command.find(' ', payload_at)
+        if payload_end == -1: payload_end = len(command)
+        # For a compressed upload this is the compressed size; the reply's data_original_size replaces it
+        size = (payload_end - payload_at) * 3 // 4 - command.count('=', max(payload_at, payload_end - 2), payload_end)
+        tail = command[payload_end:].split()
+        if tail: codec = tail[0].lower()
+    return op, name, size, codec
+
+def describe_reply(reply):
+    head = reply[:HEAD_CHARS]
+    match = _ORIGINAL_SIZE_RE.search(head)
+    if match: return int(match.group(1))
+    match = _DATA_FILE_RE.search(head)
+    # data_file is the last key of a GET reply, so everything after its opening quote but the closing '"}' is base64
+    return (len(reply) - match.end() - 2) * 3 // 4 - reply.count('=', max(match.end(), len(reply) - 4), len(reply) - 2) if match else None
+
+class TraceWriter:
+    def __init__(self, path):
+        self.path = path; self.fd = None; self.pid = None
+        self.lock = threading.Lock()
+    def write(self, record):
+        line = (json.dumps(record, separators=(',', ':')) + "\n").encode()
+        with self.lock:
+            # Reopened after fork; O_APPEND keeps each single-write line intact between worker processes
+            if self.pid != os.getpid(): self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644); self.pid = os.getpid()
+            os.write(self.fd, line)
+
+_writer = TraceWriter(TRACE_FILE) if TRACE_FILE else None
+
+class ConnectionTrace:
+    def __init__(self, writer):
+        self.writer = writer
+        self.connection_id = f"{os.getpid()}-{next(_connection_ids)}" if writer else None
+        self.seq = 0; self.arrival = None; self.command = None
+    def received(self):
+        if self.writer and self.arrival is None: self.arrival = time.time()
+    def begin(self, command, more_pending=False):
+        if not self.writer: return
+        now = time.time()
+        op, name, size, codec = describe_command(command)
+        self.command = {"ts": round(self.arrival or now, 6), "conn": self.connection_id, "seq": self.seq, "op": op, "name": name, "size": size, "codec": codec,
+                        "req_bytes": len(command) + 4, "recv_s": round(now - (self.arrival or now), 6), "resp_bytes": 0, "status": None}
+        self.begun = now
+        # A pipelined command already sitting in the buffer arrived no later than this one finished parsing
+        self.arrival = now if more_pending else None
+        self.seq += 1
+    def reply(self, reply, status, nbytes=None):
+        # A streamed reply passes its head and the byte count actually sent
+        if not self.command: return
+        self.command["resp_bytes"] += (len(reply) if nbytes is None else nbytes) + 4
+        if self.command["status"] in (None, "OK"): self.command["status"] = status
+        if self.command["op"] == 'GET' and self.command["size"] is None: self.command["size"] = describe_reply(reply)
+        # A compressed upload is recorded at its original size, so a replay can rebuild the payload from size and codec
+        if self.command["op"] == 'UPLOAD' and self.command["codec"] != 'none': self.command["size"] = describe_reply(reply) or self.command["size"]
+    def end(self):
+        if not self.command: return
+        now = time.time()
+        self.command["service_s"] = round(now - self.begun, 6)
+        self.command["latency_s"] = round(now - self.command["ts"], 6)
+        self.writer.write(self.command); self.command = None
+
+def connection_trace():
+    return ConnectionTrace(_writer)
@@ -0,0 +1,116 @@
+import os
+import json
+import random
+import bisect
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+OPERATIONS = ('UPLOAD', 'GET', 'LIST', 'DELETE')
+SIZE_UNITS = {'size_b': 1, 'size_kb': 1024, 'size_mb': 1024 * 1024}
+class WorkloadError(ValueError):
+    pass
+def _bytes_of(bucket, prefix):
+    for unit, factor in SIZE_UNITS.items():
+        key = unit.replace('size', prefix) if prefix else unit
+        if key in bucket:
+            return int(float(bucket[key]) * factor)
+    return None
+class SizeDistribution:
+    def __init__(self, buckets):
+        if not buckets:
+            raise WorkloadError("Workload 'sizes' needs at least one bucket")
+        self.buckets = []
+        for bucket in buckets:
+            fixed = _bytes_of(bucket, None)
+            low = _bytes_of(bucket, 'min'); high = _bytes_of(bucket, 'max')
+            if fixed is None and (low is None or high is None):
+                raise WorkloadError(f"Size bucket {bucket} needs size_b/size_kb/size_mb or a min_*/max_* range")
+            low, high = (fixed, fixed) if fixed is not None else (low, high)
+            if low < 0 or high < low:
+                raise WorkloadError(f"Size bucket {bucket} has an invalid range")
+            self.buckets.append((low, high, float(bucket.get('weight', 1))))
+        self.cumulative = []
+        total = 0.0
+        for _, _, weight in self.buckets:
+            total += weight; self.cumulative.append(total)
+    def sample(self, rng):
+        low, high, _ = self.buckets[bisect.bisect_right(self.cumulative, rng.random() * self.cumulative[-1])]
+        # Sizes are rounded to whole KB above 1 KB so uploads can share cached payload files
+        size = rng.randint(low, high)
+        return size if size < 1024 else size // 1024 * 1024
+class KeyChooser:
+    def __init__(self, count, popularity='uniform', zipf_s=1.0):
+        if count < 1:
+            raise WorkloadError("Workload 'keys.count' must be at least 1")
+        if popularity not in ('uniform', 'zipf'):
+            raise WorkloadError(f"Unknown key popularity '{popularity}' (uniform or zipf)")
+        self.count = count; self.popularity = popularity
+        self.cumulative = []
+        if popularity == 'zipf':
+            total = 0.0
+            for rank in range(1, count + 1):
+                total += 1.0 / rank ** zipf_s; self.cumulative.append(total)
+    def sample(self, rng):
+        if self.popularity == 'uniform':
+            return rng.randrange(self.count)
+        return min(self.count - 1, bisect.bisect_right(self.cumulative, rng.random() * self.cumulative[-1]))
+class WorkloadProfile:
+    def __init__(self, spec, source='<dict>'):
+        self.source = source
+        self.name = spec.get('name', os.path.splitext(os.path.basename(source))[0])
+        self.workers = int(spec.get('workers', 1))
+        self.operations_per_worker = int(spec.get('operations_per_worker', 100))
+        self.preload = bool(spec.get('preload', True))
+        self.seed = spec.get('seed')
+        weights = {op.upper(): float(weight) for op, weight in spec.get('operations', {}).items()}
+        unknown = set(weights) - set(OPERATIONS)
+        if unknown or not weights or sum(weights.values()) <= 0:
+            raise WorkloadError(f"Workload 'operations' needs positive weights for {list(OPERATIONS)} (unknown: {sorted(unknown)})")
+        self.operation_names = [op for op in OPERATIONS if weights.get(op, 0) > 0]
+        self.operation_cumulative = []
+        total = 0.0
+        for op in self.operation_names:
+            total += weights[op]; self.operation_cumulative.append(total)
+        self.sizes = SizeDistribution(spec.get('sizes', [{'size_kb': 64}]))
+        keys = spec.get('keys', {})
+        self.keys = KeyChooser(int(keys.get('count', 100)), keys.get('popularity', 'uniform'), float(keys.get('zipf_s', 1.0)))
+        think = spec.get('think_time_ms', 0)
+        if not isinstance(think, dict):
+            think = {'mean': think, 'distribution': 'fixed'}
+        self.think_mean_s = float(think.get('mean', 0)) / 1000.0
+        self.think_distribution = think.get('distribution', 'fixed')
+        if self.think_distribution not in ('fixed', 'exponential', 'uniform'):
+            raise WorkloadError(f"Unknown think time distribution '{self.think_distribution}'")
+        size_rng = random.Random(self.seed)
+        self.key_sizes = [self.sizes.sample(size_rng) for _ in range(self.keys.count)]
+    def choose_operation(self, rng):
+        return self.operation_names[bisect.bisect_right(self.operation_cumulative, rng.random() * self.operation_cumulative[-1])]
+    def choose_key(self, rng):
+        return self.keys.sample(rng)
+    def think_time(self, rng):
+        if self.think_mean_s <= 0:
+            return 0.0
+        if self.think_distribution == 'exponential':
+            return rng.expovariate(1.0 / self.think_mean_s)
+        if self.think_distribution == 'uniform':
+            return rng.uniform(0, 2 * self.think_mean_s)
+        return self.think_mean_s
+    def describe(self):
+        total = self.operation_cumulative[-1]; previous = 0.0; mix = []
+        for op, cumulative in zip(self.operation_names, self.operation_cumulative):
+            mix.append(f"{op} {100 * (cumulative - previous) / total:.0f}%"); previous = cumulative
+        sizes = sorted(self.key_sizes)
+        return (f"{self.name}: {self.workers} workers x {self.operations_per_worker} ops, mix [{', '.join(mix)}], "
+                f"{self.keys.count} keys ({self.keys.popularity}), key sizes {sizes[0]}B..{sizes[-1]}B (median {sizes[len(sizes) // 2]}B), "
+                f"think {self.think_mean_s * 1000:g}ms {self.think_distribution}")
+def load_profile(path):
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise WorkloadError("TOML workload profiles need Python 3.11+ (tomllib); use JSON instead")
+        with open(path, 'rb') as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path) as f:
+            spec = json.load(f)
+    return WorkloadProfile(spec, path)
@@ -6,6 +6,7 @@ import threading
 import logging # logging imported here
 import time
 import sys
+import os
 
 # --- CONFIGURE LOGGING AT THE VERY TOP ---
 # This ensures logging is configured before any other part of the application,
@@ -133,8 +134,8 @@ def main():
     main_logger = logging.getLogger(__name__) # Get a logger for the main module context
     main_logger.info("Executing main() function to start server.")
     
-    # Port 6666 is used here, ensure Server class __init__ default matches or is overridden
-    svr = Server(ipaddress='0.0.0.0', port=6666) 
+    # Port 6666 is the default; ETS_SERVER_PORT overrides it (used by ets/bench_harness.py)
+    svr = Server(ipaddress='0.0.0.0', port=int(os.environ.get('ETS_SERVER_PORT', '6666')))
     svr.start()
     main_logger.info("Server thread started. Main thread will now implicitly wait or could join svr.")
     # If you want the main thread to wait for the server thread (e.g., for cleaner shutdown later):
@@ -2,9 +2,15 @@ import sys
 import os
 import os.path
 import logging  # 1. Impor modul logging
+import mmap
+import itertools
+import uuid
 from datetime import datetime
 import urllib.parse
 
+# File yang lebih besar dari ambang ini dibaca lewat mmap agar page cache dipakai bersama
+MMAP_THRESHOLD = int(os.environ.get('HTTP_MMAP_THRESHOLD', str(4 * 1024 * 1024)))
+
 class HttpServer:
     def __init__(self):
         self.sessions = {}
@@ -25,7 +31,6 @@ class HttpServer:
             os.makedirs(self.upload_dir)
 
     def response(self, kode=404, message='Not Found', messagebody=b'', headers={}):
-        # (Fungsi ini tidak perlu diubah)
         tanggal = datetime.now().strftime('%c')
         resp = []
         resp.append(f"HTTP/1.0 {kode} {message}\r\n")
@@ -39,12 +44,30 @@ class HttpServer:
 
         response_headers = "".join(resp)
         
-        if not isinstance(messagebody, bytes):
+        if isinstance(messagebody, str):
             messagebody = messagebody.encode()
 
-        return response_headers.encode() + messagebody
-
-    def proses(self, data):
+        # Header dan body dikembalikan terpisah dan dikirim satu per satu, jadi body (mis. view mmap) tidak pernah disalin
+        return [response_headers.encode(), messagebody]
+
+    def response_mmap(self, path, content_type):
+        # Generator: mmap tetap terbuka selama server mengirim bagian-bagian response
+        with open(path, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as isi:
+                yield from self.response(200, 'OK', isi, {'Content-Type': content_type})
+
+    def proses(self, data, keep_alive=False):
+        hasil = self.layani(data)
+        if not keep_alive:
+            return hasil
+        # Koneksi persisten: hanya header Connection di bagian pertama yang ditukar, body (termasuk view mmap) tidak disentuh
+        bagian = iter(hasil)
+        kepala = next(bagian).replace(b"\r\nConnection: close\r\n", b"\r\nConnection: keep-alive\r\n", 1)
+        return itertools.chain([kepala], bagian)
+
+    def layani(self, data):
         request_parts = data.split(b"\r\n\r\n", 1)
         headers_bytes = request_parts[0]
         body_bytes = request_parts[1] if len(request_parts) > 1 else b''
@@ -96,11 +119,14 @@ class HttpServer:
             return self.response(403, 'Forbidden', b'Access denied', {})
 
         if os.path.exists(safe_path) and os.path.isfile(safe_path):
-            with open(safe_path, 'rb') as fp:
-                isi = fp.read()
             fext = os.path.splitext(safe_path)[1].lower()
             content_type = self.types.get(fext, 'application/octet-stream')
-            return self.response(200, 'OK', isi, {'Content-Type': content_type})
+            with open(safe_path, 'rb') as fp:
+                ukuran = os.fstat(fp.fileno()).st_size
+                if ukuran < MMAP_THRESHOLD or ukuran == 0:
+                    return self.response(200, 'OK', fp.read(), {'Content-Type': content_type})
+            # File besar: body dikirim langsung dari halaman mmap, tanpa salinan bytes perantara
+            return self.response_mmap(safe_path, content_type)
         
         logging.warning(f"GET: File tidak ditemukan di '{safe_path}'")
         return self.response(404, 'Not Found', b'File or resource not found', {})
@@ -130,8 +156,11 @@ class HttpServer:
                             save_path = os.path.join(self.upload_dir, filename)
                             
                             content = part.split(b'\r\n\r\n', 1)[1].rstrip(b'\r\n--\r\n')
-                            with open(save_path, 'wb') as f:
+                            # Tulis ke file sementara lalu rename, supaya pembaca mmap tidak melihat file terpotong
+                            tmp_path = f"{save_path}.{uuid.uuid4().hex}.tmp"
+                            with open(tmp_path, 'wb') as f:
                                 f.write(content)
+                            os.replace(tmp_path, save_path)
                             logging.info(f"UPLOAD BERHASIL: File disimpan di '{save_path}'")
                 
                 return self.response(200, 'OK', b'Upload successful', {'Location': '/index.html'})
@@ -0,0 +1,333 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import threading
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Skenario bawaan: bobot tiap operasi terhadap /files, aset statis, /upload dan DELETE
+DEFAULT_MIX = "list=3,static=4,get_upload=1,upload=1,delete=1"
+STATIC_ASSETS = ['/index.html', '/style.css', '/mickeytikus.jpg']
+OPERATIONS = ('list', 'static', 'get_upload', 'upload', 'delete')
+
+def parse_mix(spec):
+    """Mengubah 'list=3,upload=1' menjadi daftar (operasi, bobot kumulatif)."""
+    weights = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition('=')
+        name = name.strip().lower()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operasi '{name}' tidak dikenal, pilih dari {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    total = 0.0
+    cumulative = []
+    for name in OPERATIONS:
+        if weights.get(name, 0) > 0:
+            total += weights[name]
+            cumulative.append((name, total))
+    if not cumulative:
+        raise ValueError("Skenario harus punya minimal satu operasi dengan bobot positif")
+    return cumulative
+
+def choose(cumulative, rng):
+    point = rng.random() * cumulative[-1][1]
+    for name, bound in cumulative:
+        if point < bound:
+            return name
+    return cumulative[-1][0]
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = (len(sorted_values) - 1) * pct / 100.0
+    low = int(index)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (index - low)
+
+class Scenario:
+    """Membuat request HTTP untuk tiap operasi; satu instance per worker."""
+    def __init__(self, host, mix, payload, keep_alive, seed):
+        self.host = host
+        self.mix = mix
+        self.payload = payload
+        self.keep_alive = keep_alive
+        self.rng = random.Random(seed)
+        self.prefix = f"loadtest_{uuid.uuid4().hex[:8]}"
+        self.uploaded = []
+        self.counter = 0
+
+    def request(self, method, path, body=b'', extra_headers=None):
+        headers = [f"{method} {path} HTTP/1.0", f"Host: {self.host}", "User-Agent: Load-Test-Client/1.0",
+                   f"Connection: {'keep-alive' if self.keep_alive else 'close'}"]
+        headers += extra_headers or []
+        if body:
+            headers.append(f"Content-Length: {len(body)}")
+        return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+    def upload_request(self):
+        self.counter += 1
+        filename = f"{self.prefix}_{self.counter}.bin"
+        boundary = f"----LoadTestBoundary{uuid.uuid4().hex}"
+        body = b'\r\n'.join([f"--{boundary}".encode(),
+                             f'Content-Disposition: form-data; name="fileToUpload"; filename="{filename}"'.encode(),
+                             b'Content-Type: application/octet-stream', b'', self.payload, f"--{boundary}--".encode(), b''])
+        return filename, self.request('POST', '/upload', body, [f"Content-Type: multipart/form-data; boundary={boundary}"])
+
+    def next(self):
+        """Mengembalikan (operasi, bytes request, nama file yang terupload bila operasi berhasil)."""
+        op = choose(self.mix, self.rng)
+        # DELETE dan GET upload butuh file milik worker ini; kalau belum ada, upload dulu
+        if op in ('delete', 'get_upload') and not self.uploaded:
+            op = 'upload'
+        if op == 'list':
+            return op, self.request('GET', '/files'), None
+        if op == 'static':
+            return op, self.request('GET', self.rng.choice(STATIC_ASSETS)), None
+        if op == 'get_upload':
+            return op, self.request('GET', f"/uploads/{self.rng.choice(self.uploaded)}"), None
+        if op == 'delete':
+            return op, self.request('DELETE', f"/{self.uploaded.pop(self.rng.randrange(len(self.uploaded)))}"), None
+        filename, data = self.upload_request()
+        return op, data, filename
+
+def parse_head(head):
+    lines = head.decode('iso-8859-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    headers = {line.split(':', 1)[0].strip().lower(): line.split(':', 1)[1].strip() for line in lines[1:] if ':' in line}
+    return status, headers
+
+def read_response(reader):
+    """Membaca satu response dari file socket; mengembalikan (status, header, jumlah byte)."""
+    head = b''
+    while not head.endswith(b'\r\n\r\n'):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Server menutup koneksi sebelum mengirim header")
+        head += line
+    status, headers = parse_head(head)
+    # Body dibaca sesuai Content-Length, karena pada koneksi keep-alive server tidak menutup socket setelah response
+    body = reader.read(int(headers['content-length'])) if 'content-length' in headers else reader.read()
+    return status, headers, len(head) + len(body)
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {op: [] for op in OPERATIONS}
+        self.errors = {op: 0 for op in OPERATIONS}
+        self.status_codes = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.connections = 0
+        self.reused = 0
+
+    def record(self, op, latency, status, sent, received, reused):
+        with self.lock:
+            self.status_codes[str(status)] = self.status_codes.get(str(status), 0) + 1
+            if status is None or status >= 300:
+                self.errors[op] += 1
+            else:
+                self.latencies[op].append(latency)
+            self.bytes_sent += sent
+            self.bytes_received += received
+            if reused:
+                self.reused += 1
+            else:
+                self.connections += 1
+
+    def summary(self, elapsed):
+        operations = {}
+        for op in OPERATIONS:
+            values = sorted(self.latencies[op])
+            if not values and not self.errors[op]:
+                continue
+            operations[op] = {"ok": len(values), "errors": self.errors[op], "rps": len(values) / elapsed if elapsed > 0 else 0,
+                              "latency_ms": {name: (percentile(values, pct) * 1000 if values else None) for name, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))}}
+        total_ok = sum(op["ok"] for op in operations.values())
+        all_values = sorted(value for op in OPERATIONS for value in self.latencies[op])
+        return {"elapsed_s": elapsed, "requests": total_ok + sum(op["errors"] for op in operations.values()), "ok": total_ok,
+                "rps": total_ok / elapsed if elapsed > 0 else 0,
+                "latency_ms": {name: (percentile(all_values, pct) * 1000 if all_values else None) for name, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+                "operations": operations, "status_codes": self.status_codes, "connections_opened": self.connections, "connections_reused": self.reused,
+                "mb_sent": self.bytes_sent / (1024 * 1024), "mb_received": self.bytes_received / (1024 * 1024)}
+
+def _more_work(deadline, done, limit):
+    return done < limit if limit else time.perf_counter() < deadline
+
+def thread_worker(address, scenario, stats, deadline, limit, timeout):
+    sock, reader, done, failures = None, None, 0, 0
+    while _more_work(deadline, done, limit):
+        op, data, filename = scenario.next()
+        reused = sock is not None
+        start = time.perf_counter()
+        status, sent, received = None, 0, 0
+        try:
+            if sock is None:
+                sock = socket.create_connection(address, timeout=timeout)
+                reader = sock.makefile('rb')
+            sock.sendall(data)
+            sent = len(data)
+            status, headers, received = read_response(reader)
+            closing = not scenario.keep_alive or headers.get('connection', '').lower() == 'close'
+        except (OSError, ValueError, IndexError) as e:
+            # Hanya kegagalan pertama per worker yang dicatat agar server mati tidak membanjiri log
+            if not failures:
+                logging.warning(f"{op} gagal: {e}")
+            failures += 1
+            closing = True
+        stats.record(op, time.perf_counter() - start, status, sent, received, reused)
+        if filename and status == 200:
+            scenario.uploaded.append(filename)
+        if closing and sock is not None:
+            reader.close(); sock.close(); sock = None
+        done += 1
+    if sock is not None:
+        reader.close(); sock.close()
+
+async def async_worker(address, scenario, stats, deadline, limit, timeout):
+    reader = writer = None
+    done = failures = 0
+    while _more_work(deadline, done, limit):
+        op, data, filename = scenario.next()
+        reused = writer is not None
+        start = time.perf_counter()
+        status, sent, received = None, 0, 0
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(*address), timeout)
+            writer.write(data)
+            await writer.drain()
+            sent = len(data)
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+            status, headers = parse_head(head)
+            closing = not scenario.keep_alive or headers.get('connection', '').lower() == 'close'
+            if 'content-length' in headers:
+                body = await asyncio.wait_for(reader.readexactly(int(headers['content-length'])), timeout)
+            else:
+                body = await asyncio.wait_for(reader.read(), timeout)
+            received = len(head) + len(body)
+        except (OSError, ValueError, IndexError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            # Hanya kegagalan pertama per worker yang dicatat agar server mati tidak membanjiri log
+            if not failures:
+                logging.warning(f"{op} gagal: {e}")
+            failures += 1
+            closing = True
+        stats.record(op, time.perf_counter() - start, status, sent, received, reused)
+        if filename and status == 200:
+            scenario.uploaded.append(filename)
+        if closing and writer is not None:
+            writer.close(); writer = None
+        done += 1
+    if writer is not None:
+        writer.close()
+
+def cleanup(address, scenarios, timeout):
+    """Menghapus file yang masih tersisa dari upload selama pengujian."""
+    removed = 0
+    for scenario in scenarios:
+        for filename in scenario.uploaded:
+            try:
+                with socket.create_connection(address, timeout=timeout) as sock, sock.makefile('rb') as reader:
+                    sock.sendall(f"DELETE /{filename} HTTP/1.0\r\n\r\n".encode())
+                    read_response(reader)
+                removed += 1
+            except OSError as e:
+                logging.warning(f"Gagal menghapus '{filename}': {e}")
+    return removed
+
+def run_load(host, port, args, mix, payload):
+    address = (host, port)
+    stats = Stats()
+    scenarios = [Scenario(host, mix, payload, args.keep_alive, None if args.seed is None else args.seed + i) for i in range(args.workers)]
+    limit = args.requests
+    start = time.perf_counter()
+    deadline = start + args.duration
+    if args.engine == 'asyncio':
+        async def run_all():
+            await asyncio.gather(*(async_worker(address, scenario, stats, deadline, limit, args.timeout) for scenario in scenarios))
+        asyncio.run(run_all())
+    else:
+        threads = [threading.Thread(target=thread_worker, args=(address, scenario, stats, deadline, limit, args.timeout), name=f"load-{i}")
+                   for i, scenario in enumerate(scenarios)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    summary = stats.summary(time.perf_counter() - start)
+    if not args.no_cleanup:
+        summary["cleaned_up"] = cleanup(address, scenarios, args.timeout)
+    summary.update(target=f"{host}:{port}", engine=args.engine, workers=args.workers, keep_alive=args.keep_alive, mix=args.mix, upload_kb=args.upload_kb)
+    return summary
+
+def _fmt(value, spec='.2f'):
+    return format(value, spec) if value is not None else 'n/a'
+
+def print_summary(summary):
+    print(f"\n=== {summary['target']} | {summary['engine']} x{summary['workers']} | keep-alive {'on' if summary['keep_alive'] else 'off'} ===")
+    print(f"Requests: {summary['requests']} ({summary['ok']} ok) in {summary['elapsed_s']:.2f}s -> {summary['rps']:.1f} req/s")
+    latency = summary['latency_ms']
+    print(f"Latency ms: p50 {_fmt(latency['p50'])}  p90 {_fmt(latency['p90'])}  p99 {_fmt(latency['p99'])}  max {_fmt(latency['max'])}")
+    print(f"Connections: {summary['connections_opened']} opened, {summary['connections_reused']} reused | sent {summary['mb_sent']:.2f} MB, received {summary['mb_received']:.2f} MB")
+    print(f"Status codes: {summary['status_codes']}")
+    print(f"{'Operasi':<12}{'ok':>8}{'error':>8}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, data in summary['operations'].items():
+        lat = data['latency_ms']
+        print(f"{op:<12}{data['ok']:>8}{data['errors']:>8}{data['rps']:>10.1f}{_fmt(lat['p50']):>10}{_fmt(lat['p90']):>10}{_fmt(lat['p99']):>10}{_fmt(lat['max']):>10}")
+
+def print_comparison(summaries):
+    print("\n=== Perbandingan server ===")
+    print(f"{'Target':<22}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'error':>8}")
+    for summary in summaries:
+        latency = summary['latency_ms']
+        print(f"{summary['target']:<22}{summary['rps']:>10.1f}{_fmt(latency['p50']):>10}{_fmt(latency['p90']):>10}{_fmt(latency['p99']):>10}{summary['requests'] - summary['ok']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load tester untuk server HTTP tugas4 (thread pool 8885, process pool 8889).")
+    parser.add_argument("host", nargs='?', default='localhost')
+    parser.add_argument("--ports", type=int, nargs='+', default=[8885],
+                        help="Port server yang diuji berurutan dengan skenario yang sama, mis. --ports 8885 8889 (default: 8885).")
+    parser.add_argument("-w", "--workers", type=int, default=10, help="Jumlah worker konkuren (default: 10).")
+    parser.add_argument("--engine", choices=['thread', 'asyncio'], default='thread', help="Worker berupa thread atau coroutine asyncio (default: thread).")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Lama pengujian per server dalam detik (default: 10).")
+    parser.add_argument("-n", "--requests", type=int, default=0, help="Jumlah request per worker; jika diisi, --duration diabaikan.")
+    parser.add_argument("--keep-alive", dest="keep_alive", action="store_true",
+                        help="Minta Connection: keep-alive dan pakai ulang koneksi selama server tidak menutupnya "
+                             "(server tugas4 menutup koneksi yang menganggur setelah HTTP_KEEPALIVE_TIMEOUT detik, default 5).")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Bobot operasi ({', '.join(OPERATIONS)}), default: {DEFAULT_MIX}.")
+    parser.add_argument("--upload-kb", dest="upload_kb", type=int, default=64, help="Ukuran file upload dalam KB (default: 64).")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout socket per request dalam detik (default: 30).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed acak agar urutan operasi bisa diulang.")
+    parser.add_argument("--no-cleanup", dest="no_cleanup", action="store_true", help="Jangan hapus file hasil upload setelah pengujian.")
+    parser.add_argument("--output-json", dest="output_json", default=None, help="Simpan ringkasan semua server ke file JSON.")
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    # Byte terakhir bukan \r, \n atau '-' karena server memangkas karakter itu dari akhir isi upload
+    payload = os.urandom(max(0, args.upload_kb * 1024 - 1)) + b'x'
+
+    summaries = []
+    for port in args.ports:
+        logging.info(f"Menguji {args.host}:{port} ({args.engine}, {args.workers} worker, keep-alive {'on' if args.keep_alive else 'off'})...")
+        summary = run_load(args.host, port, args, mix, payload)
+        print_summary(summary)
+        summaries.append(summary)
+    if len(summaries) > 1:
+        print_comparison(summaries)
+    if args.output_json:
+        with open(args.output_json, 'w') as f:
+            json.dump({"args": vars(args), "results": summaries}, f, indent=2)
+        logging.info(f"Hasil disimpan di {args.output_json}")
+    return 0 if all(summary['ok'] for summary in summaries) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
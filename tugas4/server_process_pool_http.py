@@ -1,5 +1,6 @@
 from socket import *
 import socket
+import os
 import sys
 import logging
 from concurrent.futures import ProcessPoolExecutor
@@ -8,6 +9,55 @@ from http import HttpServer
 # Objek ini akan di-inherit oleh child process saat fork, tapi logging perlu di-reinisialisasi.
 httpserver = HttpServer()
 
+# Koneksi keep-alive yang menganggur lebih lama dari ini ditutup agar worker process bisa melayani koneksi lain
+KEEPALIVE_TIMEOUT = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', '5'))
+
+def baca_request(connection):
+    """Membaca satu request utuh; mengembalikan (request, keep_alive); request kosong berarti koneksi sudah ditutup client."""
+    # Baca header terlebih dahulu sampai \r\n\r\n
+    headers_data = b""
+    while True:
+        data = connection.recv(1)
+        if not data:
+            break
+        headers_data += data
+        if headers_data.endswith(b"\r\n\r\n"):
+            break
+    if not headers_data.endswith(b"\r\n\r\n"):
+        # Koneksi ditutup sebelum header lengkap; sisa yang ada tetap diproses seperti sebelumnya
+        return headers_data, False
+
+    headers_str = headers_data.decode('utf-8', 'ignore')
+    
+    # Cari Content-Length untuk mengetahui ukuran body, dan Connection untuk keep-alive
+    content_length = 0
+    keep_alive = False
+    lines = headers_str.split('\r\n')
+    for line in lines:
+        if line.lower().startswith('content-length:'):
+            try:
+                content_length = int(line.split(':')[1].strip())
+            except (ValueError, IndexError):
+                content_length = 0
+        elif line.lower().startswith('connection:'):
+            keep_alive = line.split(':', 1)[1].strip().lower() == 'keep-alive'
+    
+    # Baca body sesuai Content-Length
+    body_data = b""
+    if content_length > 0:
+        remaining_bytes = content_length
+        while remaining_bytes > 0:
+            chunk = connection.recv(min(remaining_bytes, 4096))
+            if not chunk:
+                break
+            body_data += chunk
+            remaining_bytes -= len(chunk)
+        # Body terpotong: koneksi tidak bisa dipakai ulang
+        if remaining_bytes > 0:
+            keep_alive = False
+
+    return headers_data + body_data, keep_alive
+
 def ProcessTheClient(connection, address):
     """
     Fungsi ini dijalankan di dalam sebuah child process.
@@ -23,46 +73,26 @@ def ProcessTheClient(connection, address):
     # -------------------------
 
     try:
-        # Baca header terlebih dahulu sampai \r\n\r\n
-        headers_data = b""
+        # Satu koneksi melayani beberapa request selama client meminta Connection: keep-alive.
+        # Selama itu satu worker process terpakai, jadi koneksi yang menganggur ditutup setelah KEEPALIVE_TIMEOUT.
+        # Header dan body dikirim terpisah; tanpa TCP_NODELAY, Nagle + delayed ACK menahan tiap response keep-alive ~40 ms
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         while True:
-            data = connection.recv(1)
-            if not data:
-                break
-            headers_data += data
-            if headers_data.endswith(b"\r\n\r\n"):
+            full_request, keep_alive = baca_request(connection)
+            if not full_request:
                 break
-
-        headers_str = headers_data.decode('utf-8', 'ignore')
-        
-        # Cari Content-Length untuk mengetahui ukuran body
-        content_length = 0
-        lines = headers_str.split('\r\n')
-        for line in lines:
-            if line.lower().startswith('content-length:'):
-                try:
-                    content_length = int(line.split(':')[1].strip())
-                except (ValueError, IndexError):
-                    content_length = 0
+            
+            # Sekarang, log dari dalam httpserver.proses() akan muncul karena logging sudah dikonfigurasi
+            hasil = httpserver.proses(full_request, keep_alive)
+            
+            for bagian in hasil:
+                connection.sendall(bagian)
+            if not keep_alive:
                 break
-        
-        # Baca body sesuai Content-Length
-        body_data = b""
-        if content_length > 0:
-            remaining_bytes = content_length
-            while remaining_bytes > 0:
-                chunk = connection.recv(min(remaining_bytes, 4096))
-                if not chunk:
-                    break
-                body_data += chunk
-                remaining_bytes -= len(chunk)
-
-        full_request = headers_data + body_data
-        
-        # Sekarang, log dari dalam httpserver.proses() akan muncul karena logging sudah dikonfigurasi
-        hasil = httpserver.proses(full_request)
-        
-        connection.sendall(hasil)
+            connection.settimeout(KEEPALIVE_TIMEOUT)
+    
+    except socket.timeout:
+        logging.info(f"Koneksi keep-alive dari {address} menganggur, ditutup.")
     
     except Exception as e:
         logging.error(f"Error pada process untuk client {address}: {e}")
@@ -81,12 +111,16 @@ def Server():
     logging.info(f"Server (Process Pool) berjalan di http://localhost:{server_address[1]}")
 
     with ProcessPoolExecutor(10) as executor:
+        # Dengan fork, semua worker dibuat pada submit pertama; jalankan sebelum accept
+        # supaya socket client pertama tidak ikut diwariskan ke child dan EOF-nya tertahan
+        executor.submit(os.getpid).result()
         while True:
             try:
                 connection, client_address = my_socket.accept()
                 logging.info(f"Koneksi diterima dari {client_address}, diserahkan ke process pool.")
                 
-                executor.submit(ProcessTheClient, connection, client_address)
+                # Salinan socket di proses induk ditutup begitu worker selesai, supaya client langsung melihat EOF
+                executor.submit(ProcessTheClient, connection, client_address).add_done_callback(lambda _, c=connection: c.close())
             except KeyboardInterrupt:
                 logging.info("\nServer dihentikan oleh pengguna.")
                 break
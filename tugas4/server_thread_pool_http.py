@@ -1,5 +1,6 @@
 from socket import *
 import socket
+import os
 import sys
 import logging  # 1. Impor modul logging
 from concurrent.futures import ThreadPoolExecutor
@@ -7,46 +8,74 @@ from http import HttpServer
 
 httpserver = HttpServer()
 
+# Koneksi keep-alive yang menganggur lebih lama dari ini ditutup agar thread pool tidak habis
+KEEPALIVE_TIMEOUT = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', '5'))
+
+def baca_request(connection):
+    """Membaca satu request utuh; mengembalikan (request, keep_alive); request kosong berarti koneksi sudah ditutup client."""
+    headers_data = b""
+    while True:
+        data = connection.recv(1)
+        if not data:
+            break
+        headers_data += data
+        if headers_data.endswith(b"\r\n\r\n"):
+            break
+    if not headers_data.endswith(b"\r\n\r\n"):
+        # Koneksi ditutup sebelum header lengkap; sisa yang ada tetap diproses seperti sebelumnya
+        return headers_data, False
+
+    headers_str = headers_data.decode('utf-8', 'ignore')
+    
+    content_length = 0
+    keep_alive = False
+    lines = headers_str.split('\r\n')
+    for line in lines:
+        if line.lower().startswith('content-length:'):
+            try:
+                content_length = int(line.split(':')[1].strip())
+            except (ValueError, IndexError):
+                content_length = 0
+        elif line.lower().startswith('connection:'):
+            keep_alive = line.split(':', 1)[1].strip().lower() == 'keep-alive'
+    
+    body_data = b""
+    if content_length > 0:
+        remaining_bytes = content_length
+        while remaining_bytes > 0:
+            chunk = connection.recv(min(remaining_bytes, 4096))
+            if not chunk:
+                break
+            body_data += chunk
+            remaining_bytes -= len(chunk)
+        # Body terpotong: koneksi tidak bisa dipakai ulang
+        if remaining_bytes > 0:
+            keep_alive = False
+
+    return headers_data + body_data, keep_alive
+
 def ProcessTheClient(connection, address):
     try:
-        headers_data = b""
+        # Satu koneksi melayani beberapa request selama client meminta Connection: keep-alive
+        # Header dan body dikirim terpisah; tanpa TCP_NODELAY, Nagle + delayed ACK menahan tiap response keep-alive ~40 ms
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         while True:
-            data = connection.recv(1)
-            if not data:
-                break
-            headers_data += data
-            if headers_data.endswith(b"\r\n\r\n"):
+            full_request, keep_alive = baca_request(connection)
+            if not full_request:
                 break
-
-        headers_str = headers_data.decode('utf-8', 'ignore')
-        
-        content_length = 0
-        lines = headers_str.split('\r\n')
-        for line in lines:
-            if line.lower().startswith('content-length:'):
-                try:
-                    content_length = int(line.split(':')[1].strip())
-                except (ValueError, IndexError):
-                    content_length = 0
+            
+            # Di sini, `server_thread_pool_http.py` hanya menyerahkan request
+            # ke `http.py` tanpa tahu isinya.
+            hasil = httpserver.proses(full_request, keep_alive)
+            
+            for bagian in hasil:
+                connection.sendall(bagian)
+            if not keep_alive:
                 break
-        
-        body_data = b""
-        if content_length > 0:
-            remaining_bytes = content_length
-            while remaining_bytes > 0:
-                chunk = connection.recv(min(remaining_bytes, 4096))
-                if not chunk:
-                    break
-                body_data += chunk
-                remaining_bytes -= len(chunk)
-
-        full_request = headers_data + body_data
-        
-        # Di sini, `server_thread_pool_http.py` hanya menyerahkan request
-        # ke `http.py` tanpa tahu isinya.
-        hasil = httpserver.proses(full_request)
-        
-        connection.sendall(hasil)
+            connection.settimeout(KEEPALIVE_TIMEOUT)
+    
+    except socket.timeout:
+        logging.info(f"Koneksi keep-alive dari {address} menganggur, ditutup.")
     
     except Exception as e:
         # 4. Catat error jika terjadi masalah saat menangani koneksi